@@ -116,6 +116,13 @@ if %errorlevel% neq 0 (
 )
 echo.
 
+echo Compilando snapshot do baseline para a API...
+python compile_baseline.py
+if %errorlevel% neq 0 (
+    echo [AVISO] Erro ao compilar baseline - API calculara a partir dos CSVs (continuando...)
+)
+echo.
+
 REM Sucesso
 echo ============================================================
 echo   SETUP COMPLETO!
@@ -137,6 +144,8 @@ echo   1. API esta rodando (este terminal)
 echo   2. Abra dashboard.html no navegador
 echo   3. Para testar: abra novo CMD e execute 'python test_api.py'
 echo.
+echo Modo producao (varios workers): python serve.py
+echo.
 echo Pressione Ctrl+C para parar a API
 echo ============================================================
 echo.
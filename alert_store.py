@@ -0,0 +1,131 @@
+from bisect import bisect_left
+from datetime import datetime
+import threading
+from typing import Dict, List
+
+
+class AlertStore:
+    """
+    Armazenamento de alertas com retenção limitada
+
+    Os alertas ficam em ordem de criação junto com um índice de
+    timestamps (epoch), o que permite consultas por intervalo com busca
+    binária. Contadores por severidade são mantidos a cada inserção, então
+    totais não exigem percorrer o histórico.
+
+    Thread-safe: um lock próprio protege inserção (ids sequenciais sem
+    repetição), descarte e consultas, sem depender do lock de quem insere.
+    """
+
+    def __init__(self, max_alerts: int = 10000, max_age_seconds: float = None):
+        """
+        Args:
+            max_alerts: Quantidade máxima de alertas retidos
+            max_age_seconds: Idade máxima de um alerta retido (None = sem limite)
+        """
+        self.max_alerts = max_alerts
+        self.max_age_seconds = max_age_seconds
+        self._alerts = []
+        self._times = []
+        # Posição do alerta retido mais antigo (itens anteriores já foram descartados)
+        self._start = 0
+        # Totais desde o início (ou último clear), incluindo alertas descartados
+        self.total = 0
+        self.severity_counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, alert: Dict) -> Dict:
+        """Registra um alerta, atribuindo id e timestamp"""
+        with self._lock:
+            now = datetime.now()
+            self.total += 1
+            record = {'id': self.total, 'timestamp': now.isoformat()}
+            record.update(alert)
+
+            severity = record.get('severity', 'UNKNOWN')
+            self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+
+            self._alerts.append(record)
+            self._times.append(now.timestamp())
+            self._evict(now.timestamp())
+            return record
+
+    def restore(self, alerts: List[Dict], total: int = None,
+                severity_counts: Dict = None) -> None:
+        """
+        Recarrega alertas já registrados (ex.: replay do log na inicialização)
+
+        Args:
+            alerts: Alertas em ordem de criação, com id e timestamp
+            total: Total de alertas gerados (padrão: maior id)
+            severity_counts: Totais por severidade (padrão: contados em `alerts`)
+        """
+        if severity_counts is None:
+            severity_counts = {}
+            for alert in alerts:
+                severity = alert.get('severity', 'UNKNOWN')
+                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+
+        with self._lock:
+            self._alerts = list(alerts)
+            self._times = [datetime.fromisoformat(alert['timestamp']).timestamp()
+                           for alert in alerts]
+            self._start = 0
+            self.severity_counts = dict(severity_counts)
+            self.total = total if total is not None else max((a['id'] for a in alerts),
+                                                             default=0)
+            self._evict(datetime.now().timestamp())
+
+    def _evict(self, now: float) -> None:
+        """Descarta alertas acima do limite de quantidade ou de idade"""
+        excess = len(self._alerts) - self._start - self.max_alerts
+        if excess > 0:
+            self._start += excess
+
+        if self.max_age_seconds is not None:
+            self._start = bisect_left(self._times, now - self.max_age_seconds, lo=self._start)
+
+        # Compactar as listas quando metade delas for de itens descartados
+        if self._start > len(self._alerts) // 2:
+            del self._alerts[:self._start]
+            del self._times[:self._start]
+            self._start = 0
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        """Retorna os `limit` alertas mais recentes, do mais antigo ao mais novo"""
+        with self._lock:
+            return self._alerts[max(self._start, len(self._alerts) - limit):]
+
+    def since(self, seconds: float, severity: str = None) -> List[Dict]:
+        """Retorna os alertas dos últimos `seconds` segundos, opcionalmente por severidade"""
+        return self.between(datetime.now().timestamp() - seconds, None, severity)
+
+    def between(self, start: float, end: float = None, severity: str = None) -> List[Dict]:
+        """Retorna os alertas com timestamp (epoch) em [start, end)"""
+        with self._lock:
+            lo = bisect_left(self._times, start, lo=self._start)
+            hi = len(self._times) if end is None else bisect_left(self._times, end, lo=lo)
+            alerts = self._alerts[lo:hi]
+
+        if severity is not None:
+            alerts = [alert for alert in alerts if alert['severity'] == severity]
+        return alerts
+
+    def clear(self) -> None:
+        """Remove todos os alertas e zera os contadores"""
+        with self._lock:
+            self._alerts = []
+            self._times = []
+            self._start = 0
+            self.total = 0
+            self.severity_counts = {}
+
+    def counters(self):
+        """(total, cópia dos totais por severidade) lidos de forma consistente"""
+        with self._lock:
+            return self.total, dict(self.severity_counts)
+
+    def __len__(self) -> int:
+        """Quantidade de alertas retidos"""
+        with self._lock:
+            return len(self._alerts) - self._start
@@ -1,8 +1,296 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Tuple, Union
 import json
+import os
+
+from sliding_window import SlidingWindow, normalize_auth_code
+from data_loader import read_transactions, read_auth_codes, count_values
+from online_baseline import EWMABaseline
+
+# Status críticos que queremos monitorar
+CRITICAL_STATUSES = ['FAILED', 'DENIED', 'REVERSED', 'REJECTED']
+
+# Auth code de transação aprovada (não é monitorado como anomalia)
+APPROVED_AUTH_CODE = '00'
+
+# Significado dos auth codes conhecidos (resposta diferente para cada um)
+AUTH_CODE_DESCRIPTIONS = {
+    '00': 'approved',
+    '51': 'insufficient funds',
+    '59': 'suspected fraud'
+}
+
+# Versão do formato gerado por save_snapshot
+SNAPSHOT_VERSION = 3
+
+# Slots sazonais: dia da semana (0 = segunda) x hora do dia
+SLOTS_PER_WEEK = 7 * 24
+
+# Modos de detecção: thresholds fixos por percentil ou baseline online
+DETECTOR_MODES = ['percentile', 'ewma', 'holt_winters']
+
+def to_datetime(value) -> datetime:
+    """Converte timestamp (ISO, epoch ou datetime) em datetime; None = agora"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return datetime.now()
+
+def week_slot(when) -> int:
+    """Índice do slot (dia da semana x hora) de um timestamp"""
+    when = to_datetime(when)
+    return when.weekday() * 24 + when.hour
+
+def source_fingerprints(paths: List[str]) -> Dict:
+    """Tamanho e mtime dos arquivos de origem, para detectar snapshot desatualizado"""
+    fingerprints = {}
+    for path in paths:
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints[os.path.normpath(path)] = {'size': stat.st_size,
+                                                    'mtime_ns': stat.st_mtime_ns}
+    return fingerprints
+
+# Estatísticas calculadas para cada status no baseline
+BASELINE_KEYS = ['mean', 'std', 'median', 'p95', 'p99', 'max', 'min']
+
+# Largura máxima do CountHistogram (contagens maiores vão para os excedentes):
+# 672 grupos (status crítico x slot) x 4096 colunas int64 = 22 MB
+HISTOGRAM_MAX_WIDTH = 4096
+
+def group_statistics(codes: np.ndarray, values: np.ndarray, n_groups: int) -> Dict:
+    """
+    Calcula as estatísticas do baseline para todos os grupos de uma vez
+    
+    Agrupa os valores uma única vez (ordenação estável por grupo) e ordena
+    cada segmento; a partir daí min, max, mediana e percentis são leituras
+    por índice e média/desvio saem de somas sobre o segmento de cada grupo.
+    Os resultados seguem as convenções do pandas (std com ddof=1, quantil
+    linear).
+    
+    Args:
+        codes: Código inteiro do grupo de cada valor (0..n_groups-1)
+        values: Valores a agregar
+        n_groups: Quantidade de grupos
+    
+    Returns:
+        Dict com um array por estatística (NaN para grupos vazios) e 'size'
+    """
+    # Valores agrupados na ordem original (para as somas)
+    grouped = values[np.argsort(codes, kind='stable')].astype(np.float64)
+    
+    size = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(size) - size
+    present = size > 0
+    
+    stats = {'size': size}
+    for key in BASELINE_KEYS:
+        stats[key] = np.full(n_groups, np.nan)
+    
+    if not present.any():
+        return stats
+    
+    n = size[present]
+    first = starts[present]
+    last = first + n - 1
+    bounds = list(zip(first.tolist(), (first + n).tolist()))
+    
+    # Cópia com cada segmento ordenado (para min, max e quantis)
+    as_float = grouped.copy()
+    for a, b in bounds:
+        as_float[a:b].sort()
+    
+    # Média e desvio padrão (duas passadas, como o pandas). As somas usam
+    # np.sum por segmento na ordem original para ter o mesmo arredondamento
+    # (soma pairwise) do pandas; são só G chamadas, uma por grupo
+    mean = np.array([grouped[a:b].sum() for a, b in bounds]) / n
+    deviation = grouped - np.repeat(mean, n)
+    squared = deviation * deviation
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = np.array([squared[a:b].sum() for a, b in bounds]) / (n - 1)
+    stats['mean'][present] = mean
+    stats['std'][present] = np.where(n > 1, np.sqrt(variance), np.nan)
+    
+    # Quantis com interpolação linear (mesma fórmula do numpy)
+    for key, q in (('median', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        position = (n - 1) * q
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, n - 1)
+        fraction = position - lower
+        a = as_float[first + lower]
+        b = as_float[first + upper]
+        diff = b - a
+        stats[key][present] = np.where(fraction >= 0.5,
+                                       b - diff * (1 - fraction),
+                                       a + diff * fraction)
+    
+    stats['min'][present] = as_float[first]
+    stats['max'][present] = as_float[last]
+    
+    return stats
+
+class CountHistogram:
+    """
+    Histograma de contagens por grupo, acumulado bloco a bloco
+    
+    Contagens por minuto são inteiros pequenos: guardar quantas vezes cada
+    valor apareceu (np.bincount) ocupa grupos x maior contagem, não importa
+    quantas linhas o histórico tenha. Percentis saem exatos do histograma.
+    
+    A largura é limitada a `max_width`: contagens maiores (picos raros ou
+    linha corrompida, ex.: 1e9) ficam em uma lista de excedentes, ordenada
+    só no cálculo. Um valor extremo custa uma posição na lista, não uma
+    coluna de grupos x valor.
+    """
+    
+    def __init__(self, n_groups: int = 0, max_width: int = HISTOGRAM_MAX_WIDTH):
+        self.max_width = max_width
+        self.histogram = np.zeros((n_groups, 1), dtype=np.int64)
+        # Excedentes (>= max_width): blocos de (códigos, valores)
+        self._overflow = []
+    
+    def add(self, codes: np.ndarray, values: np.ndarray) -> None:
+        """
+        Acumula valores (NaN é ignorado)
+        
+        Args:
+            codes: Código inteiro do grupo de cada valor (negativo = ignorar)
+            values: Contagens inteiras não negativas
+        
+        Raises:
+            ValueError: Contagem negativa ou fracionária
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes = np.asarray(codes)[valid].astype(np.int64)
+        values = values[valid]
+        if len(values) == 0:
+            return
+        if values.min() < 0 or (values != np.floor(values)).any():
+            raise ValueError('Contagens do histórico devem ser inteiros não negativos')
+        
+        overflow = values >= self.max_width
+        if overflow.any():
+            self._overflow.append((codes[overflow], values[overflow]))
+            codes, values = codes[~overflow], values[~overflow]
+        values = values.astype(np.int64)
+        
+        # Cresce o histograma se aparecer grupo novo ou contagem maior
+        n_groups = max(self.histogram.shape[0], int(self._max_code(codes)) + 1)
+        width = max(self.histogram.shape[1], int(values.max()) + 1 if len(values) else 1)
+        if (n_groups, width) != self.histogram.shape:
+            grown = np.zeros((n_groups, width), dtype=np.int64)
+            grown[:self.histogram.shape[0], :self.histogram.shape[1]] = self.histogram
+            self.histogram = grown
+        
+        if len(values):
+            self.histogram += np.bincount(codes * width + values,
+                                          minlength=n_groups * width).reshape(n_groups, width)
+    
+    def _max_code(self, codes: np.ndarray) -> int:
+        """Maior código entre `codes` e os excedentes (grupo só com excedentes também conta)"""
+        maximum = int(codes.max()) if len(codes) else -1
+        for overflow_codes, _ in self._overflow:
+            maximum = max(maximum, int(overflow_codes.max()))
+        return maximum
+    
+    def statistics(self) -> Dict:
+        """Mesmas estatísticas e convenções de group_statistics"""
+        histogram = self.histogram
+        n_groups = histogram.shape[0]
+        
+        # Excedentes ordenados por grupo e valor
+        if self._overflow:
+            over_codes = np.concatenate([c for c, _ in self._overflow])
+            over_values = np.concatenate([v for _, v in self._overflow])
+            order = np.lexsort((over_values, over_codes))
+            over_codes, over_values = over_codes[order], over_values[order]
+        else:
+            over_codes = np.empty(0, dtype=np.int64)
+            over_values = np.empty(0, dtype=np.float64)
+        over_size = np.bincount(over_codes, minlength=n_groups)
+        over_start = np.cumsum(over_size) - over_size
+        
+        in_histogram = histogram.sum(axis=1)
+        size = in_histogram + over_size
+        present = size > 0
+        
+        stats = {'size': size}
+        for key in BASELINE_KEYS:
+            stats[key] = np.full(len(size), np.nan)
+        
+        if not present.any():
+            return stats
+        
+        frequency = histogram[present]
+        n = size[present]
+        values = np.arange(histogram.shape[1], dtype=np.float64)
+        over_sum = np.bincount(over_codes, weights=over_values, minlength=n_groups)[present]
+        
+        # Soma exata em inteiros; desvio em relação à média (duas passadas)
+        mean = (frequency @ np.arange(histogram.shape[1]) + over_sum) / n
+        deviation = values[np.newaxis, :] - mean[:, np.newaxis]
+        full_mean = np.zeros(n_groups)
+        full_mean[present] = mean
+        over_deviation = over_values - full_mean[over_codes]
+        over_squares = np.bincount(over_codes, weights=over_deviation * over_deviation,
+                                   minlength=n_groups)[present]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = ((frequency * deviation * deviation).sum(axis=1) + over_squares) / (n - 1)
+        stats['mean'][present] = mean
+        stats['std'][present] = np.where(n > 1, np.sqrt(variance), np.nan)
+        
+        # k-ésimo menor valor de cada grupo = quantos valores têm acumulado <= k;
+        # depois dos valores do histograma vêm os excedentes, já ordenados
+        cumulative = frequency.cumsum(axis=1)
+        counted = in_histogram[present]
+        first_over = over_start[present]
+        
+        def order_statistic(rank: np.ndarray) -> np.ndarray:
+            from_histogram = (cumulative <= rank[:, np.newaxis]).sum(axis=1).astype(np.float64)
+            if len(over_values) == 0:
+                return from_histogram
+            position = np.clip(first_over + rank - counted, 0, len(over_values) - 1)
+            return np.where(rank < counted, from_histogram, over_values[position])
+        
+        for key, q in (('median', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            position = (n - 1) * q
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, n - 1)
+            fraction = position - lower
+            a = order_statistic(lower)
+            b = order_statistic(upper)
+            diff = b - a
+            stats[key][present] = np.where(fraction >= 0.5,
+                                           b - diff * (1 - fraction),
+                                           a + diff * fraction)
+        
+        stats['min'][present] = order_statistic(np.zeros(len(n), dtype=np.int64))
+        stats['max'][present] = order_statistic(n - 1)
+        
+        return stats
+
+def status_slot_codes(statuses, timestamps) -> np.ndarray:
+    """
+    Código (status crítico x slot da semana) de cada linha; -1 para status
+    não monitorado
+    """
+    import pandas as pd
+    
+    codes, uniques = pd.factorize(statuses)
+    # Último elemento atende código -1 (valor ausente) do factorize
+    lookup = np.array([CRITICAL_STATUSES.index(u) if u in CRITICAL_STATUSES else -1
+                       for u in uniques] + [-1], dtype=np.int64)
+    status_index = lookup[codes]
+    slots = (timestamps.dt.weekday * 24 + timestamps.dt.hour).to_numpy(dtype=np.int64)
+    return np.where(status_index >= 0, status_index * SLOTS_PER_WEEK + slots, -1)
 
 class AnomalyDetector:
     """
@@ -10,64 +298,239 @@ class AnomalyDetector:
     Corrigido para trabalhar com dados agregados (timestamp, status, count)
     """
     
-    def __init__(self, transactions_path: str, auth_codes_path: str = None):
-        """Inicializa o detector com dados históricos"""
-        print("Inicializando Anomaly Detector...")
+    def __init__(self, transactions_path: str, auth_codes_path: str = None,
+                 seasonal: bool = True, min_slot_samples: int = 60,
+                 keep_history: bool = False, chunksize: int = None):
+        """
+        Inicializa o detector com dados históricos
         
-        # Carregar dados
-        self.df_trans = pd.read_csv(transactions_path)
-        print(f"✓ Transações carregadas: {len(self.df_trans)}")
+        Args:
+            transactions_path: CSV de transações (timestamp, status, count)
+            auth_codes_path: CSV de auth codes (opcional)
+            seasonal: Calcular thresholds por dia da semana x hora
+            min_slot_samples: Mínimo de minutos de histórico para um slot
+                              sazonal substituir o threshold global
+            keep_history: Manter df_trans/df_auth depois do baseline; por
+                          padrão são liberados (a detecção só usa baseline
+                          e thresholds)
+            chunksize: Ler os CSVs em blocos dessa quantidade de linhas,
+                       acumulando só histogramas de contagens (memória
+                       limitada para históricos maiores que a RAM); nesse
+                       modo df_trans/df_auth não são mantidos
+        """
+        print("Inicializando Anomaly Detector...")
         
-        if auth_codes_path:
-            self.df_auth = pd.read_csv(auth_codes_path)
-            print(f"✓ Auth codes carregados: {len(self.df_auth)}")
-        else:
+        if chunksize:
+            # Histórico em blocos: estatísticas prontas, sem DataFrames
+            self.df_trans = None
             self.df_auth = None
-        
-        # Preparar dados
-        self._prepare_data()
+            history = self._scan_history(transactions_path, auth_codes_path, chunksize)
+        else:
+            # Carregar dados (tipos compactos, status e auth codes normalizados)
+            self.df_trans = read_transactions(transactions_path)
+            print(f"✓ Transações carregadas: {len(self.df_trans)}")
+            
+            if auth_codes_path:
+                self.df_auth = read_auth_codes(auth_codes_path)
+                print(f"✓ Auth codes carregados: {len(self.df_auth)}")
+            else:
+                self.df_auth = None
+            history = None
         
         # Calcular baseline
-        self.baseline = self._calculate_baseline()
+        self.baseline = self._calculate_baseline(history)
         
         # Configurar thresholds
         self.thresholds = self._configure_thresholds()
         
+        # Baseline e thresholds por auth code (segunda dimensão de detecção)
+        self.auth_baseline = self._calculate_auth_baseline(history)
+        self.auth_thresholds = self._configure_auth_thresholds()
+        
+        # Tabela densa de thresholds por slot (dia da semana x hora)
+        self.threshold_table, self.seasonal_slots = self._calculate_seasonal_thresholds(
+            seasonal, min_slot_samples, history)
+        
+        # Modo padrão: percentis fixos do histórico
+        self.mode = 'percentile'
+        self.online = None
+        
+        # Resumo do histórico usado por get_statistics
+        if history is None:
+            self.total_transactions = len(self.df_trans)
+            self.unique_statuses = self.df_trans['status'].unique().tolist()
+        else:
+            self.total_transactions = history['rows']
+            self.unique_statuses = list(history['statuses'])
+        print("\nStatus únicos encontrados:", self.unique_statuses)
+        
+        # Modo enxuto: liberar os DataFrames do histórico (memória por worker)
+        if not keep_history:
+            self.df_trans = None
+            self.df_auth = None
+        
+        # get_statistics serializado uma vez por versão do baseline
+        self.baseline_version = 0
+        self._statistics_cache = None
+        
         print("✓ Detector inicializado!")
     
-    def _prepare_data(self):
-        """Prepara e limpa os dados"""
-        # Converter timestamp
-        if 'timestamp' in self.df_trans.columns:
-            self.df_trans['timestamp'] = pd.to_datetime(self.df_trans['timestamp'])
-            self.df_trans['minute'] = self.df_trans['timestamp'].dt.floor('min')
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str, sources: List[str] = None) -> 'AnomalyDetector':
+        """
+        Cria o detector a partir de um snapshot gerado por compile_baseline.py
         
-        # Normalizar status para uppercase
-        if 'status' in self.df_trans.columns:
-            self.df_trans['status'] = self.df_trans['status'].str.upper()
+        Args:
+            snapshot_path: Arquivo JSON gerado por save_snapshot
+            sources: CSVs de origem; se informados, o snapshot é recusado
+                     quando algum deles mudou desde a compilação
         
-        print("\nStatus únicos encontrados:", self.df_trans['status'].unique().tolist())
+        Raises:
+            ValueError: Snapshot de outra versão ou desatualizado
+        """
+        with open(snapshot_path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Versão de snapshot não suportada: {snapshot.get('version')}")
+        
+        if sources is not None:
+            for path, fingerprint in source_fingerprints(sources).items():
+                if snapshot['sources'].get(path) != fingerprint:
+                    raise ValueError(f'Snapshot desatualizado em relação a {path}')
+        
+        detector = cls.__new__(cls)
+        detector.df_trans = None
+        detector.df_auth = None
+        detector.baseline = snapshot['baseline']
+        detector.thresholds = snapshot['thresholds']
+        detector.auth_baseline = snapshot['auth_baseline']
+        detector.auth_thresholds = snapshot['auth_thresholds']
+        detector.threshold_table = np.asarray(snapshot['threshold_table'], dtype=np.float64)
+        detector.seasonal_slots = np.asarray(snapshot['seasonal_slots'], dtype=bool)
+        detector.mode = 'percentile'
+        detector.online = None
+        detector.total_transactions = snapshot['total_transactions_analyzed']
+        detector.unique_statuses = snapshot['unique_statuses']
+        detector.baseline_version = 0
+        detector._statistics_cache = None
+        
+        print(f"✓ Baseline carregado do snapshot: {snapshot_path}")
+        return detector
     
-    def _calculate_baseline(self) -> Dict:
-        """Calcula métricas baseline do histórico"""
+    def save_snapshot(self, snapshot_path: str, sources: List[str] = None) -> Dict:
+        """Grava baseline e thresholds em um snapshot JSON"""
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'sources': source_fingerprints(sources or []),
+            'baseline': {status: {k: float(v) for k, v in values.items()}
+                         for status, values in self.baseline.items()},
+            'thresholds': {status: {k: float(v) if k != 'method' else v
+                                    for k, v in values.items()}
+                           for status, values in self.thresholds.items()},
+            'auth_baseline': {code: {k: float(v) for k, v in values.items()}
+                              for code, values in self.auth_baseline.items()},
+            'auth_thresholds': {code: {k: float(v) if k != 'method' else v
+                                       for k, v in values.items()}
+                                for code, values in self.auth_thresholds.items()},
+            'threshold_table': self.threshold_table.tolist(),
+            'seasonal_slots': self.seasonal_slots.tolist(),
+            'total_transactions_analyzed': int(self.total_transactions),
+            'unique_statuses': list(self.unique_statuses)
+        }
+        
+        directory = os.path.dirname(snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Gravar em arquivo temporário e renomear (workers nunca leem arquivo parcial)
+        tmp_path = snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, snapshot_path)
+        
+        return snapshot
+    
+    def _scan_history(self, transactions_path: str, auth_codes_path: str,
+                      chunksize: int) -> Dict:
+        """
+        Lê os CSVs em blocos e acumula histogramas por status, por auth code
+        e por (status crítico, slot da semana)
+        
+        Returns:
+            Dict com nomes e estatísticas de cada agrupamento, no formato
+            de group_statistics, e a quantidade de linhas lidas
+        """
+        statuses, status_hist = {}, CountHistogram()
+        slot_hist = CountHistogram(len(CRITICAL_STATUSES) * SLOTS_PER_WEEK)
+        rows = 0
+        has_timestamp = True
+        for chunk in read_transactions(transactions_path, chunksize=chunksize):
+            rows += len(chunk)
+            codes = self._stable_codes(chunk['status'], statuses)
+            counts = count_values(chunk)
+            status_hist.add(codes, counts)
+            has_timestamp = has_timestamp and 'timestamp' in chunk.columns
+            if has_timestamp:
+                slot_hist.add(status_slot_codes(chunk['status'], chunk['timestamp']), counts)
+        print(f"✓ Transações lidas em blocos de {chunksize}: {rows}")
+        
+        auth_codes, auth_hist = {}, CountHistogram()
+        if auth_codes_path:
+            auth_rows = 0
+            for chunk in read_auth_codes(auth_codes_path, chunksize=chunksize):
+                if 'auth_code' not in chunk.columns:
+                    break
+                auth_rows += len(chunk)
+                auth_hist.add(self._stable_codes(chunk['auth_code'], auth_codes),
+                              count_values(chunk))
+            print(f"✓ Auth codes lidos em blocos de {chunksize}: {auth_rows}")
+        
+        return {
+            'rows': rows,
+            'statuses': list(statuses),
+            'status_stats': status_hist.statistics(),
+            'auth_codes': list(auth_codes),
+            'auth_stats': auth_hist.statistics(),
+            'slot_stats': slot_hist.statistics() if has_timestamp else None
+        }
+    
+    @staticmethod
+    def _stable_codes(values, names: Dict) -> np.ndarray:
+        """
+        Códigos inteiros estáveis entre blocos (ordem da primeira aparição,
+        como unique()); `names` acumula nome -> código
+        """
+        import pandas as pd
+        
+        codes, uniques = pd.factorize(values)
+        lookup = np.array([names.setdefault(u, len(names)) for u in uniques] + [-1],
+                          dtype=np.int64)
+        return lookup[codes]
+    
+    def _calculate_baseline(self, history: Dict = None) -> Dict:
+        """Calcula métricas baseline do histórico (ou de _scan_history)"""
         print("\nCalculando baseline histórico...")
         
         baseline = {}
         
-        # Para cada status único
-        for status in self.df_trans['status'].unique():
-            status_data = self.df_trans[self.df_trans['status'] == status]['count']
+        if history is not None:
+            statuses, stats = history['statuses'], history['status_stats']
+        else:
+            import pandas as pd
             
-            if len(status_data) > 0:
-                baseline[status] = {
-                    'mean': status_data.mean(),
-                    'std': status_data.std(),
-                    'median': status_data.median(),
-                    'p95': status_data.quantile(0.95),
-                    'p99': status_data.quantile(0.99),
-                    'max': status_data.max(),
-                    'min': status_data.min()
-                }
+            # Status como códigos inteiros (ordem de aparição, como unique())
+            codes, statuses = pd.factorize(self.df_trans['status'])
+            counts = count_values(self.df_trans)
+            valid = (codes >= 0) & ~np.isnan(counts)
+            
+            # Todas as estatísticas de todos os status em uma única passada agrupada
+            stats = group_statistics(codes[valid], counts[valid], len(statuses))
+        
+        for i, status in enumerate(statuses):
+            if stats['size'][i] > 0:
+                baseline[status] = {key: stats[key][i] for key in BASELINE_KEYS}
                 
                 print(f"  {status}: mean={baseline[status]['mean']:.2f}, "
                       f"std={baseline[status]['std']:.2f}, "
@@ -76,14 +539,49 @@ class AnomalyDetector:
         
         return baseline
     
+    def _calculate_auth_baseline(self, history: Dict = None) -> Dict:
+        """Calcula métricas baseline por auth code (mesma passada agrupada dos status)"""
+        if history is not None:
+            auth_codes, stats = history['auth_codes'], history['auth_stats']
+        elif self.df_auth is None or 'auth_code' not in self.df_auth.columns:
+            return {}
+        else:
+            import pandas as pd
+            
+            codes, auth_codes = pd.factorize(self.df_auth['auth_code'])
+            counts = count_values(self.df_auth)
+            valid = (codes >= 0) & ~np.isnan(counts)
+            stats = group_statistics(codes[valid], counts[valid], len(auth_codes))
+        
+        baseline = {}
+        for i, code in enumerate(auth_codes):
+            if stats['size'][i] > 0:
+                baseline[code] = {key: stats[key][i] for key in BASELINE_KEYS}
+        
+        print("\nBaseline por auth code:")
+        for code, values in baseline.items():
+            print(f"  {code}: mean={values['mean']:.2f}, p95={values['p95']:.2f}, "
+                  f"p99={values['p99']:.2f}")
+        
+        return baseline
+    
+    def _configure_auth_thresholds(self) -> Dict:
+        """Thresholds por auth code de recusa (percentis do histórico)"""
+        return {
+            code: {
+                'warning': values['p95'],
+                'critical': values['p99'],
+                'method': 'percentile'
+            }
+            for code, values in self.auth_baseline.items()
+            if code != APPROVED_AUTH_CODE
+        }
+    
     def _configure_thresholds(self) -> Dict:
         """Configura thresholds para alertas"""
         thresholds = {}
         
-        # Status críticos que queremos monitorar
-        critical_statuses = ['FAILED', 'DENIED', 'REVERSED', 'REJECTED']
-        
-        for status in critical_statuses:
+        for status in CRITICAL_STATUSES:
             if status in self.baseline:
                 # Usar percentis como thresholds
                 thresholds[status] = {
@@ -106,12 +604,142 @@ class AnomalyDetector:
         
         return thresholds
     
-    def analyze_transaction_window(self, transactions: List[Dict]) -> Dict:
+    def _calculate_seasonal_thresholds(self, seasonal: bool, min_slot_samples: int,
+                                       history: Dict = None):
+        """
+        Pré-calcula thresholds por (status crítico, dia da semana x hora)
+        
+        Returns:
+            (tabela [status, slot, (warning, critical)], máscara dos slots
+             com histórico suficiente). Slots sem histórico usam o threshold
+             global, então a consulta no caminho quente é sempre um índice.
+        """
+        n_statuses = len(CRITICAL_STATUSES)
+        table = np.empty((n_statuses, SLOTS_PER_WEEK, 2))
+        for i, status in enumerate(CRITICAL_STATUSES):
+            table[i, :, 0] = self.thresholds[status]['warning']
+            table[i, :, 1] = self.thresholds[status]['critical']
+        covered = np.zeros((n_statuses, SLOTS_PER_WEEK), dtype=bool)
+        
+        if not seasonal:
+            return table, covered
+        if history is not None:
+            stats = history['slot_stats']
+            if stats is None:
+                return table, covered
+        elif 'timestamp' not in self.df_trans.columns:
+            return table, covered
+        else:
+            codes = status_slot_codes(self.df_trans['status'], self.df_trans['timestamp'])
+            counts = count_values(self.df_trans)
+            rows = (codes >= 0) & ~np.isnan(counts)
+            stats = group_statistics(codes[rows], counts[rows], n_statuses * SLOTS_PER_WEEK)
+        enough = (stats['size'] >= min_slot_samples).reshape(n_statuses, SLOTS_PER_WEEK)
+        table[:, :, 0] = np.where(enough, stats['p95'].reshape(enough.shape), table[:, :, 0])
+        table[:, :, 1] = np.where(enough, stats['p99'].reshape(enough.shape), table[:, :, 1])
+        
+        print(f"\nThresholds sazonais: {int(enough.sum())} de {enough.size} slots "
+              f"(status x dia x hora) com histórico suficiente")
+        
+        return table, enough
+    
+    def set_mode(self, mode: str, online_state: Dict = None, **params) -> None:
+        """
+        Seleciona o modo de detecção
+        
+        Args:
+            mode: 'percentile' (tabela fixa do histórico), 'ewma' (média e
+                  variância online) ou 'holt_winters' (EWMA com componente
+                  sazonal por dia da semana x hora)
+            online_state: Estado exportado por export_online_state (opcional);
+                          sem ele o modo online parte do baseline histórico
+            params: Parâmetros do EWMABaseline (alpha, gamma, warning_sigma, ...)
+        """
+        if mode not in DETECTOR_MODES:
+            raise ValueError(f'Modo inválido: {mode} (opções: {DETECTOR_MODES})')
+        
+        self.mode = mode
+        self._invalidate_statistics()
+        if mode == 'percentile':
+            self.online = None
+            return
+        
+        period = SLOTS_PER_WEEK if mode == 'holt_winters' else 0
+        if online_state is not None:
+            online = EWMABaseline.from_state(online_state)
+            if online.seasonal_period != period:
+                raise ValueError(f'Estado online incompatível com o modo {mode}')
+        else:
+            online = EWMABaseline(seasonal_period=period, **params)
+            for status, stats in self.baseline.items():
+                online.seed(status, stats['mean'], stats['std'])
+        self.online = online
+    
+    def learn(self, status_counts: Dict, when=None, complete: bool = True) -> None:
+        """
+        Atualiza o baseline online com contagens observadas (O(1) por status)
+        
+        Args:
+            status_counts: Contagens por status de um minuto fechado
+            when: Momento das contagens (define o slot sazonal)
+            complete: Se as contagens cobrem o minuto inteiro; nesse caso
+                      status críticos já acompanhados e ausentes contam como
+                      zero, como as linhas com count 0 do histórico de onde
+                      vem o seed. Status sem estado (nunca vistos no
+                      histórico) só começam na primeira contagem real, e
+                      não com um zero que o seed não teria
+        """
+        if self.online is None:
+            return
+        
+        slot = week_slot(when)
+        if complete:
+            for status in CRITICAL_STATUSES:
+                if status not in status_counts and status in self.online:
+                    self.online.update(status, 0, slot)
+        for status, count in status_counts.items():
+            self.online.update(status, count, slot)
+    
+    def export_online_state(self) -> Dict:
+        """Estado do modo online, para persistir ou migrar entre processos"""
+        if self.online is None:
+            return None
+        return {'mode': self.mode, 'baseline': self.online.export_state()}
+    
+    def import_online_state(self, exported: Dict) -> None:
+        """Restaura o estado gerado por export_online_state"""
+        self.set_mode(exported['mode'], online_state=exported['baseline'])
+    
+    def _slot_limits(self, slot: int) -> np.ndarray:
+        """Array [status crítico, (warning, critical)] de um slot"""
+        limits = self.threshold_table[:, slot, :]
+        if self.online is None:
+            return limits
+        
+        limits = limits.copy()
+        for i, status in enumerate(CRITICAL_STATUSES):
+            if status in self.online:
+                limits[i] = self.online.thresholds(status, slot)
+        return limits
+    
+    def thresholds_at(self, when=None) -> Dict:
+        """
+        Thresholds (warning, critical) de cada status crítico no slot de `when`
+        
+        No modo percentil é uma consulta O(1) na tabela pré-calculada; no modo
+        online, O(1) por status no estado EWMA. Sem pandas no caminho quente.
+        """
+        return dict(zip(CRITICAL_STATUSES, self._slot_limits(week_slot(when)).tolist()))
+    
+    def analyze_transaction_window(self, transactions: Union[List[Dict], SlidingWindow],
+                                   when=None) -> Dict:
         """
         Analisa uma janela de transações agregadas
         
         Args:
             transactions: Lista com formato [{"status": "APPROVED", "count": 120}, ...]
+                          ou SlidingWindow (usa as somas já mantidas pela janela)
+            when: Momento da janela, para os thresholds sazonais (padrão: agora)
         
         Returns:
             Dict com análise e recomendação
@@ -124,50 +752,89 @@ class AnomalyDetector:
                 'anomaly_score': 0
             }
         
-        # Agregar transações por status
-        status_counts = {}
-        for trans in transactions:
-            status = trans.get('status', 'UNKNOWN').upper()
-            count = trans.get('count', 1)
-            status_counts[status] = status_counts.get(status, 0) + count
+        # Agregar transações por status e por auth code
+        if isinstance(transactions, SlidingWindow):
+            status_counts = transactions.snapshot()
+            auth_code_counts = transactions.snapshot('auth_code')
+        else:
+            status_counts = {}
+            auth_code_counts = {}
+            for trans in transactions:
+                status = trans.get('status', 'UNKNOWN').upper()
+                count = trans.get('count', 1)
+                status_counts[status] = status_counts.get(status, 0) + count
+                auth_code = normalize_auth_code(trans.get('auth_code'))
+                if auth_code is not None:
+                    auth_code_counts[auth_code] = auth_code_counts.get(auth_code, 0) + count
+        
+        return self._analyze_counts(status_counts, when, auth_code_counts)
+    
+    def analyze_minute(self, status_counts: Dict, minute: datetime, closed: bool = True,
+                       auth_code_counts: Dict = None) -> Dict:
+        """
+        Analisa as contagens de um minuto (timestamp do evento)
+        
+        Os thresholds são calculados sobre registros por minuto, então a
+        comparação é direta. Um minuto ainda aberto gera análise parcial:
+        as contagens só podem crescer até o minuto fechar.
+        
+        Args:
+            status_counts: {"APPROVED": 120, "FAILED": 3, ...} do minuto
+            minute: Início do minuto analisado
+            closed: Se o minuto já foi fechado (análise definitiva)
+            auth_code_counts: {"00": 110, "51": 4, ...} do minuto (opcional)
+        """
+        result = self._analyze_counts(dict(status_counts), minute,
+                                      dict(auth_code_counts or {}))
+        result['window_type'] = 'minute'
+        result['minute'] = minute.isoformat()
+        result['closed'] = closed
+        return result
+    
+    def _analyze_counts(self, status_counts: Dict, when=None,
+                        auth_code_counts: Dict = None) -> Dict:
+        """
+        Compara contagens agregadas por status com os thresholds do slot de
+        `when` e, se informadas, as contagens por auth code com os thresholds
+        de cada código
+        """
+        limits = self.thresholds_at(when)
         
         # Analisar cada status crítico
         alerts = []
         max_severity = 'NORMAL'
         anomaly_score = 0
         
-        critical_statuses = ['FAILED', 'DENIED', 'REVERSED', 'REJECTED']
-        
-        for status in critical_statuses:
+        for status in CRITICAL_STATUSES:
             count = status_counts.get(status, 0)
             
-            if status in self.thresholds:
-                warning_threshold = self.thresholds[status]['warning']
-                critical_threshold = self.thresholds[status]['critical']
+            if status in limits:
+                warning_threshold, critical_threshold = limits[status]
                 
                 if count >= critical_threshold:
-                    alerts.append({
-                        'status': status,
-                        'count': count,
-                        'severity': 'CRITICAL',
-                        'threshold': critical_threshold,
-                        'message': f'{status} critically high: {count} (threshold: {critical_threshold:.0f})'
-                    })
+                    alerts.append(self._build_alert(status, count, 'CRITICAL',
+                                                    critical_threshold))
                     max_severity = 'CRITICAL'
                     anomaly_score += 100
                     
                 elif count >= warning_threshold:
-                    alerts.append({
-                        'status': status,
-                        'count': count,
-                        'severity': 'WARNING',
-                        'threshold': warning_threshold,
-                        'message': f'{status} above normal: {count} (threshold: {warning_threshold:.0f})'
-                    })
+                    alerts.append(self._build_alert(status, count, 'WARNING',
+                                                    warning_threshold))
                     if max_severity == 'NORMAL':
                         max_severity = 'WARNING'
                     anomaly_score += 50
         
+        # Auth codes de recusa (51, 59, ...)
+        for alert in self._auth_code_alerts(auth_code_counts or {}):
+            alerts.append(alert)
+            if alert['severity'] == 'CRITICAL':
+                max_severity = 'CRITICAL'
+                anomaly_score += 100
+            else:
+                if max_severity == 'NORMAL':
+                    max_severity = 'WARNING'
+                anomaly_score += 50
+        
         # Limitar score a 100
         anomaly_score = min(anomaly_score, 100)
         
@@ -180,6 +847,8 @@ class AnomalyDetector:
             'timestamp': datetime.now().isoformat(),
             'total_transactions': sum(status_counts.values())
         }
+        if auth_code_counts is not None:
+            result['auth_code_counts'] = auth_code_counts
         
         if alerts:
             result['message'] = f"⚠️  {len(alerts)} anomaly(ies) detected!"
@@ -188,6 +857,66 @@ class AnomalyDetector:
         
         return result
     
+    def auth_code_limits(self, auth_code: str):
+        """(warning, critical) de um auth code; None para o código de aprovação"""
+        if auth_code == APPROVED_AUTH_CODE:
+            return None
+        thresholds = self.auth_thresholds.get(auth_code)
+        if thresholds is None:
+            # Código sem histórico: mesmos valores padrão conservadores dos status
+            return 10, 20
+        return thresholds['warning'], thresholds['critical']
+    
+    def _auth_code_alerts(self, auth_code_counts: Dict) -> List[Dict]:
+        """Alertas dos auth codes acima dos thresholds (em ordem de código)"""
+        alerts = []
+        for auth_code, count in sorted(auth_code_counts.items()):
+            limits = self.auth_code_limits(auth_code)
+            if limits is None:
+                continue
+            warning_threshold, critical_threshold = limits
+            if count >= critical_threshold:
+                alerts.append(self._build_auth_alert(auth_code, count, 'CRITICAL',
+                                                     critical_threshold))
+            elif count >= warning_threshold:
+                alerts.append(self._build_auth_alert(auth_code, count, 'WARNING',
+                                                     warning_threshold))
+        return alerts
+    
+    def _build_auth_alert(self, auth_code: str, count, severity: str, threshold: float) -> Dict:
+        """Monta o detalhe de um alerta de auth code"""
+        description = AUTH_CODE_DESCRIPTIONS.get(auth_code, 'unknown code')
+        if severity == 'CRITICAL':
+            message = (f'Auth code {auth_code} ({description}) critically high: {count} '
+                       f'(threshold: {threshold:.0f})')
+        else:
+            message = (f'Auth code {auth_code} ({description}) above normal: {count} '
+                       f'(threshold: {threshold:.0f})')
+        
+        return {
+            'auth_code': auth_code,
+            'description': description,
+            'count': count,
+            'severity': severity,
+            'threshold': threshold,
+            'message': message
+        }
+    
+    def _build_alert(self, status: str, count, severity: str, threshold: float) -> Dict:
+        """Monta o detalhe de um alerta de status crítico"""
+        if severity == 'CRITICAL':
+            message = f'{status} critically high: {count} (threshold: {threshold:.0f})'
+        else:
+            message = f'{status} above normal: {count} (threshold: {threshold:.0f})'
+        
+        return {
+            'status': status,
+            'count': count,
+            'severity': severity,
+            'threshold': threshold,
+            'message': message
+        }
+    
     def analyze_real_time(self, transaction: Dict) -> Dict:
         """
         Analisa uma transação individual ou agregada
@@ -202,8 +931,7 @@ class AnomalyDetector:
         count = transaction.get('count', 1)
         
         # Verificar se é status crítico
-        critical_statuses = ['FAILED', 'DENIED', 'REVERSED', 'REJECTED']
-        rule_based_alert = status in critical_statuses
+        rule_based_alert = status in CRITICAL_STATUSES
         
         # Verificar se count está acima do baseline
         if status in self.baseline:
@@ -219,6 +947,223 @@ class AnomalyDetector:
             'timestamp': datetime.now().isoformat()
         }
     
+    def analyze_batch(self, transactions: List[Dict],
+                      history: Union[List[Dict], SlidingWindow] = None,
+                      window_size: int = None) -> Dict:
+        """
+        Analisa um lote de transações em uma única passada vetorizada
+        
+        Equivale a chamar analyze_real_time e analyze_transaction_window
+        para cada registro, em ordem, sobre uma janela deslizante com os
+        últimos `window_size` registros (incluindo o histórico já bufferizado).
+        
+        Args:
+            transactions: Lista com formato [{"status": "APPROVED", "count": 120}, ...]
+            history: Registros anteriores ao lote (lista ou SlidingWindow da API)
+            window_size: Quantidade de registros em cada janela (padrão: tamanho
+                         da SlidingWindow passada em `history`, ou 60)
+        
+        Returns:
+            Dict com vereditos por registro e por janela
+        """
+        now = datetime.now().isoformat()
+        n = len(transactions)
+        
+        if window_size is None:
+            window_size = history.size if isinstance(history, SlidingWindow) else 60
+        
+        if n == 0:
+            return {
+                'total_records': 0,
+                'alert': False,
+                'severity': 'NORMAL',
+                'records': [],
+                'windows': [],
+                'alerting_windows': 0,
+                'timestamp': now
+            }
+        
+        # Prefixo do histórico necessário para completar a primeira janela
+        history = list(history or [])[-(window_size - 1):] if window_size > 1 else []
+        records = history + list(transactions)
+        offset = len(history)
+        
+        statuses = [str(t.get('status', 'UNKNOWN')).upper() for t in records]
+        counts = np.asarray([t.get('count', 1) for t in records])
+        
+        # Codificar status como inteiros (colunas da matriz de contagens)
+        key_array, codes = np.unique(np.asarray(statuses + CRITICAL_STATUSES),
+                                     return_inverse=True)
+        codes = codes[:len(records)]
+        keys = key_array.tolist()
+        
+        # Somas de janela via soma acumulada: janela(p) = C[p + 1] - C[p + 1 - window_size]
+        rows = np.arange(len(records))
+        matrix = np.zeros((len(records), len(keys)), dtype=counts.dtype)
+        matrix[rows, codes] = counts
+        seen = np.zeros((len(records), len(keys)), dtype=np.int64)
+        seen[rows, codes] = 1
+        
+        ends = np.arange(offset, len(records)) + 1
+        starts = np.maximum(ends - window_size, 0)
+        window_counts = self._window_sums(matrix, starts, ends)
+        window_seen = self._window_sums(seen, starts, ends) > 0
+        
+        # Comparar os status críticos com os thresholds do slot de cada registro
+        critical_cols = np.searchsorted(key_array, CRITICAL_STATUSES)
+        slots = np.array([week_slot(t.get('timestamp')) for t in transactions])
+        unique_slots, slot_index = np.unique(slots, return_inverse=True)
+        limits = np.stack([self._slot_limits(slot) for slot in unique_slots])[slot_index]
+        warning = limits[:, :, 0]
+        critical = limits[:, :, 1]
+        critical_counts = window_counts[:, critical_cols]
+        is_crit = critical_counts >= critical
+        is_warn = (critical_counts >= warning) & ~is_crit
+        
+        n_crit = is_crit.sum(axis=1)
+        n_warn = is_warn.sum(axis=1)
+        
+        # Mesmas somas de janela para os auth codes (registros sem auth_code ficam de fora)
+        auth_codes = [normalize_auth_code(t.get('auth_code')) for t in records]
+        auth_counts_per_window = [{} for _ in range(n)]
+        if any(code is not None for code in auth_codes):
+            auth_array, auth_index = np.unique(
+                np.asarray([code or '' for code in auth_codes]), return_inverse=True)
+            auth_keys = auth_array.tolist()
+            auth_matrix = np.zeros((len(records), len(auth_keys)), dtype=counts.dtype)
+            auth_matrix[rows, auth_index] = counts
+            auth_seen = np.zeros((len(records), len(auth_keys)), dtype=np.int64)
+            auth_seen[rows, auth_index] = 1
+            auth_window_counts = self._window_sums(auth_matrix, starts, ends).tolist()
+            auth_window_seen = self._window_sums(auth_seen, starts, ends) > 0
+            for i in range(n):
+                auth_counts_per_window[i] = {
+                    auth_keys[j]: auth_window_counts[i][j]
+                    for j in np.flatnonzero(auth_window_seen[i]) if auth_keys[j]
+                }
+        
+        # Alertas de auth code entram no score e na severidade da janela
+        auth_alerts_per_window = [self._auth_code_alerts(auth_counts)
+                                  for auth_counts in auth_counts_per_window]
+        for i, auth_alerts in enumerate(auth_alerts_per_window):
+            for alert in auth_alerts:
+                if alert['severity'] == 'CRITICAL':
+                    n_crit[i] += 1
+                else:
+                    n_warn[i] += 1
+        
+        scores = np.minimum(n_crit * 100 + n_warn * 50, 100)
+        window_alert = (n_crit > 0) | (n_warn > 0)
+        severities = np.where(n_crit > 0, 'CRITICAL',
+                              np.where(window_alert, 'WARNING', 'NORMAL'))
+        
+        # Montar vereditos por janela
+        windows_result = []
+        for i in range(n):
+            row = window_counts[i].tolist()
+            status_counts = {keys[j]: row[j] for j in np.flatnonzero(window_seen[i])}
+            alerts = [self._build_alert(status, critical_counts[i, c].item(), 'CRITICAL',
+                                        critical[i, c].item())
+                      if is_crit[i, c] else
+                      self._build_alert(status, critical_counts[i, c].item(), 'WARNING',
+                                        warning[i, c].item())
+                      for c, status in enumerate(CRITICAL_STATUSES)
+                      if is_crit[i, c] or is_warn[i, c]] + auth_alerts_per_window[i]
+            windows_result.append({
+                'index': i,
+                'alert': bool(window_alert[i]),
+                'severity': str(severities[i]),
+                'anomaly_score': int(scores[i]),
+                'status_counts': status_counts,
+                'auth_code_counts': auth_counts_per_window[i],
+                'alerts': alerts,
+                'total_transactions': sum(row),
+                'message': (f"⚠️  {len(alerts)} anomaly(ies) detected!" if alerts else
+                            "✓ All transactions within normal range")
+            })
+        
+        if (n_crit > 0).any():
+            max_severity = 'CRITICAL'
+        elif window_alert.any():
+            max_severity = 'WARNING'
+        else:
+            max_severity = 'NORMAL'
+        
+        return {
+            'total_records': n,
+            'alert': bool(window_alert.any()),
+            'severity': max_severity,
+            'records': self.analyze_records(transactions),
+            'windows': windows_result,
+            'alerting_windows': int(window_alert.sum()),
+            'timestamp': now
+        }
+    
+    def analyze_records(self, transactions: List[Dict]) -> List[Dict]:
+        """
+        Versão vetorizada de analyze_real_time para uma lista de registros
+        
+        Returns:
+            Lista de vereditos individuais, na ordem dos registros
+        """
+        if not transactions:
+            return []
+        
+        statuses = np.asarray([str(t.get('status', 'UNKNOWN')).upper() for t in transactions])
+        counts = np.asarray([t.get('count', 1) for t in transactions])
+        key_array, codes = np.unique(statuses, return_inverse=True)
+        keys = key_array.tolist()
+        
+        # Mesmas regras de analyze_real_time: status crítico ou 2x acima da média
+        is_critical = np.isin(key_array, CRITICAL_STATUSES)
+        means = np.array([self.baseline[k]['mean'] if k in self.baseline else np.inf
+                          for k in keys])
+        alerts = is_critical[codes] | (counts > means[codes] * 2)
+        
+        return [
+            {
+                'index': i,
+                'status': keys[code],
+                'count': count,
+                'alert': alert,
+                'reason': f'Status: {keys[code]}, Count: {count}'
+            }
+            for i, (code, count, alert) in enumerate(zip(codes.tolist(),
+                                                         counts.tolist(),
+                                                         alerts.tolist()))
+        ]
+    
+    @staticmethod
+    def _window_sums(matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Soma as linhas [start, end) de cada janela usando somas acumuladas"""
+        cumulative = np.zeros((matrix.shape[0] + 1, matrix.shape[1]), dtype=matrix.dtype)
+        np.cumsum(matrix, axis=0, out=cumulative[1:])
+        return cumulative[ends] - cumulative[starts]
+    
+    def _invalidate_statistics(self) -> None:
+        """Descarta as estatísticas serializadas (baseline ou modo mudou)"""
+        self.baseline_version += 1
+        self._statistics_cache = None
+    
+    def statistics_json(self) -> Tuple[int, str]:
+        """
+        get_statistics já serializado em JSON, com a versão do baseline
+        
+        O JSON é montado uma vez e reaproveitado até o baseline mudar
+        (set_mode), sem refazer conversões a cada /stats.
+        
+        Returns:
+            (versão do baseline, JSON)
+        """
+        cache = self._statistics_cache
+        if cache is None:
+            version = self.baseline_version
+            cache = (version, json.dumps(self.get_statistics(), default=str))
+            # Só guarda se o baseline não mudou durante a serialização
+            if version == self.baseline_version:
+                self._statistics_cache = cache
+        return cache
+    
     def get_statistics(self) -> Dict:
         """Retorna estatísticas do detector"""
         return {
@@ -226,8 +1171,13 @@ class AnomalyDetector:
                              for ki, vi in v.items()} 
                         for k, v in self.baseline.items()},
             'thresholds': self.thresholds,
-            'total_transactions_analyzed': len(self.df_trans),
-            'unique_statuses': self.df_trans['status'].unique().tolist()
+            'auth_code_baseline': {k: {ki: float(vi) for ki, vi in v.items()}
+                                   for k, v in self.auth_baseline.items()},
+            'auth_code_thresholds': self.auth_thresholds,
+            'seasonal_slots': int(self.seasonal_slots.sum()),
+            'mode': self.mode,
+            'total_transactions_analyzed': self.total_transactions,
+            'unique_statuses': self.unique_statuses
         }
 
 # Teste
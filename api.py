@@ -1,42 +1,64 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
+import json
 import sys
 import os
 
 # Adicionar diretório atual ao path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Importar detector corrigido
+# Importar estado do monitoramento
 try:
-    from anomaly_detector import AnomalyDetector
-except ImportError:
-    print("ERRO: Não foi possível importar anomaly_detector.py")
-    print("Certifique-se de que o arquivo está no mesmo diretório")
+    from monitoring_state import MonitoringState, load_detector, connect_state
+    from sliding_window import normalize_auth_code, validate_record
+    from micro_batcher import MicroBatcher
+    from event_stream import StreamHub
+except ImportError as e:
+    print(f"ERRO: Não foi possível importar os módulos do monitoramento: {e}")
+    print("Certifique-se de que os módulos (monitoring_state.py, anomaly_detector.py, ...)")
+    print("estão no mesmo diretório e que requirements-api.txt está instalado")
     sys.exit(1)
 
 # Inicializar Flask
 app = Flask(__name__)
 CORS(app)
 
-# Inicializar detector
-print("\n" + "="*60)
-print("INICIALIZANDO API FLASK")
-print("="*60)
+# Limite de registros por lote
+MAX_BATCH_SIZE = 10000
 
-try:
-    detector = AnomalyDetector(
-        'data/transactions.csv',
-        'data/transactions_auth_codes.csv'
-    )
-    print("✓ Detector inicializado com sucesso!")
-except Exception as e:
-    print(f"ERRO ao inicializar detector: {e}")
-    detector = None
-
-# Armazenamento em memória
-alerts_history = []
-transactions_buffer = []
+# Micro-batching de POST /transaction/async: registros por lote e espera
+# máxima para completar um lote (0 = lote com o que já estiver na fila)
+MICROBATCH_SIZE = int(os.environ.get('MONITORING_MICROBATCH_SIZE', 500))
+MICROBATCH_DELAY = float(os.environ.get('MONITORING_MICROBATCH_DELAY_MS', 0)) / 1000
+
+# Conexões /stream simultâneas por processo: cada uma ocupa uma thread do
+# servidor enquanto aberta (serve.py usa metade das --threads; 0 = sem limite)
+MAX_STREAMS = int(os.environ.get('MONITORING_MAX_STREAMS', 2))
+
+# Processo de estado compartilhado (definido por serve.py para os workers)
+STATE_ADDRESS = os.environ.get('MONITORING_STATE_ADDRESS', '')
+
+if STATE_ADDRESS:
+    # Worker: janelas, alertas e detector ficam no processo de estado
+    state = connect_state(STATE_ADDRESS,
+                          bytes.fromhex(os.environ['MONITORING_STATE_AUTHKEY']))
+    print(f"✓ Worker {os.getpid()} conectado ao estado em {STATE_ADDRESS}")
+else:
+    # Inicializar detector
+    print("\n" + "="*60)
+    print("INICIALIZANDO API FLASK")
+    print("="*60)
+    
+    state = MonitoringState(load_detector())
+
+# Fila de ingestão agrupada (uma chamada ao estado por micro-lote)
+batcher = MicroBatcher(state.receive_many, max_batch=MICROBATCH_SIZE,
+                       max_delay=MICROBATCH_DELAY)
+
+# Distribuição dos eventos do estado para os clientes de /stream deste processo
+stream_hub = StreamHub(state.events_since, state.dashboard, state.last_event_seq,
+                       max_subscribers=MAX_STREAMS)
 
 @app.route('/')
 def index():
@@ -47,10 +69,14 @@ def index():
         'status': 'online',
         'endpoints': {
             'POST /transaction': 'Recebe transação e retorna análise',
+            'POST /transaction/async': 'Como /transaction, com micro-batching entre requisições',
+            'POST /transactions/batch': 'Recebe lote de transações (JSON array ou NDJSON)',
             'GET /alerts': 'Lista todos os alertas',
+            'GET|PUT /detector/state': 'Exporta/importa o estado do modo online',
             'GET /alerts/active': 'Lista alertas críticos ativos',
             'GET /stats': 'Estatísticas do sistema',
             'GET /dashboard': 'Dados para dashboard',
+            'GET /stream': 'Stream SSE: snapshot, métricas (deltas) e alertas',
             'GET /health': 'Health check'
         }
     })
@@ -63,8 +89,11 @@ def receive_transaction():
     Aceita dois formatos:
     1. Transação individual: {"status": "approved", "amount": 100}
     2. Transação agregada: {"status": "approved", "count": 120}
+    
+    O campo opcional "auth_code" ("00", "51", "59", ...) alimenta a
+    detecção por código de autorização.
     """
-    if detector is None:
+    if not state.is_ready():
         return jsonify({'error': 'Detector não inicializado'}), 500
     
     try:
@@ -77,80 +106,190 @@ def receive_transaction():
         if 'status' not in transaction:
             return jsonify({'error': 'Campo obrigatório: status'}), 400
         
-        # Normalizar status
-        transaction['status'] = transaction['status'].upper()
+        try:
+            normalize_transaction(transaction, datetime.now().isoformat())
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
         
-        # Se não tem count, assumir 1
-        if 'count' not in transaction:
-            transaction['count'] = 1
+        # Janelas, análise e alertas (estado compartilhado entre workers)
+        result = state.receive(transaction)
         
-        # Adicionar timestamp
-        if 'timestamp' not in transaction:
-            transaction['timestamp'] = datetime.now().isoformat()
+        return jsonify(transaction_response(transaction, result)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@app.route('/transaction/async', methods=['POST'])
+def receive_transaction_queued():
+    """
+    Mesma entrada e resposta de POST /transaction, via micro-batching
+    
+    O registro entra na fila do MicroBatcher junto com os de outras
+    requisições simultâneas; a requisição espera o veredito do seu
+    registro, calculado em uma única análise do micro-lote.
+    """
+    if not state.is_ready():
+        return jsonify({'error': 'Detector não inicializado'}), 500
+    
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Content-Type deve ser application/json'}), 400
         
-        # Adicionar ao buffer
-        transactions_buffer.append(transaction)
+        transaction = request.get_json()
         
-        # Manter apenas últimas 100
-        if len(transactions_buffer) > 100:
-            transactions_buffer.pop(0)
+        # Validar campos obrigatórios
+        if 'status' not in transaction:
+            return jsonify({'error': 'Campo obrigatório: status'}), 400
         
-        # Análise individual
-        individual_analysis = detector.analyze_real_time(transaction)
+        try:
+            normalize_transaction(transaction, datetime.now().isoformat())
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
+        result = batcher.submit(transaction).result(timeout=30)
         
-        # Análise de janela (últimas 60)
-        window_analysis = detector.analyze_transaction_window(transactions_buffer[-60:])
+        return jsonify(transaction_response(transaction, result)), 200
         
-        # Salvar alerta se necessário
-        if window_analysis['alert']:
-            alert_record = {
-                'id': len(alerts_history) + 1,
-                'timestamp': datetime.now().isoformat(),
-                'severity': window_analysis['severity'],
-                'details': window_analysis['alerts'],
-                'status_counts': window_analysis['status_counts']
-            }
-            alerts_history.append(alert_record)
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+def normalize_transaction(transaction, now):
+    """
+    Normaliza status e auth code e preenche count (1) e timestamp (`now`)
+    
+    Raises:
+        ValueError: timestamp ou count inválido (resposta 400; o registro
+                    não chega ao estado nem ao log)
+    """
+    transaction['status'] = str(transaction['status']).upper()
+    if 'auth_code' in transaction:
+        transaction['auth_code'] = normalize_auth_code(transaction['auth_code'])
+    transaction.setdefault('count', 1)
+    transaction.setdefault('timestamp', now)
+    validate_record(transaction)
+    return transaction
+
+def transaction_response(transaction, result):
+    """Resposta de /transaction a partir do resultado do estado"""
+    window_analysis = result['window_analysis']
+    return {
+        'success': True,
+        'transaction_received': transaction,
+        'individual_analysis': result['individual_analysis'],
+        'window_analysis': window_analysis,
+        'closed_windows': result['closed_windows'],
+        'recommendation': {
+            'alert': window_analysis['alert'],
+            'severity': window_analysis['severity'],
+            'action': 'INVESTIGATE' if window_analysis['alert'] else 'MONITOR',
+            'message': window_analysis['message']
+        }
+    }
+
+@app.route('/transactions/batch', methods=['POST'])
+def receive_transactions_batch():
+    """
+    Recebe um lote de transações e analisa todas em uma única passada
+    
+    Aceita dois formatos:
+    1. JSON array: [{"status": "approved", "count": 120}, ...]
+    2. NDJSON (application/x-ndjson): um objeto JSON por linha
+    """
+    if not state.is_ready():
+        return jsonify({'error': 'Detector não inicializado'}), 500
+    
+    try:
+        try:
+            batch = parse_batch(request)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'success': False}), 400
         
-        # Resposta
-        response = {
+        if len(batch) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'Lote excede o limite de {MAX_BATCH_SIZE} registros',
+                'success': False
+            }), 413
+        
+        # Validar e normalizar registros
+        now = datetime.now().isoformat()
+        for i, transaction in enumerate(batch):
+            if not isinstance(transaction, dict) or 'status' not in transaction:
+                return jsonify({
+                    'error': f'Registro {i}: campo obrigatório: status',
+                    'success': False
+                }), 400
+            try:
+                normalize_transaction(transaction, now)
+            except ValueError as e:
+                return jsonify({'error': f'Registro {i}: {e}', 'success': False}), 400
+        
+        batch_analysis = state.receive_batch(batch)
+        
+        return jsonify({
             'success': True,
-            'transaction_received': transaction,
-            'individual_analysis': individual_analysis,
-            'window_analysis': window_analysis,
+            'records_received': len(batch),
+            'batch_analysis': batch_analysis,
             'recommendation': {
-                'alert': window_analysis['alert'],
-                'severity': window_analysis['severity'],
-                'action': 'INVESTIGATE' if window_analysis['alert'] else 'MONITOR',
-                'message': window_analysis['message']
+                'alert': batch_analysis['alert'],
+                'severity': batch_analysis['severity'],
+                'action': 'INVESTIGATE' if batch_analysis['alert'] else 'MONITOR',
+                'alerting_windows': batch_analysis['alerting_windows']
             }
-        }
-        
-        return jsonify(response), 200
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e), 'success': False}), 500
 
+def parse_batch(req):
+    """Lê o corpo do lote como JSON array ou NDJSON"""
+    if req.is_json:
+        payload = req.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('transactions')
+        if not isinstance(payload, list):
+            raise ValueError('Corpo deve ser um JSON array de transações')
+        return payload
+    
+    if req.mimetype in ('application/x-ndjson', 'application/jsonl', 'text/plain'):
+        try:
+            return [json.loads(line) for line in req.get_data(as_text=True).splitlines()
+                    if line.strip()]
+        except json.JSONDecodeError as e:
+            raise ValueError(f'NDJSON inválido: {e}')
+    
+    raise ValueError('Content-Type deve ser application/json ou application/x-ndjson')
+
+@app.route('/detector/state', methods=['GET'])
+def export_detector_state():
+    """Exporta o estado do modo online do detector"""
+    if not state.is_ready():
+        return jsonify({'error': 'Detector não inicializado'}), 500
+    
+    return jsonify(state.export_detector_state()), 200
+
+@app.route('/detector/state', methods=['PUT'])
+def import_detector_state():
+    """Importa um estado online exportado por GET /detector/state"""
+    if not state.is_ready():
+        return jsonify({'error': 'Detector não inicializado'}), 500
+    
+    payload = request.get_json(silent=True) or {}
+    try:
+        mode = state.import_detector_state(payload.get('state') or payload)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Estado inválido: {e}', 'success': False}), 400
+    
+    return jsonify({'success': True, 'mode': mode}), 200
+
 @app.route('/alerts', methods=['GET'])
 def get_alerts():
     """Retorna todos os alertas"""
-    return jsonify({
-        'total_alerts': len(alerts_history),
-        'alerts': alerts_history[-50:]
-    }), 200
+    return jsonify(state.recent_alerts(50)), 200
 
 @app.route('/alerts/active', methods=['GET'])
 def get_active_alerts():
     """Retorna alertas críticos recentes"""
-    now = datetime.now()
-    active_alerts = []
-    
-    for alert in alerts_history:
-        alert_time = datetime.fromisoformat(alert['timestamp'])
-        time_diff = (now - alert_time).total_seconds() / 60
-        
-        if time_diff <= 10 and alert['severity'] == 'CRITICAL':
-            active_alerts.append(alert)
+    # Últimos 10 minutos
+    active_alerts = state.active_alerts()
     
     return jsonify({
         'active_critical_alerts': len(active_alerts),
@@ -160,64 +299,54 @@ def get_active_alerts():
 @app.route('/stats', methods=['GET'])
 def get_statistics():
     """Retorna estatísticas"""
-    if detector is None:
+    if not state.is_ready():
         return jsonify({'error': 'Detector não inicializado'}), 500
     
-    stats = detector.get_statistics()
-    
-    return jsonify({
-        'detector_stats': stats,
-        'api_stats': {
-            'total_alerts_generated': len(alerts_history),
-            'transactions_in_buffer': len(transactions_buffer),
-            'uptime': 'Running'
-        }
-    }), 200
+    # Corpo pré-serializado; cliente com o ETag atual recebe 304 sem corpo
+    etag, body = state.statistics_body(request.if_none_match.as_set())
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    if body is None:
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
 
 @app.route('/dashboard', methods=['GET'])
 def get_dashboard_data():
     """Retorna dados para dashboard"""
+    return jsonify(state.dashboard()), 200
+
+@app.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events para o dashboard
     
-    # Contar transações por status
-    status_counts = {}
-    total_count = 0
-    
-    for trans in transactions_buffer[-100:]:
-        status = trans.get('status', 'UNKNOWN')
-        count = trans.get('count', 1)
-        status_counts[status] = status_counts.get(status, 0) + count
-        total_count += count
-    
-    # Calcular taxa de erro
-    errors = (status_counts.get('FAILED', 0) + 
-              status_counts.get('DENIED', 0) + 
-              status_counts.get('REJECTED', 0))
-    error_rate = (errors / total_count * 100) if total_count > 0 else 0
+    Eventos: "snapshot" (mesmo conteúdo de /dashboard, na conexão e após
+    reset), "metrics" (só as contagens que mudaram; null = removida) e
+    "alert" (cada alerta novo).
     
-    # Últimos alertas
-    recent_alerts = alerts_history[-10:] if alerts_history else []
+    Acima de MAX_STREAMS conexões neste processo responde 503: as threads
+    restantes ficam para a ingestão. A vaga de um cliente que saiu é
+    liberada quando a desconexão é percebida (no próximo frame ou
+    keep-alive, até 15 s).
+    """
+    subscriber = stream_hub.subscribe()
+    if subscriber is None:
+        return jsonify({
+            'error': f'Limite de {MAX_STREAMS} conexões de stream atingido; use GET /dashboard',
+            'success': False
+        }), 503, {'Retry-After': '30'}
     
-    return jsonify({
-        'current_status': {
-            'total_transactions': total_count,
-            'status_distribution': status_counts,
-            'error_rate_percent': round(error_rate, 2)
-        },
-        'recent_alerts': recent_alerts,
-        'alerts_count': {
-            'total': len(alerts_history),
-            'critical': len([a for a in alerts_history if a['severity'] == 'CRITICAL']),
-            'warning': len([a for a in alerts_history if a['severity'] == 'WARNING'])
-        },
-        'timestamp': datetime.now().isoformat()
-    }), 200
+    response = Response(stream_hub.stream(subscriber), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Libera a vaga mesmo se o cliente sair antes do primeiro frame
+    response.call_on_close(lambda: stream_hub.unsubscribe(subscriber))
+    return response
 
 @app.route('/reset', methods=['POST'])
 def reset_system():
     """Reseta o sistema"""
-    global alerts_history, transactions_buffer
-    alerts_history = []
-    transactions_buffer = []
+    state.reset()
     
     return jsonify({
         'message': 'Sistema resetado',
@@ -229,7 +358,7 @@ def health_check():
     """Health check"""
     return jsonify({
         'status': 'healthy',
-        'detector_initialized': detector is not None,
+        'detector_initialized': state.is_ready(),
         'timestamp': datetime.now().isoformat()
     }), 200
 
@@ -240,11 +369,16 @@ if __name__ == '__main__':
     print("\n🚀 Iniciando servidor Flask...")
     print("\n📡 Endpoints disponíveis:")
     print("   POST   http://localhost:5000/transaction")
+    print("   POST   http://localhost:5000/transaction/async")
+    print("   POST   http://localhost:5000/transactions/batch")
     print("   GET    http://localhost:5000/alerts")
     print("   GET    http://localhost:5000/alerts/active")
     print("   GET    http://localhost:5000/stats")
     print("   GET    http://localhost:5000/dashboard")
+    print("   GET    http://localhost:5000/stream")
     print("   GET    http://localhost:5000/health")
+    print("\n💡 Produção (vários workers, estado compartilhado):")
+    print("   python serve.py --workers 4")
     print("\n💡 Para testar:")
     print("   python test_api.py")
     print("\n" + "="*60 + "\n")
@@ -0,0 +1,483 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import data_loader
+from anomaly_detector import AnomalyDetector
+from monitoring_state import MonitoringState, load_detector
+
+def timed(func, repeat=3):
+    """Melhor tempo (s) de `repeat` execuções, com a saída silenciada"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+def synthetic_history(path='data/transactions.csv', scale=100):
+    """Replica o histórico `scale` vezes, deslocando os timestamps"""
+    df = pd.read_csv(path, parse_dates=['timestamp'])
+    df['status'] = df['status'].str.upper()
+    span = df['timestamp'].max() - df['timestamp'].min() + pd.Timedelta(minutes=1)
+
+    frames = []
+    for i in range(scale):
+        frame = df.copy()
+        frame['timestamp'] = frame['timestamp'] + span * i
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def reference_baseline(df_trans):
+    """Implementação anterior: um filtro por status e uma passada por estatística"""
+    baseline = {}
+    for status in df_trans['status'].unique():
+        status_data = df_trans[df_trans['status'] == status]['count']
+        if len(status_data) > 0:
+            baseline[status] = {
+                'mean': status_data.mean(),
+                'std': status_data.std(),
+                'median': status_data.median(),
+                'p95': status_data.quantile(0.95),
+                'p99': status_data.quantile(0.99),
+                'max': status_data.max(),
+                'min': status_data.min()
+            }
+    return baseline
+
+def benchmark_baseline(scale=100):
+    """Compara o cálculo do baseline agrupado com a implementação anterior"""
+    print("\n" + "="*60)
+    print(f"BENCHMARK: _calculate_baseline (histórico x{scale})")
+    print("="*60)
+
+    df = synthetic_history(scale=scale)
+    detector = AnomalyDetector.__new__(AnomalyDetector)
+    detector.df_trans = df
+
+    reference_time, reference = timed(lambda: reference_baseline(df))
+    grouped_time, grouped = timed(detector._calculate_baseline)
+
+    identical = {s: {k: float(v) for k, v in values.items()} for s, values in reference.items()} == \
+                {s: {k: float(v) for k, v in values.items()} for s, values in grouped.items()}
+
+    print(f"Linhas: {len(df):,}")
+    print(f"Anterior (filtro por status): {reference_time * 1000:.1f} ms")
+    print(f"Agrupado (passada única):     {grouped_time * 1000:.1f} ms")
+    print(f"Ganho: {reference_time / grouped_time:.1f}x | Resultados idênticos: {identical}")
+
+    return {'rows': len(df), 'reference_s': reference_time, 'grouped_s': grouped_time,
+            'identical': identical}
+
+def peak_memory(func):
+    """(resultado, pico de memória alocada em MB) de uma chamada, com a saída silenciada"""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024 / 1024
+
+@contextlib.contextmanager
+def without_history_cache():
+    """Desativa o cache colunar do data_loader (medir leitura do CSV)"""
+    previous = data_loader.CACHE_DIR
+    data_loader.CACHE_DIR = ''
+    try:
+        yield
+    finally:
+        data_loader.CACHE_DIR = previous
+
+def benchmark_history_cache(scale=100):
+    """Leitura do CSV x leitura do cache colunar (.npy com memmap)"""
+    print("\n" + "="*60)
+    print(f"BENCHMARK: cache colunar do histórico (histórico x{scale})")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'transactions.csv')
+        synthetic_history(scale=scale).to_csv(path, index=False)
+
+        with without_history_cache():
+            csv_time, from_csv = timed(lambda: data_loader.read_transactions(path), repeat=1)
+        data_loader.read_transactions(path)  # grava o cache
+        cache_time, from_cache = timed(lambda: data_loader.read_transactions(path))
+        identical = from_csv.equals(from_cache)
+
+    print(f"Linhas: {len(from_csv):,}")
+    print(f"CSV (parsing):   {csv_time * 1000:.1f} ms")
+    print(f"Cache (memmap):  {cache_time * 1000:.1f} ms")
+    print(f"Ganho: {csv_time / cache_time:.0f}x | DataFrames idênticos: {identical}")
+
+    return {'rows': len(from_csv), 'csv_s': csv_time, 'cache_s': cache_time,
+            'identical': identical}
+
+def benchmark_history_loading(scale=100, chunksize=100000):
+    """Pico de memória do baseline com o histórico inteiro x lido em blocos"""
+    print("\n" + "="*60)
+    print(f"BENCHMARK: carga do histórico (histórico x{scale}, blocos de {chunksize:,})")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory, without_history_cache():
+        path = os.path.join(directory, 'transactions.csv')
+        synthetic_history(scale=scale).to_csv(path, index=False)
+
+        full, full_peak = peak_memory(lambda: AnomalyDetector(path))
+        chunked, chunked_peak = peak_memory(lambda: AnomalyDetector(path, chunksize=chunksize))
+
+    identical = all(np.allclose(list(full.baseline[s].values()), list(chunked.baseline[s].values()),
+                                rtol=1e-9, equal_nan=True) for s in full.baseline) and \
+        np.allclose(full.threshold_table, chunked.threshold_table, rtol=1e-9)
+
+    print(f"Linhas: {full.total_transactions:,}")
+    print(f"Histórico inteiro: pico {full_peak:.1f} MB")
+    print(f"Em blocos:         pico {chunked_peak:.1f} MB")
+    print(f"Redução: {full_peak / chunked_peak:.1f}x | Baselines equivalentes: {identical}")
+
+    return {'rows': full.total_transactions, 'full_peak_mb': full_peak,
+            'chunked_peak_mb': chunked_peak, 'identical': identical}
+
+def benchmark_rollups(scale=100):
+    """Agregações do SQLAnalyzer: tabela de minutos x rollups pré-agregadas"""
+    from sql_analysis import SQLAnalyzer
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK: rollups do SQLite (histórico x{scale})")
+    print("="*60)
+
+    queries = {
+        'Por status': (
+            """SELECT status_id, SUM(count), AVG(count), MIN(count), MAX(count)
+               FROM transaction_counts GROUP BY status_id""",
+            """SELECT status_id, SUM(total), SUM(total) * 1.0 / SUM(counted),
+                      MIN(min_count), MAX(max_count)
+               FROM status_by_day GROUP BY status_id"""),
+        'Por dia': (
+            """SELECT ts - ts % 86400 AS day, SUM(count) FROM transaction_counts
+               GROUP BY day ORDER BY day""",
+            "SELECT bucket, total FROM totals_by_day ORDER BY bucket"),
+        'Top minutos': (
+            """SELECT ts, SUM(count) AS total FROM transaction_counts
+               GROUP BY ts ORDER BY total DESC, ts LIMIT 10""",
+            "SELECT bucket, total FROM totals_by_minute ORDER BY total DESC, bucket LIMIT 10")
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, without_history_cache():
+        path = os.path.join(directory, 'transactions.csv')
+        synthetic_history(scale=scale).to_csv(path, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = SQLAnalyzer(transactions_path=path,
+                                   db_path=os.path.join(directory, 'analytics.db'))
+
+        print(f"Linhas: {analyzer.transaction_rows:,}")
+        for name, (raw_query, rollup_query) in queries.items():
+            raw_time, raw = timed(lambda: analyzer.conn.execute(raw_query).fetchall())
+            rollup_time, rollup = timed(lambda: analyzer.conn.execute(rollup_query).fetchall())
+            identical = np.allclose(np.array(raw, dtype=float), np.array(rollup, dtype=float))
+            print(f"{name:<12} minutos: {raw_time * 1000:8.1f} ms | rollup: "
+                  f"{rollup_time * 1000:6.2f} ms | {raw_time / rollup_time:.0f}x | "
+                  f"resultados iguais: {identical}")
+            results[name] = {'raw_s': raw_time, 'rollup_s': rollup_time, 'identical': identical}
+        analyzer.close()
+
+    return results
+
+def reference_checkout_anomalies(df, column, threshold=3):
+    """Implementação anterior: Z-score e IQR de uma coluna com pandas (contagens)"""
+    values = df[column]
+    std = values.std()
+    z_anomalies = 0 if std == 0 else int((((values - values.mean()) / std).abs() > threshold).sum())
+
+    q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    iqr = q3 - q1
+    iqr_anomalies = int(((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)).sum())
+    return z_anomalies, iqr_anomalies
+
+def benchmark_checkout_scoring(files=3000):
+    """Anomalias de checkout: uma chamada por coluna x motor vetorizado (todas as séries)"""
+    from checkout_scoring import score_checkouts, summarize_scores
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK: anomalias de checkout ({files:,} arquivos)")
+    print("="*60)
+
+    base = data_loader.read_checkout('data/checkout_1.csv')
+    columns = [col for col in base.columns if col != 'time']
+    rng = np.random.default_rng(0)
+    frames = {}
+    for i in range(files):
+        frame = base.copy()
+        frame[columns] = (frame[columns] * rng.uniform(0.5, 2.0, size=(len(frame), 1))).round(2)
+        frames[f'checkout_{i}'] = frame
+
+    def per_column():
+        return {(name, col): reference_checkout_anomalies(df, col)
+                for name, df in frames.items() for col in columns}
+
+    loop_time, loop = timed(per_column, repeat=1)
+    vector_time, summary = timed(lambda: summarize_scores(score_checkouts(frames)))
+    identical = all(loop[(row['checkout'], row['column'])] ==
+                    (row['anomalies_z'], row['anomalies_iqr']) for row in summary)
+
+    print(f"Séries: {len(summary):,} (x 24 horas)")
+    print(f"Por coluna:  {loop_time * 1000:8.1f} ms")
+    print(f"Vetorizado:  {vector_time * 1000:8.1f} ms (Z-score, IQR e MAD)")
+    print(f"Ganho: {loop_time / vector_time:.0f}x | Contagens iguais: {identical}")
+
+    return {'series': len(summary), 'loop_s': loop_time, 'vector_s': vector_time,
+            'identical': identical}
+
+def benchmark_checkout_files(files=2000, workers=None):
+    """Muitos CSVs de checkout: um processo x pool de processos"""
+    from checkout_scoring import analyze_checkout_files
+
+    workers = workers or os.cpu_count() or 1
+    print("\n" + "="*60)
+    print(f"BENCHMARK: checkouts em lote ({files:,} arquivos, {workers} processos)")
+    print("="*60)
+
+    base = data_loader.read_checkout('data/checkout_1.csv')
+    counts = ['today', 'yesterday', 'same_day_last_week']
+    averages = ['avg_last_week', 'avg_last_month']
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(files):
+            factor = rng.uniform(0.5, 2.0, size=(len(base), 1))
+            frame = base.copy()
+            frame[counts] = (frame[counts] * factor).round().astype('int32')
+            frame[averages] = (frame[averages] * factor).round(2)
+            paths.append(os.path.join(directory, f'checkout_{i:05d}.csv'))
+            frame.to_csv(paths[-1], index=False)
+
+        serial_time, (serial, _) = timed(
+            lambda: analyze_checkout_files(paths, workers=1, progress=False), repeat=1)
+        pool_time, (pooled, _) = timed(
+            lambda: analyze_checkout_files(paths, workers=workers, progress=False), repeat=1)
+        identical = serial.equals(pooled)
+
+    print(f"Um processo:  {serial_time:.2f}s ({files / serial_time:,.0f} arquivos/s)")
+    print(f"Pool:         {pool_time:.2f}s ({files / pool_time:,.0f} arquivos/s)")
+    print(f"Ganho: {serial_time / pool_time:.1f}x | Resumos iguais: {identical}")
+
+    return {'files': files, 'serial_s': serial_time, 'pool_s': pool_time,
+            'identical': identical}
+
+def benchmark_chart_rendering(charts=10):
+    """Gráficos de checkout: figura nova em 300 DPI (antes) x figura reutilizada por modo"""
+    from checkout_charts import CHART_MODES, CheckoutFigure, render_checkout_chart
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK: gráficos de checkout ({charts} gráficos por modo)")
+    print("="*60)
+
+    df1 = data_loader.read_checkout('data/checkout_1.csv')
+    df2 = data_loader.read_checkout('data/checkout_2.csv')
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chart.png')
+        fresh_time, _ = timed(lambda: [render_checkout_chart(df1, df2, path, 'full')
+                                       for _ in range(charts)], repeat=1)
+        print(f"Figura nova, full:   {fresh_time / charts * 1000:6.0f} ms/gráfico")
+        results['fresh_full_s'] = fresh_time / charts
+
+        for mode in CHART_MODES:
+            figure = CheckoutFigure()
+            mode_time, _ = timed(lambda: [figure.render(df1, df2, path, mode)
+                                          for _ in range(charts)], repeat=1)
+            print(f"Reutilizada, {mode + ':':<8}{mode_time / charts * 1000:6.0f} ms/gráfico "
+                  f"({fresh_time / mode_time:.1f}x)")
+            results[f'{mode}_s'] = mode_time / charts
+
+    return results
+
+def benchmark_query_results(scale=100):
+    """Resultados de query: cache de relatório repetido e streaming de query sem LIMIT"""
+    from sql_analysis import SQLAnalyzer
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK: resultados de query (histórico x{scale})")
+    print("="*60)
+
+    # Relatório: agregação sobre todas as linhas, resultado pequeno (cacheável)
+    report_query = """SELECT strftime('%Y-%m-%d %H:00', timestamp) AS hour, status,
+                             SUM(count) AS total, AVG(count) AS avg_per_minute
+                      FROM transactions GROUP BY hour, status ORDER BY hour, status"""
+    # Acumulado sem LIMIT: uma linha de resultado por linha da tabela
+    stream_query = """SELECT timestamp, status, count,
+                             SUM(count) OVER (PARTITION BY status ORDER BY timestamp) AS cumulative_count
+                      FROM transactions ORDER BY timestamp, status"""
+
+    def peak_mb(func):
+        tracemalloc.start()
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_bytes / 2**20
+
+    with tempfile.TemporaryDirectory() as directory, without_history_cache():
+        path = os.path.join(directory, 'transactions.csv')
+        synthetic_history(scale=scale).to_csv(path, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = SQLAnalyzer(transactions_path=path,
+                                   db_path=os.path.join(directory, 'analytics.db'))
+
+        cold_time, (report, _) = timed(lambda: analyzer.run_query(report_query, cache=False))
+        analyzer.run_query(report_query)
+        cached_time, (cached_report, cached) = timed(lambda: analyzer.run_query(report_query))
+
+        csv_path = os.path.join(directory, 'result.csv')
+        full_time, (df, _) = timed(lambda: analyzer.run_query(stream_query, cache=False), repeat=1)
+        stream_time, rows = timed(lambda: analyzer.export_query(stream_query, csv_path), repeat=1)
+        full_mb = peak_mb(lambda: analyzer.run_query(stream_query, cache=False))
+        stream_mb = peak_mb(lambda: analyzer.export_query(stream_query, csv_path))
+        analyzer.close()
+
+    identical = cached and report.equals(cached_report) and rows == len(df)
+    print(f"Relatório ({len(report):,} linhas)  sem cache: {cold_time * 1000:8.1f} ms | "
+          f"cache: {cached_time * 1000:6.2f} ms | {cold_time / cached_time:.0f}x")
+    print(f"Acumulado ({len(df):,} linhas)")
+    print(f"  DataFrame:     {full_time:6.2f}s | pico {full_mb:7.1f} MB")
+    print(f"  Streaming CSV: {stream_time:6.2f}s | pico {stream_mb:7.1f} MB")
+    print(f"Resultados iguais: {identical}")
+
+    return {'report_s': cold_time, 'cached_s': cached_time, 'rows': len(df),
+            'full_s': full_time, 'full_mb': full_mb, 'stream_s': stream_time,
+            'stream_mb': stream_mb, 'identical': identical}
+
+def stress_state(detector, n_threads, records_per_thread, n_readers=4):
+    """
+    Envia registros ao MonitoringState a partir de `n_threads` threads
+    enquanto `n_readers` threads leem dashboard e alertas sem parar
+
+    Returns:
+        (registros por segundo, lista de violações encontradas)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        state = MonitoringState(detector, log_path='')
+    start_epoch = datetime(2025, 7, 14, 10, 0).timestamp()
+    statuses = ['APPROVED', 'APPROVED', 'APPROVED', 'FAILED', 'DENIED', 'REVERSED']
+    auth_codes = ['00', '00', '00', '51', '59', '51']
+    closed_counts = [0] * n_threads
+    errors = []
+    stop = threading.Event()
+
+    def writer(i):
+        for k in range(records_per_thread):
+            # Timestamps globalmente crescentes (meio segundo por registro)
+            epoch = start_epoch + (k * n_threads + i) * 0.5
+            j = (k + i) % len(statuses)
+            result = state.receive({
+                'status': statuses[j],
+                'auth_code': auth_codes[j],
+                'count': 1,
+                'timestamp': datetime.fromtimestamp(epoch).isoformat()
+            })
+            closed_counts[i] += sum(sum(w['status_counts'].values())
+                                    for w in result['closed_windows'])
+
+    def reader():
+        while not stop.is_set():
+            data = state.dashboard()
+            status = data['current_status']
+            if sum(status['status_distribution'].values()) != status['total_transactions']:
+                errors.append('dashboard com janela pela metade')
+            if sum(status['auth_code_distribution'].values()) != status['total_transactions']:
+                errors.append('dashboard com auth codes inconsistentes')
+            ids = [alert['id'] for alert in state.recent_alerts(50)['alerts']]
+            if ids != sorted(set(ids)):
+                errors.append('ids de alerta repetidos ou fora de ordem')
+            # Uma leitura por milissegundo por leitor (bem acima do polling do dashboard)
+            stop.wait(0.001)
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(n_threads)]
+    readers = [threading.Thread(target=reader) for _ in range(n_readers)]
+    for thread in readers:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    # Nenhum registro perdido: minutos fechados + abertos + atrasados = enviados
+    sent = n_threads * records_per_thread
+    minute_window = state.minute_window
+    open_total = sum(sum(minute_window.open_counts(m)['status'].values())
+                     for m in list(minute_window._buckets))
+    if sum(closed_counts) + open_total + minute_window.late_records != sent:
+        errors.append(f'registros perdidos: {sum(closed_counts)} + {open_total} + '
+                      f'{minute_window.late_records} != {sent}')
+
+    # Ids de alerta únicos e sem buracos
+    total, _ = state.alerts_history.counters()
+    ids = [alert['id'] for alert in state.alerts_history.recent(total)]
+    if ids != list(range(1, total + 1)):
+        errors.append('ids de alerta com repetição ou buracos')
+
+    buffer = state.transactions_buffer
+    if len(buffer) != min(sent, buffer.size) or sum(buffer.status_counts.values()) != buffer.total:
+        errors.append('buffer do dashboard inconsistente')
+
+    return sent / elapsed, errors
+
+def benchmark_concurrency(thread_counts=(1, 8, 16, 32), records_per_thread=2000):
+    """Teste de carga do estado compartilhado com escritores e leitores concorrentes"""
+    print("\n" + "="*60)
+    print(f"BENCHMARK: MonitoringState concorrente ({records_per_thread} registros por thread)")
+    print("="*60)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        detector = load_detector()
+
+    results = []
+    for n_threads in thread_counts:
+        throughput, errors = stress_state(detector, n_threads, records_per_thread)
+        status = 'OK' if not errors else f'FALHOU ({sorted(set(errors))})'
+        print(f"{n_threads:>3} threads: {throughput:>10,.0f} registros/s | {status}")
+        results.append({'threads': n_threads, 'records_per_s': throughput,
+                        'errors': errors})
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks do sistema de monitoramento')
+    parser.add_argument('--scale', type=int, default=100,
+                        help='Quantas vezes replicar o histórico de exemplo')
+    parser.add_argument('--chunksize', type=int, default=100000,
+                        help='Linhas por bloco na leitura do histórico')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 16, 32],
+                        help='Quantidades de threads do teste de carga')
+    args = parser.parse_args()
+
+    benchmark_baseline(args.scale)
+    benchmark_history_loading(args.scale, args.chunksize)
+    benchmark_history_cache(args.scale)
+    benchmark_rollups(args.scale)
+    benchmark_query_results(args.scale)
+    benchmark_checkout_scoring()
+    benchmark_checkout_files()
+    benchmark_chart_rendering()
+    benchmark_concurrency(args.threads)
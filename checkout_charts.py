@@ -0,0 +1,222 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import time
+
+from data_loader import read_checkout
+
+# Modos de renderização: formato, DPI e recorte das margens. 'preview' é uma
+# prévia rápida em baixa resolução; 'svg' é vetorial (sem rasterizar). O
+# recorte (bbox_inches='tight') desenha a figura duas vezes: só no 'full'
+CHART_MODES = {
+    'full': ('png', 300, True),
+    'preview': ('png', 72, False),
+    'svg': ('svg', 72, False)
+}
+
+CHART_STYLE = 'seaborn-v0_8-darkgrid'
+
+# Figura reutilizada por cada processo do pool
+_worker_figure = None
+
+
+def chart_path(path: str, mode: str) -> str:
+    """Caminho de saída com a extensão do modo (ex.: .png -> .svg)"""
+    extension = CHART_MODES[mode][0]
+    return f'{os.path.splitext(path)[0]}.{extension}'
+
+
+def chart_outputs(paths: Sequence[str], charts_dir: str) -> List[str]:
+    """
+    Arquivo de gráfico de cada CSV, sem colisão entre arquivos de mesmo nome
+
+    Repete em `charts_dir` as pastas abaixo da pasta comum dos CSVs
+    (a/c.csv e b/c.csv -> charts_dir/a/c.csv e charts_dir/b/c.csv; a
+    extensão segue o modo em render)
+    """
+    if not paths:
+        return []
+    absolute = [os.path.abspath(path) for path in paths]
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    except ValueError:
+        # Unidades diferentes (Windows): caminho completo sem a unidade
+        return [os.path.join(charts_dir, os.path.splitdrive(path)[1].lstrip(os.sep))
+                for path in absolute]
+    return [os.path.join(charts_dir, os.path.relpath(path, root)) for path in absolute]
+
+
+class CheckoutFigure:
+    """
+    Figura 2x2 de checkouts, criada uma vez e redesenhada a cada gráfico
+
+    Usa matplotlib sem pyplot (Figure + backend Agg): nada de janela, estado
+    global ou backend interativo, então funciona em servidores e em
+    processos do pool. Criar a figura e os eixos é a parte cara; cada
+    render só limpa os eixos e desenha os dados novos.
+    """
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+
+        self._style = [CHART_STYLE, self._palette()]
+        with self._styled():
+            self.figure = Figure(figsize=(16, 12))
+            self.axes = self.figure.subplots(2, 2)
+        self.figure.suptitle('Análise de Checkouts', fontsize=16, fontweight='bold')
+
+    def _styled(self):
+        """Estilo aplicado só a esta figura (sem mudar o rcParams global)"""
+        import matplotlib.style
+        return matplotlib.style.context(self._style)
+
+    @staticmethod
+    def _palette() -> Dict:
+        """Paleta husl do seaborn quando instalado (opcional: só define as cores)"""
+        try:
+            import seaborn as sns
+        except ImportError:
+            return {}
+        from cycler import cycler
+        return {'axes.prop_cycle': cycler(color=sns.color_palette('husl'))}
+
+    def render(self, df1, df2, path: str, mode: str = 'full') -> str:
+        """
+        Desenha os checkouts e grava o arquivo
+
+        Args:
+            df1: Checkout principal (comparação temporal, distribuição e variação)
+            df2: Segundo checkout (None: painel de comparação oculto)
+            path: Arquivo de saída (a extensão segue o modo)
+            mode: 'full' (PNG 300 DPI), 'preview' (PNG 72 DPI) ou 'svg'
+        """
+        extension, dpi, trim = CHART_MODES[mode]
+        path = chart_path(path, mode)
+        with self._styled():
+            for ax in self.axes.flat:
+                ax.clear()
+            self._draw(df1, df2)
+            self.figure.tight_layout()
+            self.figure.savefig(path, dpi=dpi, bbox_inches='tight' if trim else None,
+                                format=extension)
+        return path
+
+    def _draw(self, df1, df2) -> None:
+        hours1 = _hours(df1)
+
+        # Gráfico 1: Checkout 1
+        ax1 = self.axes[0, 0]
+        ax1.plot(hours1, df1['today'], label='Hoje', marker='o', linewidth=2)
+        if 'yesterday' in df1.columns:
+            ax1.plot(hours1, df1['yesterday'], label='Ontem', marker='s', linewidth=2, alpha=0.7)
+        if 'avg_last_week' in df1.columns:
+            ax1.plot(hours1, df1['avg_last_week'], label='Média Semana', marker='^', linewidth=2, alpha=0.7)
+        ax1.set_title('Checkout 1: Comparação Temporal')
+        ax1.set_xlabel('Hora')
+        ax1.set_ylabel('Transações')
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
+
+        # Gráfico 2: Checkout 2
+        ax2 = self.axes[0, 1]
+        ax2.set_visible(df2 is not None)
+        if df2 is not None:
+            hours2 = _hours(df2)
+            ax2.plot(hours2, df2['today'], label='Hoje', marker='o', linewidth=2, color='green')
+            if 'yesterday' in df2.columns:
+                ax2.plot(hours2, df2['yesterday'], label='Ontem', marker='s', linewidth=2, alpha=0.7)
+            ax2.set_title('Checkout 2: Comparação Temporal')
+            ax2.set_xlabel('Hora')
+            ax2.set_ylabel('Transações')
+            ax2.legend()
+            ax2.grid(True, alpha=0.3)
+
+        # Gráfico 3: Boxplot
+        ax3 = self.axes[1, 0]
+        columns = [col for col in ['today', 'yesterday', 'avg_last_week'] if col in df1.columns]
+        bp = ax3.boxplot([df1[col] for col in columns], patch_artist=True)
+        ax3.set_xticks(range(1, len(columns) + 1),
+                       [col.replace('_', ' ').title() for col in columns])
+        for patch in bp['boxes']:
+            patch.set_facecolor('lightblue')
+        ax3.set_title('Checkout 1: Distribuição')
+        ax3.set_ylabel('Transações')
+        ax3.grid(True, alpha=0.3, axis='y')
+
+        # Gráfico 4: Variação %
+        ax4 = self.axes[1, 1]
+        ax4.set_visible('yesterday' in df1.columns)
+        if 'yesterday' in df1.columns:
+            var_pct = ((df1['today'] - df1['yesterday']) / df1['yesterday'].replace(0, 1) * 100)
+            colors = ['red' if x < -20 else 'orange' if x < 0 else 'lightgreen' if x < 20 else 'green' for x in var_pct]
+            ax4.bar(hours1, var_pct, color=colors, alpha=0.7)
+            ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
+            ax4.set_title('Variação % (Hoje vs Ontem)')
+            ax4.set_xlabel('Hora')
+            ax4.set_ylabel('Variação %')
+            ax4.grid(True, alpha=0.3, axis='y')
+
+
+def _hours(df):
+    """Hora numérica a partir da coluna time ('07h' -> 7)"""
+    return df['time'].astype(str).str.replace('h', '').astype(int)
+
+
+def render_checkout_chart(df1, df2, path: str, mode: str = 'full') -> str:
+    """Gráfico avulso (cria e descarta a figura)"""
+    return CheckoutFigure().render(df1, df2, path, mode)
+
+
+def _init_worker() -> None:
+    global _worker_figure
+    _worker_figure = CheckoutFigure()
+
+
+def _render_job(job: Tuple[str, Optional[str], str], mode: str) -> Tuple[str, Optional[str]]:
+    """Lê o(s) checkout(s) e desenha na figura do processo; erro não derruba o pool"""
+    csv1, csv2, output = job
+    try:
+        df1 = read_checkout(csv1, cache=False)
+        df2 = read_checkout(csv2, cache=False) if csv2 else None
+        return _worker_figure.render(df1, df2, output, mode), None
+    except Exception as e:
+        # Qualquer falha (leitura, dados não numéricos, matplotlib) fica só neste gráfico
+        return output, f'{type(e).__name__}: {e}'
+
+
+def render_charts(jobs: Sequence[Tuple[str, Optional[str], str]], mode: str = 'preview',
+                  workers: int = None, progress: bool = True) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Renderiza muitos gráficos em um pool de processos
+
+    Cada processo cria uma CheckoutFigure ao iniciar e a reutiliza em todos
+    os gráficos que recebe.
+
+    Args:
+        jobs: [(csv do checkout, csv do segundo checkout ou None, arquivo de saída)]
+        mode: 'full', 'preview' ou 'svg'
+        workers: Processos (padrão: CPUs; 1 renderiza no próprio processo)
+
+    Returns:
+        (arquivos gerados, erros [(arquivo, mensagem)])
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    for directory in {os.path.dirname(output) for _, _, output in jobs}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    if workers == 1 or len(jobs) <= 1:
+        if _worker_figure is None:
+            _init_worker()
+        results = [_render_job(job, mode) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            results = list(pool.map(_render_job, jobs, [mode] * len(jobs), chunksize=chunksize))
+
+    paths = [path for path, error in results if error is None]
+    errors = [(path, error) for path, error in results if error is not None]
+    if progress:
+        print(f"✓ {len(paths):,} gráficos ({mode}) em {time.perf_counter() - start:.1f}s")
+    return paths, errors
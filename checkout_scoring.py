@@ -0,0 +1,249 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Sequence, Tuple
+import glob
+import os
+import time
+import warnings
+import numpy as np
+
+from data_loader import read_checkout
+
+# Checkouts são séries horárias: uma coluna da matriz por hora do dia
+HOURS = [f'{hour:02d}h' for hour in range(24)]
+_HOUR_INDEX = {hour: i for i, hour in enumerate(HOURS)}
+
+# Escala do MAD para equivaler ao desvio padrão em dados normais (Iglewicz-Hoaglin)
+MAD_SCALE = 0.6745
+
+
+def checkout_matrix(frames: Dict[str, object]):
+    """
+    Junta as colunas numéricas de vários checkouts em uma matriz (séries x 24 horas)
+
+    Args:
+        frames: {nome do checkout: DataFrame com coluna time ('00h'...'23h')}
+
+    Returns:
+        (lista de séries [(checkout, coluna)], matriz float64 com NaN nas
+         horas ausentes)
+    """
+    series, blocks = [], []
+    for name, df in frames.items():
+        columns = [col for col, dtype in df.dtypes.items() if col != 'time' and dtype.kind in 'biuf']
+        positions = _hour_positions(df['time']) if 'time' in df.columns \
+            else np.arange(len(df), dtype=np.intp)
+
+        block = np.full((len(columns), len(HOURS)), np.nan)
+        if len(positions) == len(HOURS) and (positions == np.arange(len(HOURS))).all():
+            # Caso comum: 24 linhas já na ordem das horas
+            for row, col in enumerate(columns):
+                block[row] = df[col].to_numpy(dtype=np.float64)
+        else:
+            valid = (positions >= 0) & (positions < len(HOURS))
+            for row, col in enumerate(columns):
+                block[row, positions[valid]] = df[col].to_numpy(dtype=np.float64)[valid]
+        series.extend((name, col) for col in columns)
+        blocks.append(block)
+
+    values = np.vstack(blocks) if blocks else np.empty((0, len(HOURS)))
+    return series, values
+
+
+def _hour_positions(time) -> np.ndarray:
+    """Coluna da matriz de cada linha ('00h' -> 0; -1 para rótulo desconhecido)"""
+    if time.dtype == 'category':
+        # Um lookup por categoria em vez de um por linha
+        lookup = np.array([_HOUR_INDEX.get(str(t), -1) for t in time.cat.categories] + [-1],
+                          dtype=np.intp)
+        return lookup[time.cat.codes.to_numpy()]
+    return np.array([_HOUR_INDEX.get(str(t), -1) for t in time], dtype=np.intp)
+
+
+def score_matrix(values: np.ndarray, z_threshold: float = 3.0, iqr_factor: float = 1.5,
+                 mad_threshold: float = 3.5) -> Dict[str, np.ndarray]:
+    """
+    Z-score, IQR e MAD de todas as séries (linhas) de uma vez
+
+    Mesmas definições da análise por coluna: desvio padrão amostral, quartis
+    com interpolação linear e horas sem valor (NaN) ignoradas. Série com
+    desvio (ou MAD) zero não tem anomalias pelo método correspondente.
+
+    Returns:
+        Dict com estatísticas por série (vetores N) e scores e marcações
+        de anomalia por série e hora (matrizes N x 24)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    quantile = np.nanquantile if np.isnan(values).any() else np.quantile
+
+    with warnings.catch_warnings():
+        # Série sem nenhum valor: estatísticas NaN, sem anomalias
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=1)
+        std = np.nanstd(values, axis=1, ddof=1)
+        q1, median, q3 = quantile(values, [0.25, 0.5, 0.75], axis=1)
+        mad = np.nanmedian(np.abs(values - median[:, None]), axis=1)
+        minimum = np.nanmin(values, axis=1)
+        maximum = np.nanmax(values, axis=1)
+
+    iqr = q3 - q1
+    lower = q1 - iqr_factor * iqr
+    upper = q3 + iqr_factor * iqr
+
+    z = np.divide(np.abs(values - mean[:, None]), std[:, None],
+                  out=np.full_like(values, np.nan), where=std[:, None] > 0)
+    robust_z = np.divide(MAD_SCALE * (values - median[:, None]), mad[:, None],
+                         out=np.full_like(values, np.nan), where=mad[:, None] > 0)
+
+    return {
+        'values': values,
+        'mean': mean, 'std': std, 'median': median, 'min': minimum, 'max': maximum,
+        'q1': q1, 'q3': q3, 'mad': mad, 'lower': lower, 'upper': upper,
+        'z': z, 'robust_z': robust_z,
+        'anomaly_z': z > z_threshold,
+        'anomaly_iqr': (values < lower[:, None]) | (values > upper[:, None]),
+        'anomaly_mad': np.abs(robust_z) > mad_threshold
+    }
+
+
+def score_checkouts(frames: Dict[str, object], **thresholds) -> Dict:
+    """Matriz de todos os checkouts e seus scores (ver score_matrix), com séries e horas"""
+    series, values = checkout_matrix(frames)
+    scores = score_matrix(values, **thresholds)
+    scores['series'] = series
+    scores['hours'] = HOURS
+    return scores
+
+
+def score_checkout_files(paths: Sequence[str], **thresholds) -> Dict:
+    """Lê os CSVs de checkout e pontua todos juntos (séries nomeadas pelo arquivo)"""
+    return score_checkouts({path: read_checkout(path) for path in paths}, **thresholds)
+
+
+def summarize_scores(scores: Dict) -> List[Dict]:
+    """Uma linha por série: estatísticas e quantidade de anomalias por método"""
+    counts = {method: scores[f'anomaly_{method}'].sum(axis=1).tolist()
+              for method in ('z', 'iqr', 'mad')}
+    stats = {key: scores[key].tolist()
+             for key in ('mean', 'std', 'median', 'min', 'max', 'lower', 'upper', 'mad')}
+
+    return [{'checkout': checkout, 'column': column,
+             **{key: values[i] for key, values in stats.items()},
+             **{f'anomalies_{method}': values[i] for method, values in counts.items()}}
+            for i, (checkout, column) in enumerate(scores['series'])]
+
+
+# ---- Vários arquivos em paralelo ----
+
+def expand_checkout_paths(patterns: Sequence[str]) -> List[str]:
+    """Arquivos de checkout a partir de pastas (todos os .csv), globs ou caminhos"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.csv')
+        matches = sorted(glob.glob(pattern))
+        # Caminho sem curinga que não existe: mantido (vira erro de leitura)
+        has_wildcard = any(char in pattern for char in '*?[')
+        paths.extend(matches if matches or has_wildcard else [pattern])
+    # Mesmo arquivo citado por dois padrões: uma vez só, na primeira posição
+    return list(dict.fromkeys(paths))
+
+
+def _score_batch(paths: Sequence[str], thresholds: Dict) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """
+    Lê e pontua um lote de arquivos (roda no processo do pool)
+
+    Devolve só o resumo por série, não as matrizes: o que volta ao processo
+    principal é pequeno. Arquivo ilegível vira um erro, sem derrubar o lote.
+    """
+    frames, errors = {}, []
+    for path in paths:
+        try:
+            # Cada arquivo é lido uma vez: gravar o cache colunar só custaria tempo
+            frames[path] = read_checkout(path, cache=False)
+        except (OSError, ValueError, KeyError) as e:
+            errors.append((path, f'{type(e).__name__}: {e}'))
+    rows = summarize_scores(score_checkouts(frames, **thresholds)) if frames else []
+    return rows, errors
+
+
+def analyze_checkout_files(paths: Sequence[str], workers: int = None, batch_size: int = 100,
+                           progress: bool = True, **thresholds):
+    """
+    Pontua muitos arquivos de checkout em um pool de processos
+
+    Os arquivos são divididos em lotes de `batch_size`; cada processo lê e
+    pontua um lote por vez e só há até 2 lotes por processo em andamento,
+    então a memória não cresce com a quantidade de arquivos (além do
+    resumo, algumas linhas por arquivo).
+
+    Args:
+        paths: Arquivos CSV de checkout
+        workers: Processos (padrão: CPUs; 1 roda no próprio processo)
+        batch_size: Arquivos por tarefa enviada ao pool
+        progress: Imprimir o andamento
+        thresholds: Repassados a score_matrix (z_threshold, iqr_factor, ...)
+
+    Returns:
+        (DataFrame com uma linha por arquivo e coluna na ordem de `paths`,
+         lista de erros [(arquivo, mensagem)])
+    """
+    import pandas as pd
+
+    workers = workers or os.cpu_count() or 1
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    results = [None] * len(batches)
+    reporter = _ProgressReporter(len(paths), progress)
+
+    if workers == 1 or len(batches) <= 1:
+        for i, batch in enumerate(batches):
+            results[i] = _score_batch(batch, thresholds)
+            reporter.update(len(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                # Mantém o pool ocupado sem enfileirar todos os lotes de uma vez
+                while next_batch < len(batches) and len(pending) < 2 * workers:
+                    future = pool.submit(_score_batch, batches[next_batch], thresholds)
+                    pending[future] = next_batch
+                    next_batch += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    results[i] = future.result()
+                    reporter.update(len(batches[i]))
+    reporter.finish()
+
+    rows = [row for batch_rows, _ in results for row in batch_rows]
+    errors = [error for _, batch_errors in results for error in batch_errors]
+    columns = ['checkout', 'column', 'mean', 'std', 'median', 'min', 'max', 'lower', 'upper',
+               'mad', 'anomalies_z', 'anomalies_iqr', 'anomalies_mad']
+    return pd.DataFrame(rows, columns=columns), errors
+
+
+class _ProgressReporter:
+    """Andamento (arquivos, taxa e tempo restante), no máximo uma linha por segundo"""
+
+    def __init__(self, total: int, enabled: bool, interval: float = 1.0):
+        self.total = total
+        self.enabled = enabled
+        self.interval = interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, files: int) -> None:
+        self.done += files
+        now = time.perf_counter()
+        if self.enabled and now - self._last >= self.interval and self.done < self.total:
+            self._last = now
+            rate = self.done / (now - self.start)
+            remaining = (self.total - self.done) / rate if rate else float('inf')
+            print(f"  {self.done:,}/{self.total:,} arquivos | {rate:,.0f} arquivos/s | "
+                  f"restam ~{remaining:.0f}s", flush=True)
+
+    def finish(self) -> None:
+        if self.enabled:
+            elapsed = time.perf_counter() - self.start
+            print(f"✓ {self.done:,} arquivos pontuados em {elapsed:.1f}s", flush=True)
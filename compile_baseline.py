@@ -0,0 +1,43 @@
+import argparse
+import sys
+import os
+import time
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from anomaly_detector import AnomalyDetector
+
+def compile_baseline(transactions_path, auth_codes_path, output_path, chunksize=None):
+    """
+    Calcula baseline e thresholds a partir dos CSVs e grava o snapshot
+    
+    chunksize: ler os CSVs em blocos (históricos maiores que a memória)
+    """
+    start = time.perf_counter()
+    detector = AnomalyDetector(transactions_path, auth_codes_path, chunksize=chunksize)
+    snapshot = detector.save_snapshot(output_path, [transactions_path, auth_codes_path])
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n✓ Snapshot salvo: {output_path}")
+    print(f"  Status no baseline: {len(snapshot['baseline'])}")
+    print(f"  Tempo de compilação: {elapsed:.2f}s")
+    return snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Compila o baseline do detector em um snapshot para a API')
+    parser.add_argument('--transactions', default='data/transactions.csv',
+                        help='CSV de transações (timestamp, status, count)')
+    parser.add_argument('--auth-codes', default='data/transactions_auth_codes.csv',
+                        help='CSV de auth codes (timestamp, auth_code, count)')
+    parser.add_argument('--output', default='data/baseline_snapshot.json',
+                        help='Arquivo de saída do snapshot')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Ler os CSVs em blocos de N linhas (memória limitada)')
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("COMPILAÇÃO DO BASELINE")
+    print("="*60)
+    compile_baseline(args.transactions, args.auth_codes, args.output, args.chunksize)
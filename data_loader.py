@@ -0,0 +1,258 @@
+from typing import Callable, Dict, Optional
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+from sliding_window import normalize_auth_code
+
+# Tipos compactos por arquivo: texto repetido como category (um código por
+# linha), contagens como Int32 (inteiro de 32 bits que aceita valor ausente).
+# auth_code é lido como texto, preservando o zero à esquerda de "00".
+TRANSACTION_DTYPES = {'status': 'category', 'count': 'Int32'}
+AUTH_CODE_DTYPES = {'auth_code': 'category', 'count': 'Int32'}
+# Checkouts: contagens por hora em int32; médias continuam float64
+CHECKOUT_DTYPES = {'time': 'category', 'today': 'int32', 'yesterday': 'int32',
+                   'same_day_last_week': 'int32'}
+
+# Cache colunar dos CSVs: um .npy por coluna, lido com memmap. Padrão: pasta
+# .cache ao lado de cada CSV; MONITORING_HISTORY_CACHE muda a pasta e vazio
+# desativa o cache
+CACHE_DIR = os.environ.get('MONITORING_HISTORY_CACHE')
+CACHE_VERSION = 1
+
+
+def read_transactions(path: str, chunksize: int = None, normalize: bool = True,
+                      skip_rows: int = 0):
+    """
+    Lê o CSV de transações (timestamp, status, count)
+
+    Args:
+        path: Arquivo CSV
+        chunksize: Linhas por bloco; se informado, retorna um iterador de
+                   DataFrames em vez de carregar o arquivo inteiro
+        normalize: Status em maiúsculas e timestamp como datetime (False
+                   mantém os valores como estão no arquivo)
+        skip_rows: Pular as primeiras linhas de dados (ler só o que foi
+                   acrescentado ao arquivo; não usa o cache)
+    """
+    return _read_csv(path, TRANSACTION_DTYPES, _normalize_transactions if normalize else None,
+                     chunksize, parse_timestamp=normalize, skip_rows=skip_rows)
+
+
+def read_auth_codes(path: str, chunksize: int = None, normalize: bool = True,
+                    skip_rows: int = 0):
+    """Lê o CSV de auth codes (timestamp, auth_code, count); ver read_transactions"""
+    return _read_csv(path, AUTH_CODE_DTYPES, _normalize_auth_codes if normalize else None,
+                     chunksize, parse_timestamp=normalize, skip_rows=skip_rows)
+
+
+def read_checkout(path: str, cache: bool = True):
+    """
+    Lê um CSV de checkout (time, today, yesterday, ...)
+
+    cache=False não lê nem grava o cache colunar (arquivos lidos uma única
+    vez, como no processamento em lote de muitos checkouts)
+    """
+    return _read_csv(path, CHECKOUT_DTYPES, None, None, parse_timestamp=False, cache=cache)
+
+
+def count_values(df) -> np.ndarray:
+    """Coluna count como float64 (NaN onde ausente), pronta para agregação"""
+    return df['count'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _read_csv(path: str, dtypes: Dict, normalize: Callable, chunksize: int,
+              parse_timestamp: bool, skip_rows: int = 0, cache: bool = True):
+    """
+    read_csv com tipos explícitos e timestamp convertido na própria leitura
+
+    Com cache válido, o DataFrame vem dos .npy (sem parsing); sem cache, a
+    leitura inteira grava o cache para as próximas. A leitura em blocos só
+    usa cache já existente (criá-lo exigiria o arquivo inteiro em memória).
+    """
+    import pandas as pd
+
+    variant = 'normalized' if normalize else 'raw'
+    entry = _cache_entry(path, variant) if cache and not skip_rows else None
+    if entry is not None:
+        cached = _load_cached(path, entry, dtypes)
+        if cached is not None:
+            if chunksize is None:
+                return cached
+            return (cached.iloc[start:start + chunksize]
+                    for start in range(0, len(cached), chunksize))
+
+    options = {'dtype': dtypes}
+    if skip_rows:
+        options['skiprows'] = range(1, skip_rows + 1)
+    if parse_timestamp and 'timestamp' in pd.read_csv(path, nrows=0).columns:
+        options['parse_dates'] = ['timestamp']
+
+    if chunksize is None:
+        df = pd.read_csv(path, **options)
+        if normalize:
+            df = normalize(df)
+        if entry is not None:
+            _store_cached(path, entry, dtypes, df)
+        return df
+
+    chunks = pd.read_csv(path, chunksize=chunksize, **options)
+    return (normalize(chunk) for chunk in chunks) if normalize else iter(chunks)
+
+
+def _map_categories(series, func: Callable):
+    """Aplica `func` às categorias (uma vez por valor distinto, não por linha)"""
+    if series.dtype != 'category':
+        series = series.astype('category')
+    mapped = series.cat.categories.map(func)
+    if mapped.is_unique:
+        return series.cat.rename_categories(mapped)
+    # Valores distintos que viram o mesmo (ex.: 'approved' e 'APPROVED')
+    return series.astype(object).map(func).astype('category')
+
+
+def _normalize_transactions(df):
+    if 'status' in df.columns:
+        df['status'] = _map_categories(df['status'], str.upper)
+    return df
+
+
+def _normalize_auth_codes(df):
+    if 'auth_code' in df.columns:
+        df['auth_code'] = _map_categories(df['auth_code'], normalize_auth_code)
+    return df
+
+
+
+# ---- Cache colunar ----
+
+def _cache_entry(path: str, variant: str) -> Optional[str]:
+    """Pasta do cache de um CSV (None se o cache está desativado)"""
+    if CACHE_DIR == '':
+        return None
+    directory = CACHE_DIR or os.path.join(os.path.dirname(path) or '.', '.cache')
+    return os.path.join(directory, f'{os.path.basename(path)}.{variant}')
+
+
+def file_hash(path: str, size: int = None) -> str:
+    """SHA-256 do arquivo, ou só dos primeiros `size` bytes (lido em blocos de 1 MB)"""
+    digest = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _load_cached(path: str, entry: str, dtypes: Dict):
+    """
+    DataFrame do cache, ou None se ausente ou desatualizado
+
+    Tamanho e mtime iguais validam o cache sem ler o CSV; mtime diferente
+    (cópia, checkout) só invalida se o conteúdo (SHA-256) também mudou.
+    """
+    import pandas as pd
+
+    manifest_path = os.path.join(entry, 'manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    source = manifest.get('source', {})
+    if manifest.get('version') != CACHE_VERSION or manifest.get('dtypes') != dtypes \
+            or source.get('size') != stat.st_size:
+        return None
+    if source.get('mtime_ns') != stat.st_mtime_ns:
+        if file_hash(path) != source.get('sha256'):
+            return None
+        source['mtime_ns'] = stat.st_mtime_ns
+        try:
+            _write_manifest(entry, manifest)
+        except OSError:
+            pass
+
+    try:
+        columns = {column['name']: _load_column(entry, i, column)
+                   for i, column in enumerate(manifest['columns'])}
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(columns, copy=False)
+
+
+def _load_column(entry: str, index: int, column: Dict):
+    """Coluna a partir do .npy (memmap copy-on-write: escrita nunca vai ao arquivo)"""
+    import pandas as pd
+
+    # view(np.ndarray): mesmos bytes mapeados, apresentados como array comum
+    values = np.load(os.path.join(entry, f'{index}.npy'), mmap_mode='c').view(np.ndarray)
+    kind = column['kind']
+    if kind == 'category':
+        return pd.Categorical.from_codes(values, column['categories'])
+    if kind == 'text':
+        return pd.Categorical.from_codes(values, column['categories']).astype(column['dtype'])
+    if kind == 'masked':
+        mask = np.load(os.path.join(entry, f'{index}.mask.npy'), mmap_mode='c').view(np.ndarray)
+        return pd.arrays.IntegerArray(values, mask)
+    return values
+
+
+def _store_cached(path: str, entry: str, dtypes: Dict, df) -> None:
+    """Grava o cache em uma pasta temporária e a renomeia (leitores nunca veem cache parcial)"""
+    import pandas as pd
+
+    tmp_entry = f'{entry}.tmp-{os.getpid()}'
+    try:
+        stat = os.stat(path)
+        source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                  'sha256': file_hash(path)}
+        os.makedirs(tmp_entry, exist_ok=True)
+
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            column = {'name': name}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                column.update(kind='category', categories=series.cat.categories.tolist())
+                values = series.cat.codes.to_numpy()
+            elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and \
+                    pd.api.types.is_integer_dtype(series.dtype):
+                column.update(kind='masked', dtype=str(series.dtype))
+                values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+                np.save(os.path.join(tmp_entry, f'{i}.mask.npy'), series.isna().to_numpy())
+            elif series.dtype.kind in 'biufmM':
+                column.update(kind='array')
+                values = series.to_numpy()
+            else:
+                # Texto livre: códigos + valores distintos, volta ao tipo original
+                codes, uniques = pd.factorize(series)
+                column.update(kind='text', dtype=str(series.dtype), categories=uniques.tolist())
+                values = codes
+            np.save(os.path.join(tmp_entry, f'{i}.npy'), values)
+            columns.append(column)
+
+        _write_manifest(tmp_entry, {'version': CACHE_VERSION, 'source': source,
+                                    'dtypes': dtypes, 'columns': columns})
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+        os.replace(tmp_entry, entry)
+    except OSError as e:
+        # Sem cache (pasta sem permissão, outro processo gravando): só mais lento
+        print(f"⚠️  Cache colunar não gravado para {path}: {e}")
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def _write_manifest(entry: str, manifest: Dict) -> None:
+    tmp_path = os.path.join(entry, 'manifest.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(entry, 'manifest.json'))
@@ -0,0 +1,201 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+class EventLog:
+    """
+    Log persistente (append-only) de transações e alertas
+
+    Usa SQLite em modo WAL. As escritas entram em uma fila e uma thread
+    dedicada grava tudo o que estiver pendente em uma única transação
+    (group commit), então as requisições nunca esperam pelo disco. Com
+    synchronous=NORMAL o WAL só faz fsync no checkpoint: um crash do
+    processo não perde dados já gravados pela thread.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY,
+        event_time REAL NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_transactions_event_time ON transactions(event_time);
+    CREATE TABLE IF NOT EXISTS alerts (
+        id INTEGER PRIMARY KEY,
+        alert_id INTEGER NOT NULL,
+        severity TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS resets (
+        id INTEGER PRIMARY KEY,
+        created_at REAL NOT NULL,
+        last_transaction_id INTEGER NOT NULL,
+        last_alert_id INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, path: str, max_batch: int = 5000):
+        """
+        Args:
+            path: Arquivo SQLite do log
+            max_batch: Quantidade máxima de eventos por commit
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Criar o schema antes de aceitar escritas
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._run_writer, name='event-log-writer',
+                                        daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # ---- Escrita (fora do caminho da requisição) ----
+
+    def append_transactions(self, transactions: List[Dict]) -> None:
+        """Enfileira transações para gravação"""
+        rows = [(self._event_time(t), json.dumps(t, default=str)) for t in transactions]
+        self._queue.put(('transactions', rows))
+
+    def append_alert(self, alert: Dict) -> None:
+        """Enfileira um alerta para gravação"""
+        created_at = datetime.fromisoformat(alert['timestamp']).timestamp()
+        row = (alert['id'], alert['severity'], created_at, json.dumps(alert, default=str))
+        self._queue.put(('alerts', [row]))
+
+    def mark_reset(self) -> None:
+        """Registra um reset: o replay passa a começar depois deste ponto"""
+        self._queue.put(('reset', None))
+
+    @staticmethod
+    def _event_time(transaction: Dict) -> float:
+        timestamp = transaction.get('timestamp')
+        try:
+            if isinstance(timestamp, (int, float)):
+                return float(timestamp)
+            return datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            return datetime.now().timestamp()
+
+    def _run_writer(self) -> None:
+        """Grava os eventos pendentes em lote, um commit por lote"""
+        conn = self._connect()
+        while True:
+            # Eventos que chegam durante um commit entram todos no próximo
+            events = [self._queue.get()]
+            while len(events) < self.max_batch:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            try:
+                with conn:
+                    for kind, rows in events:
+                        if kind is None:
+                            stop = True
+                        elif kind == 'transactions':
+                            conn.executemany(
+                                'INSERT INTO transactions (event_time, payload) VALUES (?, ?)',
+                                rows)
+                        elif kind == 'alerts':
+                            conn.executemany(
+                                'INSERT INTO alerts (alert_id, severity, created_at, payload) '
+                                'VALUES (?, ?, ?, ?)', rows)
+                        elif kind == 'reset':
+                            conn.execute(
+                                'INSERT INTO resets (created_at, last_transaction_id, last_alert_id) '
+                                'SELECT ?, COALESCE((SELECT MAX(id) FROM transactions), 0), '
+                                'COALESCE((SELECT MAX(id) FROM alerts), 0)',
+                                (datetime.now().timestamp(),))
+            except sqlite3.Error as e:
+                print(f"ERRO ao gravar log de eventos: {e}")
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+            if stop:
+                break
+        conn.close()
+
+    def flush(self) -> None:
+        """Bloqueia até todos os eventos enfileirados serem gravados"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e encerra a thread de escrita"""
+        if self._writer.is_alive():
+            self._queue.put((None, None))
+            self._writer.join()
+
+    # ---- Leitura (replay na inicialização) ----
+
+    def load_tail(self, max_transactions: int, event_horizon: float,
+                  max_alerts: int) -> Tuple[List[Dict], List[Dict], Dict]:
+        """
+        Lê o final do log desde o último reset
+
+        Args:
+            max_transactions: Últimas N transações (janelas por contagem)
+            event_horizon: Também traz transações com timestamp até
+                           `event_horizon` segundos antes do mais recente
+                           (minutos que ainda estariam abertos)
+            max_alerts: Últimos N alertas
+
+        Returns:
+            (transações, alertas, {"total": ..., "severity_counts": {...}})
+        """
+        conn = self._connect()
+        try:
+            reset = conn.execute(
+                'SELECT last_transaction_id, last_alert_id FROM resets '
+                'ORDER BY id DESC LIMIT 1').fetchone() or (0, 0)
+            last_id, latest = conn.execute(
+                'SELECT MAX(id), MAX(event_time) FROM transactions').fetchone()
+
+            transactions = []
+            if last_id is not None:
+                rows = conn.execute(
+                    'SELECT id, payload FROM transactions WHERE id > ? '
+                    'UNION '
+                    'SELECT id, payload FROM transactions WHERE event_time >= ? AND id > ? '
+                    'ORDER BY id',
+                    (max(reset[0], last_id - max_transactions),
+                     latest - event_horizon, reset[0]))
+                transactions = [json.loads(payload) for _, payload in rows]
+
+            rows = conn.execute(
+                'SELECT payload FROM (SELECT id, payload FROM alerts WHERE id > ? '
+                'ORDER BY id DESC LIMIT ?) ORDER BY id', (reset[1], max_alerts))
+            alerts = [json.loads(payload) for payload, in rows]
+
+            counts = dict(conn.execute(
+                'SELECT severity, COUNT(*) FROM alerts WHERE id > ? GROUP BY severity',
+                (reset[1],)).fetchall())
+            total = conn.execute(
+                'SELECT COALESCE(MAX(alert_id), 0) FROM alerts WHERE id > ?',
+                (reset[1],)).fetchone()[0]
+        finally:
+            conn.close()
+
+        return transactions, alerts, {'total': total, 'severity_counts': counts}
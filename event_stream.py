@@ -0,0 +1,182 @@
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import json
+import queue
+import threading
+
+
+class EventJournal:
+    """
+    Sequência recente de eventos já serializados (alertas, métricas)
+
+    Cada evento é convertido em JSON uma única vez, ao ser registrado, e
+    recebe um número de sequência. Consumidores pedem os eventos após a
+    última sequência que viram e podem esperar por novos (long polling).
+    """
+
+    def __init__(self, max_events: int = 1000):
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    def append(self, event: str, data: Dict) -> int:
+        """Registra um evento e acorda quem estiver esperando"""
+        payload = json.dumps(data, default=str)
+        with self._condition:
+            self._seq += 1
+            self._events.append((self._seq, event, payload))
+            self._condition.notify_all()
+            return self._seq
+
+    def since(self, seq: int, timeout: float = 15.0) -> Tuple[List[Tuple[int, str, str]], bool]:
+        """
+        Eventos com sequência maior que `seq`, esperando até `timeout` se não houver
+
+        Returns:
+            (eventos [(seq, nome, json)], se houve eventos descartados depois
+             de `seq` que o consumidor não chegou a ver)
+        """
+        with self._condition:
+            if self._seq <= seq:
+                self._condition.wait(timeout)
+            if not self._events or self._seq <= seq:
+                return [], False
+            first = self._events[0][0]
+            missed = seq < first - 1
+            return [e for e in self._events if e[0] > seq], missed
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+
+def sse_frame(seq: int, event: str, payload: str) -> str:
+    """Formata um evento no protocolo Server-Sent Events"""
+    return f"id: {seq}\nevent: {event}\ndata: {payload}\n\n"
+
+
+class StreamHub:
+    """
+    Distribui os eventos do estado para os clientes SSE deste processo
+
+    Uma única thread busca os eventos novos (um pedido ao estado por vez,
+    mesmo com o estado em outro processo), monta cada frame SSE uma vez e
+    coloca o mesmo texto na fila de cada assinante. Assinante lento demais
+    (fila cheia) é desconectado; ao reconectar recebe um snapshot completo.
+
+    Cada conexão aberta ocupa uma thread do servidor enquanto durar: com
+    `max_subscribers`, conexões além do limite são recusadas em vez de
+    tomar as threads da ingestão.
+    """
+
+    def __init__(self, fetch_events: Callable, fetch_snapshot: Callable[[], Dict],
+                 fetch_last_seq: Callable[[], int], max_pending: int = 1000,
+                 max_subscribers: int = 0):
+        """
+        Args:
+            fetch_events: Função (seq, timeout) -> (eventos, perdidos), como EventJournal.since
+            fetch_snapshot: Função que retorna os dados completos do dashboard
+            fetch_last_seq: Função que retorna a última sequência do journal
+                            (o stream começa dali: o histórico já está no snapshot)
+            max_pending: Frames pendentes por assinante antes de desconectá-lo
+            max_subscribers: Assinantes simultâneos (0 = sem limite)
+        """
+        self.fetch_events = fetch_events
+        self.fetch_snapshot = fetch_snapshot
+        self.fetch_last_seq = fetch_last_seq
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_seq = 0
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """
+        Registra um assinante; a fila recebe frames SSE (None = desconectar)
+
+        Returns:
+            Fila do assinante, ou None se já há `max_subscribers` assinantes
+        """
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                return None
+            if self._thread is None:
+                # Eventos anteriores ao primeiro assinante já estão no snapshot
+                self._last_seq = self.fetch_last_seq()
+                self._thread = threading.Thread(target=self._pump, name='stream-hub',
+                                                daemon=True)
+                self._thread.start()
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def _broadcast(self, frame: str) -> None:
+        """Entrega o mesmo frame a todos os assinantes"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(frame)
+            except queue.Full:
+                self.unsubscribe(subscriber)
+                # Abre espaço para o aviso de desconexão
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(None)
+
+    def _pump(self) -> None:
+        """Busca eventos novos do estado e distribui aos assinantes"""
+        while True:
+            try:
+                events, missed = self.fetch_events(self._last_seq, 15.0)
+            except Exception as e:
+                print(f"ERRO ao buscar eventos do estado: {e}")
+                threading.Event().wait(1.0)
+                continue
+
+            if missed:
+                # Eventos perdidos: reenviar o estado completo
+                snapshot = json.dumps(self.fetch_snapshot(), default=str)
+                self._broadcast(sse_frame(events[0][0] - 1, 'snapshot', snapshot))
+            for seq, event, payload in events:
+                self._broadcast(sse_frame(seq, event, payload))
+                self._last_seq = seq
+
+    def stream(self, subscriber: queue.Queue = None, heartbeat: float = 15.0) -> Iterator[str]:
+        """
+        Gerador de frames SSE para uma conexão: snapshot inicial e depois
+        os eventos distribuídos, com comentários de keep-alive
+
+        Args:
+            subscriber: Fila já registrada com subscribe (a vaga é reservada
+                        antes de responder); None registra uma agora
+        """
+        subscriber = subscriber or self.subscribe()
+        if subscriber is None:
+            return
+        try:
+            # Sequência lida antes do snapshot: tudo até ela já está nele
+            seq = self._last_seq
+            snapshot = json.dumps(self.fetch_snapshot(), default=str)
+            yield sse_frame(seq, 'snapshot', snapshot)
+            while True:
+                try:
+                    frame = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
@@ -1,20 +1,19 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 import os
 import warnings
 warnings.filterwarnings('ignore')
 
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from checkout_charts import CHART_MODES, chart_outputs, render_charts, render_checkout_chart
+from checkout_scoring import (analyze_checkout_files, expand_checkout_paths, score_checkouts,
+                              summarize_scores)
+from data_loader import read_checkout
 
 class CheckoutAnalyzer:
     def __init__(self, csv1_path, csv2_path):
         """Inicializa o analisador com os arquivos CSV"""
         print("Carregando dados de checkout...")
-        self.df1 = pd.read_csv(csv1_path)
-        self.df2 = pd.read_csv(csv2_path)
+        self.df1 = read_checkout(csv1_path)
+        self.df2 = read_checkout(csv2_path)
         print(f"✓ Checkout 1: {len(self.df1)} registros")
         print(f"✓ Checkout 2: {len(self.df2)} registros")
         
@@ -38,67 +37,118 @@ class CheckoutAnalyzer:
         print("\nPrimeiras linhas:")
         print(self.df2.head(10))
         
-    def detect_anomalies_zscore(self, data, column, threshold=3):
-        """Detecta anomalias usando Z-score"""
-        mean = data[column].mean()
-        std = data[column].std()
+    def analyze_checkout(self, df, name, verbose=False):
+        """
+        Análise específica de um checkout
         
-        if std == 0:
-            return pd.DataFrame()
-        
-        z_scores = np.abs((data[column] - mean) / std)
-        anomalies = data[z_scores > threshold].copy()
-        anomalies['z_score'] = z_scores[z_scores > threshold]
-        return anomalies
-    
-    def detect_anomalies_iqr(self, data, column):
-        """Detecta anomalias usando IQR"""
-        Q1 = data[column].quantile(0.25)
-        Q3 = data[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        anomalies = data[(data[column] < lower_bound) | (data[column] > upper_bound)]
-        return anomalies, lower_bound, upper_bound
-    
-    def analyze_checkout(self, df, name):
-        """Análise específica de um checkout"""
-        print("\n" + "="*60)
-        print(f"ANÁLISE DE ANOMALIAS - {name}")
-        print("="*60)
-        
-        numeric_cols = [col for col in df.columns if col != 'time']
+        Todas as colunas são pontuadas juntas pelo motor vetorizado
+        (checkout_scoring): Z-score, IQR e MAD em uma passada. Com verbose,
+        exibe as estatísticas e as horas marcadas de cada coluna.
+        """
+        scores = score_checkouts({name: df})
         results = {}
         
-        for col in numeric_cols:
+        if verbose:
+            print("\n" + "="*60)
+            print(f"ANÁLISE DE ANOMALIAS - {name}")
+            print("="*60)
+        
+        for i, summary in enumerate(summarize_scores(scores)):
+            col = summary['column']
+            results[col] = {key: summary[key] for key in
+                            ('mean', 'std', 'median', 'anomalies_z', 'anomalies_iqr', 'anomalies_mad')}
+            if not verbose:
+                continue
+            
             print(f"\n--- Análise da coluna: {col} ---")
-            print(f"Média: {df[col].mean():.2f}")
-            print(f"Mediana: {df[col].median():.2f}")
-            print(f"Desvio Padrão: {df[col].std():.2f}")
-            print(f"Min: {df[col].min():.2f} | Max: {df[col].max():.2f}")
+            print(f"Média: {summary['mean']:.2f}")
+            print(f"Mediana: {summary['median']:.2f}")
+            print(f"Desvio Padrão: {summary['std']:.2f}")
+            print(f"Min: {summary['min']:.2f} | Max: {summary['max']:.2f}")
             
             # Z-score
-            anomalies_z = self.detect_anomalies_zscore(df, col)
-            print(f"\nAnomalias Z-score (>3): {len(anomalies_z)}")
-            if len(anomalies_z) > 0:
+            print(f"\nAnomalias Z-score (>3): {summary['anomalies_z']}")
+            if summary['anomalies_z'] > 0:
+                anomalies_z = self._flagged_rows(df, scores, i, 'anomaly_z')
+                anomalies_z['z_score'] = anomalies_z['time'].map(
+                    dict(zip(scores['hours'], scores['z'][i])))
                 print(anomalies_z[['time', col, 'z_score']].to_string())
             
             # IQR
-            anomalies_iqr, lower, upper = self.detect_anomalies_iqr(df, col)
-            print(f"\nAnomalias IQR: {len(anomalies_iqr)}")
-            print(f"Limites: [{lower:.2f}, {upper:.2f}]")
-            if len(anomalies_iqr) > 0:
-                print(anomalies_iqr[['time', col]].to_string())
+            print(f"\nAnomalias IQR: {summary['anomalies_iqr']}")
+            print(f"Limites: [{summary['lower']:.2f}, {summary['upper']:.2f}]")
+            if summary['anomalies_iqr'] > 0:
+                print(self._flagged_rows(df, scores, i, 'anomaly_iqr')[['time', col]].to_string())
             
-            results[col] = {
-                'mean': df[col].mean(),
-                'std': df[col].std(),
-                'anomalies_z': len(anomalies_z),
-                'anomalies_iqr': len(anomalies_iqr)
-            }
+            # MAD (robusto a picos que inflam média e desvio)
+            print(f"\nAnomalias MAD (>3.5): {summary['anomalies_mad']}")
+            if summary['anomalies_mad'] > 0:
+                print(self._flagged_rows(df, scores, i, 'anomaly_mad')[['time', col]].to_string())
         
         return results
     
+    @staticmethod
+    def _flagged_rows(df, scores, series, method):
+        """Linhas do checkout nas horas marcadas como anomalia"""
+        flagged = [hour for hour, flag in zip(scores['hours'], scores[method][series]) if flag]
+        return df[df['time'].astype(str).isin(flagged)].copy()
+    
+    @staticmethod
+    def analyze_files(patterns, workers=None, batch_size=100, output=None, charts=None,
+                      charts_dir='images/checkouts'):
+        """
+        Modo pasta/glob: pontua N checkouts em paralelo (pool de processos)
+        
+        Args:
+            patterns: Pastas, globs ou arquivos CSV de checkout
+            workers: Processos do pool (padrão: CPUs)
+            batch_size: Arquivos por tarefa do pool
+            output: CSV para gravar o resumo (uma linha por arquivo e coluna)
+            charts: Modo dos gráficos por arquivo ('full', 'preview', 'svg') ou
+                    None para não gerar gráficos
+            charts_dir: Pasta dos gráficos (um por arquivo, com o nome do CSV;
+                        subpastas repetem as pastas de entrada)
+        
+        Returns:
+            (DataFrame resumo, lista de erros [(arquivo, mensagem)])
+        """
+        paths = expand_checkout_paths(patterns)
+        print("\n" + "="*60)
+        print(f"ANÁLISE DE ANOMALIAS - {len(paths):,} CHECKOUTS")
+        print("="*60)
+        
+        summary, errors = analyze_checkout_files(paths, workers=workers, batch_size=batch_size)
+        
+        if errors:
+            print(f"\n⚠️  {len(errors)} arquivo(s) não lido(s):")
+            for path, message in errors[:10]:
+                print(f"   - {path}: {message}")
+        
+        per_file = summary.groupby('checkout', sort=False)[
+            ['anomalies_z', 'anomalies_iqr', 'anomalies_mad']].sum()
+        flagged = per_file[per_file.sum(axis=1) > 0]
+        print(f"\nSéries analisadas: {len(summary):,}")
+        print(f"Checkouts com anomalias: {len(flagged):,} de {len(per_file):,}")
+        if len(flagged) > 0:
+            print("\nTop 10 checkouts com mais anomalias:")
+            top = flagged.assign(total=flagged.sum(axis=1)).nlargest(10, 'total')
+            print(top.to_string())
+        
+        if output:
+            summary.to_csv(output, index=False)
+            print(f"\n✓ Resumo salvo: {output}")
+        
+        if charts:
+            failed = {path for path, _ in errors}
+            rendered = [path for path in paths if path not in failed]
+            jobs = [(path, None, output)
+                    for path, output in zip(rendered, chart_outputs(rendered, charts_dir))]
+            print(f"\nGerando {len(jobs):,} gráficos em {charts_dir}/ ...")
+            _, chart_errors = render_charts(jobs, charts, workers)
+            for path, message in chart_errors[:10]:
+                print(f"   ⚠️  {path}: {message}")
+        return summary, errors
+    
     def compare_today_vs_historical(self, df):
         """Compara vendas de hoje com histórico"""
         print("\n" + "="*60)
@@ -118,96 +168,73 @@ class CheckoutAnalyzer:
         
         return df
     
-    def create_visualizations(self, df1, df2):
-        """Cria visualizações"""
+    def create_visualizations(self, df1, df2, mode='full'):
+        """
+        Cria visualizações (matplotlib só é importado aqui)
+        
+        mode: 'full' (PNG 300 DPI), 'preview' (PNG 72 DPI, rápido) ou 'svg'
+        """
         print("\n" + "="*60)
         print("GERANDO VISUALIZAÇÕES")
         print("="*60)
         
         os.makedirs('images', exist_ok=True)
+        path = render_checkout_chart(df1, df2, 'images/checkout_analysis.png', mode)
+        print(f"✓ Gráfico salvo: {path}")
         
-        df1['hour'] = df1['time'].str.replace('h', '').astype(int)
-        df2['hour'] = df2['time'].str.replace('h', '').astype(int)
-        
-        fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-        fig.suptitle('Análise de Checkouts', fontsize=16, fontweight='bold')
-        
-        # Gráfico 1: Checkout 1
-        ax1 = axes[0, 0]
-        ax1.plot(df1['hour'], df1['today'], label='Hoje', marker='o', linewidth=2)
-        if 'yesterday' in df1.columns:
-            ax1.plot(df1['hour'], df1['yesterday'], label='Ontem', marker='s', linewidth=2, alpha=0.7)
-        if 'avg_last_week' in df1.columns:
-            ax1.plot(df1['hour'], df1['avg_last_week'], label='Média Semana', marker='^', linewidth=2, alpha=0.7)
-        ax1.set_title('Checkout 1: Comparação Temporal')
-        ax1.set_xlabel('Hora')
-        ax1.set_ylabel('Transações')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # Gráfico 2: Checkout 2
-        ax2 = axes[0, 1]
-        ax2.plot(df2['hour'], df2['today'], label='Hoje', marker='o', linewidth=2, color='green')
-        if 'yesterday' in df2.columns:
-            ax2.plot(df2['hour'], df2['yesterday'], label='Ontem', marker='s', linewidth=2, alpha=0.7)
-        ax2.set_title('Checkout 2: Comparação Temporal')
-        ax2.set_xlabel('Hora')
-        ax2.set_ylabel('Transações')
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        
-        # Gráfico 3: Boxplot
-        ax3 = axes[1, 0]
-        data_plot = [df1[col] for col in ['today', 'yesterday', 'avg_last_week'] if col in df1.columns]
-        labels_plot = [col.replace('_', ' ').title() for col in ['today', 'yesterday', 'avg_last_week'] if col in df1.columns]
-        bp = ax3.boxplot(data_plot, labels=labels_plot, patch_artist=True)
-        for patch in bp['boxes']:
-            patch.set_facecolor('lightblue')
-        ax3.set_title('Checkout 1: Distribuição')
-        ax3.set_ylabel('Transações')
-        ax3.grid(True, alpha=0.3, axis='y')
-        
-        # Gráfico 4: Variação %
-        ax4 = axes[1, 1]
-        if 'yesterday' in df1.columns:
-            var_pct = ((df1['today'] - df1['yesterday']) / df1['yesterday'].replace(0, 1) * 100)
-            colors = ['red' if x < -20 else 'orange' if x < 0 else 'lightgreen' if x < 20 else 'green' for x in var_pct]
-            ax4.bar(df1['hour'], var_pct, color=colors, alpha=0.7)
-            ax4.axhline(y=0, color='black', linestyle='-', linewidth=0.8)
-            ax4.set_title('Variação % (Hoje vs Ontem)')
-            ax4.set_xlabel('Hora')
-            ax4.set_ylabel('Variação %')
-            ax4.grid(True, alpha=0.3, axis='y')
-        
-        plt.tight_layout()
-        plt.savefig('images/checkout_analysis.png', dpi=300, bbox_inches='tight')
-        print("✓ Gráfico salvo: images/checkout_analysis.png")
-        plt.close()
-        
-    def generate_report(self):
-        """Gera relatório completo"""
+    def generate_report(self, charts='full', verbose=False):
+        """
+        Gera relatório completo
+        
+        charts: modo dos gráficos (ver create_visualizations) ou None para
+                pular a etapa de gráficos
+        verbose: exibir o detalhamento das anomalias de cada coluna
+        """
         print("\n" + "="*60)
         print("GERANDO RELATÓRIO COMPLETO")
         print("="*60)
         
         self.explore_data()
-        results1 = self.analyze_checkout(self.df1, "CHECKOUT 1")
-        results2 = self.analyze_checkout(self.df2, "CHECKOUT 2")
+        results1 = self.analyze_checkout(self.df1, "CHECKOUT 1", verbose)
+        results2 = self.analyze_checkout(self.df2, "CHECKOUT 2", verbose)
         df1_analyzed = self.compare_today_vs_historical(self.df1)
         df2_analyzed = self.compare_today_vs_historical(self.df2)
-        self.create_visualizations(df1_analyzed, df2_analyzed)
+        if charts:
+            self.create_visualizations(df1_analyzed, df2_analyzed, charts)
         
         print("\n✓ Análise completa finalizada!")
         return df1_analyzed, df2_analyzed, results1, results2
 
 if __name__ == "__main__":
-    analyzer = CheckoutAnalyzer('data/checkout_1.csv', 'data/checkout_2.csv')
-    analyzer.generate_report()
+    parser = argparse.ArgumentParser(description='Análise exploratória dos checkouts')
+    parser.add_argument('--files', nargs='+', default=None,
+                        help='Pastas, globs ou CSVs de checkout para pontuar em paralelo '
+                             '(sem esta opção: relatório de checkout_1 e checkout_2)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processos do pool (padrão: CPUs)')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Arquivos por tarefa do pool')
+    parser.add_argument('--output', default=None,
+                        help='CSV para gravar o resumo do modo --files')
+    parser.add_argument('--charts', choices=list(CHART_MODES) + ['none'], default=None,
+                        help='Gráficos: full (PNG 300 DPI), preview (PNG 72 DPI), svg ou none '
+                             '(padrão: full no relatório, none com --files)')
+    parser.add_argument('--charts-dir', default='images/checkouts',
+                        help='Pasta dos gráficos do modo --files')
+    args = parser.parse_args()
+    charts = None if args.charts == 'none' else args.charts
     
-    print("\n" + "="*60)
-    print("CONCLUSÕES")
-    print("="*60)
-    print("""
+    if args.files:
+        CheckoutAnalyzer.analyze_files(args.files, args.workers, args.batch_size, args.output,
+                                       charts, args.charts_dir)
+    else:
+        analyzer = CheckoutAnalyzer('data/checkout_1.csv', 'data/checkout_2.csv')
+        analyzer.generate_report(charts=charts if args.charts else 'full', verbose=True)
+        
+        print("\n" + "="*60)
+        print("CONCLUSÕES")
+        print("="*60)
+        print("""
     1. PADRÕES: Análise hora a hora comparando hoje vs histórico
     2. ANOMALIAS: Detectadas via Z-score e IQR
     3. RECOMENDAÇÕES: Monitorar variações > ±20%
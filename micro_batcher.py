@@ -0,0 +1,102 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+import queue
+import threading
+import time
+
+
+class MicroBatcher:
+    """
+    Agrupa registros enviados por várias requisições em micro-lotes
+
+    Cada chamada a `submit` enfileira um registro e devolve um Future. Uma
+    thread de fundo junta os registros pendentes (até `max_batch`),
+    processa tudo com uma única chamada a `process_batch` e entrega a cada
+    Future o resultado do seu registro. O custo fixo por chamada (lock,
+    análise, IPC com o processo de estado) passa a ser pago uma vez por lote.
+
+    Com `max_delay` = 0 o lote é tudo o que chegou enquanto o anterior era
+    processado: sob carga os lotes crescem sozinhos e, com pouca carga,
+    nenhum registro espera. `max_delay` > 0 segura o lote por até esse
+    tempo para juntar mais registros.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Dict]], List[Dict]],
+                 max_batch: int = 500, max_delay: float = 0.0):
+        """
+        Args:
+            process_batch: Recebe a lista de registros e devolve um resultado
+                           por registro, na mesma ordem; um resultado que é
+                           uma exceção falha só o Future do seu registro
+            max_batch: Quantidade máxima de registros por lote
+            max_delay: Espera máxima (s) para completar um lote
+        """
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Estatísticas de uso
+        self.batches = 0
+        self.records = 0
+
+    def _ensure_started(self) -> None:
+        """Inicia a thread na primeira submissão (depois de um eventual fork)"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='micro-batcher',
+                                                    daemon=True)
+                    self._thread.start()
+
+    def submit(self, record: Dict) -> Future:
+        """Enfileira um registro; o Future recebe o resultado do registro"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def submit_async(self, record: Dict):
+        """Versão aguardável de submit, para uso dentro de um event loop"""
+        # asyncio só é carregado por quem usa event loop (Flask síncrono não usa)
+        import asyncio
+        return asyncio.wrap_future(self.submit(record))
+
+    def _run(self) -> None:
+        """Junta registros em lotes e processa cada lote de uma vez"""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(items) < self.max_batch:
+                # Tudo o que já está na fila entra no lote sem espera; depois
+                # aguarda novos registros só até o prazo do lote
+                try:
+                    items.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            records = [record for record, _ in items]
+            try:
+                results = self.process_batch(records)
+            except Exception as e:
+                # Falha do lote inteiro (sem resultado por registro)
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.records += len(items)
+            for (_, future), result in zip(items, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,736 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import atexit
+import json
+import os
+import signal
+import sys
+import threading
+import zlib
+
+from anomaly_detector import AnomalyDetector
+from sliding_window import SlidingWindow, MinuteWindow, validate_record
+from alert_store import AlertStore
+from event_log import EventLog
+from event_stream import EventJournal
+
+TRANSACTIONS_PATH = 'data/transactions.csv'
+AUTH_CODES_PATH = 'data/transactions_auth_codes.csv'
+# Snapshot gerado por compile_baseline.py (evita recalcular o baseline no boot)
+SNAPSHOT_PATH = os.environ.get('MONITORING_BASELINE_SNAPSHOT', 'data/baseline_snapshot.json')
+
+# Modo de detecção ('percentile', 'ewma' ou 'holt_winters') e arquivo do estado online
+DETECTOR_MODE = os.environ.get('MONITORING_DETECTOR_MODE', 'percentile')
+ONLINE_STATE_PATH = os.environ.get('MONITORING_ONLINE_STATE', 'data/online_state.json')
+
+# Tamanho da janela de análise e do buffer do dashboard
+WINDOW_SIZE = int(os.environ.get('MONITORING_WINDOW_SIZE', 60))
+BUFFER_SIZE = int(os.environ.get('MONITORING_BUFFER_SIZE', 100))
+
+# Modo de janela: 'minute' (minuto do timestamp do evento, mesma base dos
+# thresholds) ou 'count' (últimos WINDOW_SIZE registros)
+WINDOW_MODE = os.environ.get('MONITORING_WINDOW_MODE', 'minute')
+ALLOWED_LATENESS = float(os.environ.get('MONITORING_ALLOWED_LATENESS', 10))
+# Intervalo (s) em que o relógio avança o watermark sem eventos novos: com o
+# fluxo parado, o alerta de um minuto sai até ALLOWED_LATENESS + MINUTE_TICK
+# segundos após o fim do minuto (tempo do evento + tempo parado)
+MINUTE_TICK = float(os.environ.get('MONITORING_MINUTE_TICK', 1.0))
+
+# Retenção de alertas (quantidade e idade máxima em segundos)
+MAX_ALERTS = int(os.environ.get('MONITORING_MAX_ALERTS', 10000))
+ALERT_RETENTION = float(os.environ.get('MONITORING_ALERT_RETENTION', 24 * 3600))
+ACTIVE_ALERT_WINDOW = 10 * 60
+
+# Log persistente de transações e alertas (vazio desativa)
+LOG_PATH = os.environ.get('MONITORING_LOG_PATH', 'data/monitoring_log.db')
+
+# Intervalo mínimo entre eventos de métricas do stream (/stream)
+STREAM_INTERVAL = float(os.environ.get('MONITORING_STREAM_INTERVAL_MS', 500)) / 1000
+
+def load_detector():
+    """Cria o detector (snapshot ou CSVs) no modo configurado; None se falhar"""
+    try:
+        try:
+            detector = AnomalyDetector.from_snapshot(
+                SNAPSHOT_PATH, sources=[TRANSACTIONS_PATH, AUTH_CODES_PATH])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Snapshot indisponível ({e}), calculando baseline dos CSVs...")
+            print("   Para inicialização rápida: python compile_baseline.py")
+            detector = AnomalyDetector(TRANSACTIONS_PATH, AUTH_CODES_PATH)
+        print("✓ Detector inicializado com sucesso!")
+    except Exception as e:
+        print(f"ERRO ao inicializar detector: {e}")
+        return None
+
+    if DETECTOR_MODE != 'percentile':
+        try:
+            online_state = None
+            if ONLINE_STATE_PATH and os.path.exists(ONLINE_STATE_PATH):
+                with open(ONLINE_STATE_PATH, encoding='utf-8') as f:
+                    online_state = json.load(f)
+            if online_state is not None and online_state.get('mode') == DETECTOR_MODE:
+                detector.import_online_state(online_state)
+                print(f"✓ Estado online restaurado: {ONLINE_STATE_PATH}")
+            else:
+                detector.set_mode(DETECTOR_MODE)
+            print(f"✓ Modo de detecção: {DETECTOR_MODE}")
+        except Exception as e:
+            print(f"ERRO ao configurar modo {DETECTOR_MODE}: {e} (usando percentile)")
+            detector.set_mode('percentile')
+
+    return detector
+
+class MonitoringState:
+    """
+    Estado do monitoramento: detector, janelas, alertas e log persistente
+
+    Concentra tudo o que a API altera a cada requisição, para que o mesmo
+    estado possa ficar no processo da API (servidor de desenvolvimento) ou
+    em um processo de estado compartilhado por vários workers (serve.py).
+    Os métodos recebem registros já validados e devolvem apenas dicts
+    serializáveis.
+
+    Concorrência (servidor com threads ou processo de estado, que atende
+    cada worker em uma thread): um único escritor por vez altera detector,
+    janelas e log, sob `_write_lock`. Ao terminar, o escritor publica uma
+    visão imutável das contagens (`_view`); leitores (dashboard, stats)
+    só leem a referência publicada, sem lock e sem ver janela pela metade.
+    Alertas ficam no AlertStore, que tem lock próprio.
+
+    Stream: alertas novos e diferenças das contagens (no máximo um evento
+    de métricas a cada STREAM_INTERVAL) entram no EventJournal já
+    serializados, uma vez só, independente de quantos clientes escutam.
+    """
+
+    def __init__(self, detector: AnomalyDetector, log_path: str = LOG_PATH):
+        """
+        Args:
+            detector: Detector inicializado (None = API sem detector)
+            log_path: Arquivo do log persistente (vazio desativa)
+        """
+        self.detector = detector
+        self._write_lock = threading.RLock()
+        self._view = None
+        self.events = EventJournal()
+        self._metrics_thread = None
+        self._clock_thread = None
+
+        # Armazenamento em memória
+        self.alerts_history = AlertStore(max_alerts=MAX_ALERTS, max_age_seconds=ALERT_RETENTION)
+        # Janela de análise (últimas WINDOW_SIZE) e buffer do dashboard (últimas BUFFER_SIZE)
+        self.transaction_window = SlidingWindow(WINDOW_SIZE)
+        self.transactions_buffer = SlidingWindow(BUFFER_SIZE)
+        # Janelas por minuto do evento
+        self.minute_window = MinuteWindow(allowed_lateness=ALLOWED_LATENESS)
+        self._publish()
+
+        if detector is not None and detector.online is not None:
+            atexit.register(self.save_online_state)
+
+        self.event_log = None
+        if log_path:
+            try:
+                self.event_log = EventLog(log_path)
+                self.restore_state()
+                atexit.register(self.event_log.close)
+            except Exception as e:
+                print(f"ERRO ao abrir log persistente: {e}")
+                self.event_log = None
+
+    def restore_state(self) -> None:
+        """Reconstrói janelas e alertas recentes a partir do final do log"""
+        # Minutos que ainda podem estar abertos em relação ao evento mais recente
+        horizon = (self.minute_window.max_open_minutes + 1) * 60 + ALLOWED_LATENESS
+        transactions, alerts, counters = self.event_log.load_tail(
+            max(WINDOW_SIZE, BUFFER_SIZE), horizon, MAX_ALERTS)
+
+        # Registro inválido no log (gravado antes da validação na API) é
+        # ignorado no replay, sem descartar o restante do log
+        valid = []
+        for transaction in transactions:
+            try:
+                validate_record(transaction)
+                valid.append(transaction)
+            except ValueError as e:
+                print(f"⚠️  Transação ignorada no replay do log: {e}")
+        transactions = valid
+
+        self.transaction_window.extend(transactions[-WINDOW_SIZE:])
+        self.transactions_buffer.extend(transactions[-BUFFER_SIZE:])
+        # Minutos que fecham durante o replay já tiveram seus alertas registrados
+        for transaction in transactions:
+            self.minute_window.add(transaction)
+        self.alerts_history.restore(alerts, counters['total'], counters['severity_counts'])
+        if len(self.minute_window):
+            # Minutos restaurados fecham mesmo que não chegue mais nada
+            self._ensure_clock()
+
+        self._publish()
+        print(f"✓ Estado restaurado do log: {len(transactions)} transações, "
+              f"{len(alerts)} alertas")
+
+    def _publish(self) -> None:
+        """Publica as contagens atuais para leitores (chamado pelo escritor)"""
+        self._view = {
+            'status_counts': self.transactions_buffer.snapshot(),
+            'auth_code_counts': self.transactions_buffer.snapshot('auth_code'),
+            'total': self.transactions_buffer.total,
+            'buffered': len(self.transactions_buffer),
+            'open_minutes': len(self.minute_window),
+            'late_records': self.minute_window.late_records
+        }
+
+    def save_online_state(self) -> None:
+        """Grava o estado do modo online (substituição atômica do arquivo)"""
+        state = self.detector.export_online_state() if self.detector is not None else None
+        if state is None or not ONLINE_STATE_PATH:
+            return
+        tmp_path = ONLINE_STATE_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, ONLINE_STATE_PATH)
+
+    def is_ready(self) -> bool:
+        """Indica se o detector foi inicializado"""
+        return self.detector is not None
+
+    # ---- Ingestão ----
+
+    def receive(self, transaction: Dict) -> Dict:
+        """
+        Registra uma transação normalizada e analisa a janela
+
+        Returns:
+            {"individual_analysis", "window_analysis", "closed_windows"}
+
+        Raises:
+            ValueError: timestamp ou count inválido (nada é alterado)
+        """
+        validate_record(transaction)
+        with self._write_lock:
+            # Adicionar às janelas (descarte do mais antigo é automático)
+            self.transaction_window.add(transaction)
+            self.transactions_buffer.add(transaction)
+
+            # Análise individual
+            individual_analysis = self.detector.analyze_real_time(transaction)
+
+            closed_windows = []
+            if WINDOW_MODE == 'minute':
+                # Análise parcial do minuto do evento; alertas saem quando o minuto fecha
+                self._ensure_clock()
+                closed_windows, open_windows, late, _ = self.ingest_minutes([transaction])
+                window_analysis = open_windows[0] if open_windows else self.late_record_analysis()
+            else:
+                # Análise de janela (somas incrementais da janela)
+                window_analysis = self.detector.analyze_transaction_window(
+                    self.transaction_window, when=transaction['timestamp'])
+                self.learn_minutes([transaction])
+
+                # Salvar alerta se necessário
+                if window_analysis['alert']:
+                    self.save_alert(window_analysis)
+
+            # Log só recebe a transação já processada (o replay não falha nela)
+            if self.event_log is not None:
+                self.event_log.append_transactions([transaction])
+            self._publish()
+
+        return {
+            'individual_analysis': individual_analysis,
+            'window_analysis': window_analysis,
+            'closed_windows': closed_windows
+        }
+
+    def receive_batch(self, batch: List[Dict]) -> Dict:
+        """
+        Registra um lote de transações normalizadas e analisa todas de uma vez
+
+        Raises:
+            ValueError: Algum registro com timestamp ou count inválido (nada é alterado)
+        """
+        for transaction in batch:
+            validate_record(transaction)
+        now = datetime.now().isoformat()
+        with self._write_lock:
+            if WINDOW_MODE == 'minute':
+                # Vereditos por minuto: minutos fechados pelo lote e minutos ainda abertos
+                self._ensure_clock()
+                closed_windows, open_windows, late, _ = self.ingest_minutes(batch)
+                windows = closed_windows + open_windows
+                severities = {w['severity'] for w in windows}
+                batch_analysis = {
+                    'total_records': len(batch),
+                    'alert': any(w['alert'] for w in windows),
+                    'severity': ('CRITICAL' if 'CRITICAL' in severities else
+                                 'WARNING' if 'WARNING' in severities else 'NORMAL'),
+                    'records': self.detector.analyze_records(batch),
+                    'windows': windows,
+                    'alerting_windows': sum(1 for w in windows if w['alert']),
+                    'late_records': late,
+                    'timestamp': now
+                }
+            else:
+                # Análise vetorizada com as janelas que cada registro teria formado
+                batch_analysis = self.detector.analyze_batch(
+                    batch, history=self.transaction_window)
+
+                # Salvar alertas das janelas anômalas
+                for window in batch_analysis['windows']:
+                    if window['alert']:
+                        self.save_alert(window)
+
+                self.learn_minutes(batch)
+
+            self.transaction_window.extend(batch)
+            self.transactions_buffer.extend(batch)
+            if self.event_log is not None:
+                self.event_log.append_transactions(batch)
+            self._publish()
+
+        return batch_analysis
+
+    def receive_many(self, transactions: List[Dict]) -> List[Dict]:
+        """
+        Versão em lote de receive: um resultado por registro, no mesmo formato
+
+        Usado pelo micro-batching da API: o lock, a análise individual e as
+        análises de janela são feitos uma vez para o lote inteiro. No modo
+        por minuto cada minuto tocado é analisado uma única vez, com as
+        contagens após o lote; no modo por contagem cada registro recebe a
+        janela que teria formado na ordem do lote (analyze_batch).
+
+        Registro com timestamp ou count inválido recebe um ValueError no
+        lugar do resultado e não altera o estado; os demais seguem.
+        """
+        errors = {}
+        for i, transaction in enumerate(transactions):
+            try:
+                validate_record(transaction)
+            except ValueError as e:
+                errors[i] = e
+        if errors:
+            valid = [t for i, t in enumerate(transactions) if i not in errors]
+            results = iter(self.receive_many(valid) if valid else [])
+            return [errors[i] if i in errors else next(results)
+                    for i in range(len(transactions))]
+
+        now = datetime.now().isoformat()
+        with self._write_lock:
+            if WINDOW_MODE == 'minute':
+                individual = self.detector.analyze_records(transactions)
+                self._ensure_clock()
+                closed_windows, open_windows, late, placements = self.ingest_minutes(transactions)
+                by_minute = {w['minute']: w for w in closed_windows + open_windows}
+                windows = [
+                    (by_minute[MinuteWindow.minute_start(minute).isoformat()]
+                     if minute is not None else self.late_record_analysis(), closed)
+                    for minute, closed in placements
+                ]
+            else:
+                batch_analysis = self.detector.analyze_batch(
+                    transactions, history=self.transaction_window)
+                individual = batch_analysis['records']
+                windows = []
+                for window in batch_analysis['windows']:
+                    if window['alert']:
+                        self.save_alert(window)
+                    window = {k: v for k, v in window.items() if k != 'index'}
+                    window['timestamp'] = now
+                    windows.append((window, []))
+
+                self.learn_minutes(transactions)
+
+            self.transaction_window.extend(transactions)
+            self.transactions_buffer.extend(transactions)
+            if self.event_log is not None:
+                self.event_log.append_transactions(transactions)
+            self._publish()
+
+        results = []
+        for record, (window_analysis, closed_windows) in zip(individual, windows):
+            individual_analysis = {k: v for k, v in record.items() if k != 'index'}
+            individual_analysis['timestamp'] = now
+            results.append({
+                'individual_analysis': individual_analysis,
+                'window_analysis': window_analysis,
+                'closed_windows': closed_windows
+            })
+        return results
+
+    def ingest_minutes(self, batch: List[Dict]) -> Tuple[List[Dict], List[Dict], int, List]:
+        """
+        Insere registros nas janelas por minuto
+
+        Returns:
+            (análises dos minutos fechados, análises parciais dos minutos
+             abertos tocados pelos registros, quantidade de registros atrasados,
+             [(minuto do registro ou None, análises dos minutos que ele fechou)]
+             por registro)
+        """
+        touched = {}
+        closed_windows = []
+        placements = []
+        late = 0
+
+        for transaction in batch:
+            minute, closed = self.minute_window.add(transaction)
+            if minute is None:
+                late += 1
+            else:
+                touched[minute] = True
+
+            closed_by_record = self._close_minutes(closed)
+            closed_windows.extend(closed_by_record)
+            placements.append((minute, closed_by_record))
+
+        if closed_windows and self.detector.online is not None:
+            self.save_online_state()
+
+        open_windows = []
+        for minute in touched:
+            if self.minute_window.is_open(minute):
+                counts = self.minute_window.open_counts(minute)
+                open_windows.append(self.detector.analyze_minute(
+                    counts['status'], MinuteWindow.minute_start(minute), closed=False,
+                    auth_code_counts=counts['auth_code']))
+
+        return closed_windows, open_windows, late, placements
+
+    def learn_minutes(self, transactions: List[Dict]) -> None:
+        """
+        Modo por contagem: agrega os registros por minuto do evento só para
+        o modo online, que aprende com minutos fechados (mesma unidade do
+        baseline histórico: contagem de um minuto por status), não com cada
+        registro
+        """
+        if self.detector.online is None:
+            return
+        self._ensure_clock()
+        closed = []
+        for transaction in transactions:
+            closed.extend(self.minute_window.add(transaction)[1])
+        if closed:
+            self._close_minutes(closed)
+            self.save_online_state()
+
+    def _close_minutes(self, closed: List) -> List[Dict]:
+        """
+        Minutos fechados alimentam o modo online; no modo por minuto também
+        têm análise definitiva e geram alerta
+        """
+        analyses = []
+        for closed_minute, counts in closed:
+            minute_start = MinuteWindow.minute_start(closed_minute)
+            if WINDOW_MODE == 'minute':
+                analysis = self.detector.analyze_minute(counts['status'], minute_start,
+                                                        auth_code_counts=counts['auth_code'])
+                analyses.append(analysis)
+                if analysis['alert']:
+                    self.save_alert(analysis)
+            self.detector.learn(counts['status'], when=minute_start)
+        return analyses
+
+    def close_idle_minutes(self) -> List[Dict]:
+        """
+        Fecha os minutos que expiraram pelo relógio (fluxo parado)
+
+        Returns:
+            Análises dos minutos fechados
+        """
+        with self._write_lock:
+            expired = self.minute_window.advance_clock()
+            closed = self._close_minutes(expired)
+            if expired:
+                if self.detector.online is not None:
+                    self.save_online_state()
+                self._publish()
+        return closed
+
+    def _ensure_clock(self) -> None:
+        """Inicia (uma vez) a thread que avança as janelas por minuto pelo relógio"""
+        if self._clock_thread is None and self.detector is not None:
+            with self._write_lock:
+                if self._clock_thread is None:
+                    self._clock_thread = threading.Thread(
+                        target=self._clock_loop, name='minute-clock', daemon=True)
+                    self._clock_thread.start()
+
+    def _clock_loop(self) -> None:
+        stop = threading.Event()
+        while not stop.wait(MINUTE_TICK):
+            try:
+                self.close_idle_minutes()
+            except Exception as e:
+                print(f"ERRO ao fechar minutos pelo relógio: {e}")
+
+    @staticmethod
+    def late_record_analysis() -> Dict:
+        """Análise retornada para registro descartado por chegar atrasado"""
+        return {
+            'alert': False,
+            'severity': 'NORMAL',
+            'anomaly_score': 0,
+            'status_counts': {},
+            'alerts': [],
+            'late': True,
+            'message': 'Registro fora da tolerância de atraso: minuto já fechado',
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def save_alert(self, window_analysis: Dict) -> Dict:
+        """Registra um alerta a partir de uma análise de janela"""
+        alert_record = {
+            'severity': window_analysis['severity'],
+            'details': window_analysis['alerts'],
+            'status_counts': window_analysis['status_counts']
+        }
+        if window_analysis.get('auth_code_counts'):
+            alert_record['auth_code_counts'] = window_analysis['auth_code_counts']
+        if 'minute' in window_analysis:
+            alert_record['minute'] = window_analysis['minute']
+        alert_record = self.alerts_history.add(alert_record)
+        if self.event_log is not None:
+            self.event_log.append_alert(alert_record)
+        self.events.append('alert', alert_record)
+        return alert_record
+
+    # ---- Estado do detector ----
+
+    def export_detector_state(self) -> Dict:
+        """Modo e estado online do detector"""
+        with self._write_lock:
+            return {
+                'mode': self.detector.mode,
+                'state': self.detector.export_online_state()
+            }
+
+    def import_detector_state(self, exported: Dict) -> str:
+        """Importa um estado online exportado; retorna o modo resultante"""
+        with self._write_lock:
+            self.detector.import_online_state(exported)
+            self.save_online_state()
+            return self.detector.mode
+
+    # ---- Consultas (sem o lock de escrita) ----
+
+    def recent_alerts(self, limit: int = 50) -> Dict:
+        """Total de alertas e os `limit` mais recentes"""
+        total, _ = self.alerts_history.counters()
+        return {
+            'total_alerts': total,
+            'alerts': self.alerts_history.recent(limit)
+        }
+
+    def active_alerts(self) -> List[Dict]:
+        """Alertas críticos dos últimos ACTIVE_ALERT_WINDOW segundos"""
+        # Busca binária no índice de timestamps
+        return self.alerts_history.since(ACTIVE_ALERT_WINDOW, severity='CRITICAL')
+
+    def statistics(self) -> Dict:
+        """Estatísticas do detector e da API"""
+        return {
+            'detector_stats': self.detector.get_statistics(),
+            'api_stats': self._api_stats()
+        }
+
+    def statistics_body(self, etags=()) -> Tuple[str, str]:
+        """
+        Corpo JSON de statistics() e seu ETag
+
+        A parte do detector vem pré-serializada (statistics_json) e só a
+        parte da API, pequena, é serializada a cada chamada. O ETag combina
+        a versão do baseline com um CRC da parte da API.
+
+        Args:
+            etags: ETags que o cliente já tem (If-None-Match, sem aspas)
+
+        Returns:
+            (ETag, corpo JSON); corpo None se o ETag está em `etags`
+        """
+        version, detector_json = self.detector.statistics_json()
+        api_json = json.dumps(self._api_stats())
+        etag = f'{version}-{zlib.crc32(api_json.encode()):08x}'
+        if etag in etags:
+            return etag, None
+        return etag, f'{{"detector_stats": {detector_json}, "api_stats": {api_json}}}'
+
+    def _api_stats(self) -> Dict:
+        view = self._view
+        total, _ = self.alerts_history.counters()
+        return {
+            'total_alerts_generated': total,
+            'alerts_retained': len(self.alerts_history),
+            'transactions_in_buffer': view['buffered'],
+            'window_mode': WINDOW_MODE,
+            'open_minutes': view['open_minutes'],
+            'late_records': view['late_records'],
+            'uptime': 'Running'
+        }
+
+    def dashboard(self) -> Dict:
+        """Dados para o dashboard"""
+        # Contagens por status já mantidas pelo buffer (visão publicada pelo escritor)
+        return {
+            'current_status': self._current_status(self._view),
+            'recent_alerts': self.alerts_history.recent(10),
+            'alerts_count': self._alerts_count(),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _current_status(view: Dict) -> Dict:
+        """Bloco current_status do dashboard a partir de uma visão publicada"""
+        status_counts = view['status_counts']
+        total_count = view['total']
+
+        # Calcular taxa de erro
+        errors = (status_counts.get('FAILED', 0) +
+                  status_counts.get('DENIED', 0) +
+                  status_counts.get('REJECTED', 0))
+        error_rate = (errors / total_count * 100) if total_count > 0 else 0
+
+        return {
+            'total_transactions': total_count,
+            'status_distribution': status_counts,
+            'auth_code_distribution': view['auth_code_counts'],
+            'error_rate_percent': round(error_rate, 2)
+        }
+
+    def _alerts_count(self) -> Dict:
+        alerts_total, severity_counts = self.alerts_history.counters()
+        return {
+            'total': alerts_total,
+            'critical': severity_counts.get('CRITICAL', 0),
+            'warning': severity_counts.get('WARNING', 0)
+        }
+
+    # ---- Stream de eventos ----
+
+    def events_since(self, seq: int, timeout: float = 15.0):
+        """Eventos do stream após `seq` (long polling; ver EventJournal.since)"""
+        if self._metrics_thread is None:
+            with self._write_lock:
+                if self._metrics_thread is None:
+                    self._metrics_thread = threading.Thread(
+                        target=self._metrics_loop, name='stream-metrics', daemon=True)
+                    self._metrics_thread.start()
+        return self.events.since(seq, timeout)
+
+    def last_event_seq(self) -> int:
+        """Sequência do último evento do stream (0 se nenhum)"""
+        return self.events.last_seq
+
+    def _metrics_loop(self) -> None:
+        """Emite a diferença das contagens desde o último evento, se houver"""
+        last_status = self._current_status(self._view)
+        last_alerts = self._alerts_count()
+        stop = threading.Event()
+        while not stop.wait(STREAM_INTERVAL):
+            status = self._current_status(self._view)
+            alerts_count = self._alerts_count()
+            delta = self.metrics_delta(last_status, status)
+            if delta is None and alerts_count == last_alerts:
+                continue
+            delta = delta or {}
+            delta['alerts_count'] = alerts_count
+            delta['timestamp'] = datetime.now().isoformat()
+            self.events.append('metrics', delta)
+            last_status, last_alerts = status, alerts_count
+
+    @staticmethod
+    def metrics_delta(previous: Dict, current: Dict):
+        """
+        Diferença entre dois blocos current_status (None se iguais)
+
+        Distribuições trazem só as chaves alteradas; chave removida vem
+        como None (null no JSON).
+        """
+        delta = {}
+        for key in ('total_transactions', 'error_rate_percent'):
+            if previous[key] != current[key]:
+                delta[key] = current[key]
+        for key in ('status_distribution', 'auth_code_distribution'):
+            before, after = previous[key], current[key]
+            changed = {k: v for k, v in after.items() if before.get(k) != v}
+            changed.update({k: None for k in before if k not in after})
+            if changed:
+                delta[key] = changed
+        return delta or None
+
+    def reset(self) -> None:
+        """Descarta janelas e alertas (o log registra o ponto de reset)"""
+        with self._write_lock:
+            self.alerts_history.clear()
+            self.transaction_window.clear()
+            self.transactions_buffer.clear()
+            self.minute_window.clear()
+            if self.event_log is not None:
+                self.event_log.mark_reset()
+            self._publish()
+            self.events.append('snapshot', self.dashboard())
+
+    def flush(self) -> None:
+        """Bloqueia até o log persistente gravar os eventos pendentes"""
+        if self.event_log is not None:
+            self.event_log.flush()
+
+    def close(self) -> None:
+        """Grava o estado online e o que estiver pendente no log"""
+        with self._write_lock:
+            self.save_online_state()
+            if self.event_log is not None:
+                self.event_log.close()
+
+# ---- Processo de estado compartilhado (vários workers, um estado) ----
+
+@lru_cache(maxsize=None)
+def state_manager_class():
+    """
+    Manager que expõe um MonitoringState para outros processos
+
+    Criado sob demanda: multiprocessing só é importado quando há processo
+    de estado (o modo de um processo não paga esse import)
+    """
+    from multiprocessing.managers import BaseManager
+
+    class StateManager(BaseManager):
+        pass
+    return StateManager
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """'host:porta' -> (host, porta)"""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def serve_state(address: str, authkey: bytes) -> None:
+    """
+    Processo de estado: cria o MonitoringState e atende os workers
+
+    Cada conexão de worker é atendida por uma thread deste processo; todos
+    enxergam as mesmas janelas, alertas e log.
+    """
+    # O encerramento é comandado pelo serve.py (SIGTERM), não pelo Ctrl+C do terminal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    state = MonitoringState(load_detector())
+    StateManager = state_manager_class()
+    StateManager.register('get_state', callable=lambda: state)
+    manager = StateManager(address=parse_address(address), authkey=authkey)
+    server = manager.get_server()
+    print(f"✓ Processo de estado escutando em {address}")
+    try:
+        server.serve_forever()
+    finally:
+        # Processos filhos não executam atexit
+        state.close()
+
+def connect_state(address: str, authkey: bytes):
+    """Proxy para o MonitoringState de um processo de estado (serve_state)"""
+    StateManager = state_manager_class()
+    StateManager.register('get_state')
+    manager = StateManager(address=parse_address(address), authkey=authkey)
+    manager.connect()
+    return manager.get_state()
@@ -0,0 +1,105 @@
+import math
+from typing import Dict, Tuple
+
+
+class EWMABaseline:
+    """
+    Baseline online por status: média e variância exponencialmente ponderadas
+
+    Cada observação (contagem de um minuto) atualiza o estado em O(1) sem
+    guardar histórico. Com `seasonal_period` > 0 funciona como Holt-Winters
+    aditivo: além do nível, mantém um componente sazonal por slot (ex.: 168
+    slots de dia da semana x hora), de modo que o valor esperado varia ao
+    longo da semana.
+    """
+
+    def __init__(self, alpha: float = 0.05, gamma: float = 0.1, seasonal_period: int = 0,
+                 warning_sigma: float = 2.0, critical_sigma: float = 3.0,
+                 min_std: float = 1.0):
+        """
+        Args:
+            alpha: Peso da observação nova no nível e na variância
+            gamma: Peso da observação nova no componente sazonal
+            seasonal_period: Quantidade de slots sazonais (0 = sem sazonalidade)
+            warning_sigma: Desvios acima do esperado para WARNING
+            critical_sigma: Desvios acima do esperado para CRITICAL
+            min_std: Desvio mínimo (evita threshold igual ao esperado)
+        """
+        self.alpha = alpha
+        self.gamma = gamma
+        self.seasonal_period = seasonal_period
+        self.warning_sigma = warning_sigma
+        self.critical_sigma = critical_sigma
+        self.min_std = min_std
+        self.state = {}
+
+    def seed(self, status: str, mean: float, std: float) -> None:
+        """Inicializa o estado de um status (ex.: a partir do baseline histórico)"""
+        std = std if std == std else 0.0  # NaN (status com um único registro)
+        self.state[status] = {
+            'level': float(mean),
+            'var': float(std) ** 2,
+            'n': 0,
+            'seasonal': [0.0] * self.seasonal_period
+        }
+
+    def update(self, status: str, value: float, slot: int = 0) -> None:
+        """Incorpora uma observação do status no slot sazonal informado"""
+        state = self.state.get(status)
+        if state is None:
+            self.seed(status, value, 0.0)
+            state = self.state[status]
+
+        seasonal = state['seasonal'][slot % self.seasonal_period] if self.seasonal_period else 0.0
+        residual = value - (state['level'] + seasonal)
+
+        # Resíduos extremos são limitados para uma anomalia não virar o novo normal
+        limit = self.critical_sigma * max(math.sqrt(state['var']), self.min_std)
+        residual = max(-limit, min(residual, limit))
+
+        state['level'] += self.alpha * residual
+        state['var'] = (1 - self.alpha) * (state['var'] + self.alpha * residual * residual)
+        if self.seasonal_period:
+            index = slot % self.seasonal_period
+            state['seasonal'][index] += self.gamma * (1 - self.alpha) * residual
+        state['n'] += 1
+
+    def expected(self, status: str, slot: int = 0) -> float:
+        """Valor esperado do status no slot"""
+        state = self.state[status]
+        seasonal = state['seasonal'][slot % self.seasonal_period] if self.seasonal_period else 0.0
+        return state['level'] + seasonal
+
+    def thresholds(self, status: str, slot: int = 0) -> Tuple[float, float]:
+        """(warning, critical) do status no slot"""
+        std = max(math.sqrt(self.state[status]['var']), self.min_std)
+        expected = self.expected(status, slot)
+        return (expected + self.warning_sigma * std, expected + self.critical_sigma * std)
+
+    def __contains__(self, status: str) -> bool:
+        return status in self.state
+
+    def export_state(self) -> Dict:
+        """Estado completo em formato serializável (JSON)"""
+        return {
+            'params': {
+                'alpha': self.alpha,
+                'gamma': self.gamma,
+                'seasonal_period': self.seasonal_period,
+                'warning_sigma': self.warning_sigma,
+                'critical_sigma': self.critical_sigma,
+                'min_std': self.min_std
+            },
+            'state': {status: dict(values, seasonal=list(values['seasonal']))
+                      for status, values in self.state.items()}
+        }
+
+    @classmethod
+    def from_state(cls, exported: Dict) -> 'EWMABaseline':
+        """Recria o baseline a partir de export_state()"""
+        baseline = cls(**exported['params'])
+        for status, values in exported['state'].items():
+            if len(values['seasonal']) != baseline.seasonal_period:
+                raise ValueError(f'Estado sazonal de {status} com tamanho inválido')
+            baseline.state[status] = dict(values, seasonal=list(values['seasonal']))
+        return baseline
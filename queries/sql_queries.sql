@@ -1,6 +1,6 @@
 -- =====================================================
 -- CloudWalk Monitoring System - SQL Queries
--- Gerado automaticamente em: 2025-12-27 12:45:43
+-- Gerado automaticamente em: 2026-10-17 01:45:17
 -- =====================================================
 
 -- =====================================================
@@ -91,67 +91,61 @@ ORDER BY today DESC;
 -- =====================================================
 
 -- 6. ESTATÍSTICAS POR STATUS
--- Volume e médias por status de transação
+-- Volume e médias por status de transação (rollup diária por status)
 SELECT 
-    status,
-    COUNT(*) as records,
-    SUM(count) as total_transactions,
-    ROUND(AVG(count), 2) as avg_per_minute,
-    MIN(count) as min_per_minute,
-    MAX(count) as max_per_minute
-FROM transactions
-GROUP BY status
+    s.name as status,
+    SUM(r.records) as records,
+    SUM(r.total) as total_transactions,
+    ROUND(SUM(r.total) * 1.0 / SUM(r.counted), 2) as avg_per_minute,
+    MIN(r.min_count) as min_per_minute,
+    MAX(r.max_count) as max_per_minute
+FROM status_by_day r
+JOIN statuses s ON s.id = r.status_id
+GROUP BY r.status_id
 ORDER BY total_transactions DESC;
 
 -- 7. EVOLUÇÃO TEMPORAL
--- Mostra acumulado de transações ao longo do tempo
+-- Mostra acumulado de transações por hora (rollup horária por status)
 SELECT 
-    timestamp,
-    status,
-    count,
-    SUM(count) OVER (PARTITION BY status ORDER BY timestamp) as cumulative_count
-FROM transactions
-ORDER BY timestamp, status;
+    datetime(r.bucket, 'unixepoch') as hour,
+    s.name as status,
+    r.total as count,
+    SUM(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as cumulative_count
+FROM status_by_hour r
+JOIN statuses s ON s.id = r.status_id
+ORDER BY r.bucket, s.name;
 
 -- 8. MINUTOS COM MAIOR VOLUME
--- Top minutos com mais transações
+-- Top minutos com mais transações (totais por minuto, indexados pelo total)
 SELECT 
-    timestamp,
-    SUM(count) as total_transactions
-FROM transactions
-GROUP BY timestamp
-ORDER BY total_transactions DESC
+    datetime(bucket, 'unixepoch') as timestamp,
+    total as total_transactions
+FROM totals_by_minute
+ORDER BY total DESC
 LIMIT 10;
 
 -- 9. TAXA DE APROVAÇÃO
--- Percentual de transações aprovadas por minuto
-WITH minute_stats AS (
-    SELECT 
-        timestamp,
-        SUM(CASE WHEN UPPER(status) = 'APPROVED' THEN count ELSE 0 END) as approved,
-        SUM(count) as total
-    FROM transactions
-    GROUP BY timestamp
-)
+-- Percentual de transações aprovadas por minuto (totais por minuto)
 SELECT 
-    timestamp,
+    datetime(bucket, 'unixepoch') as timestamp,
     approved,
     total,
     ROUND((approved * 100.0 / total), 2) as approval_rate
-FROM minute_stats
+FROM totals_by_minute
 WHERE total > 0
 ORDER BY approval_rate DESC;
 
 -- 10. ANÁLISE DE TENDÊNCIAS
--- Compara cada minuto com o anterior
+-- Compara cada minuto com o anterior (mesmo formato das rollups)
 SELECT 
-    t1.timestamp,
-    t1.status,
-    t1.count as current_count,
-    LAG(t1.count) OVER (PARTITION BY t1.status ORDER BY t1.timestamp) as previous_count,
-    t1.count - LAG(t1.count) OVER (PARTITION BY t1.status ORDER BY t1.timestamp) as change
-FROM transactions t1
-ORDER BY t1.timestamp DESC, t1.status;
+    datetime(r.bucket, 'unixepoch') as timestamp,
+    s.name as status,
+    r.total as current_count,
+    LAG(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as previous_count,
+    r.total - LAG(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as change
+FROM status_by_minute r
+JOIN statuses s ON s.id = r.status_id
+ORDER BY r.bucket DESC, s.name;
 
 -- =====================================================
 -- FIM DAS QUERIES
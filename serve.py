@@ -0,0 +1,101 @@
+import argparse
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from monitoring_state import parse_address, serve_state
+
+def wait_for_state(address, timeout=120):
+    """Espera o processo de estado aceitar conexões (baseline pode levar alguns segundos)"""
+    host, port = parse_address(address)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def has_gunicorn():
+    try:
+        import gunicorn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve a API com vários workers e estado compartilhado')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos worker (padrão: um por núcleo)')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='Threads por worker')
+    parser.add_argument('--max-streams', type=int, default=None,
+                        help='Conexões /stream simultâneas por worker; cada uma ocupa '
+                             'uma thread (padrão: metade de --threads)')
+    parser.add_argument('--state-address', default='127.0.0.1:5100',
+                        help='host:porta do processo de estado compartilhado')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("CLOUDWALK MONITORING API - MODO PRODUÇÃO")
+    print("="*60)
+
+    # SIGTERM (ex.: systemd, docker stop) passa pelo mesmo encerramento do Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Processo de estado: detector, janelas, alertas e log em um único lugar
+    authkey = secrets.token_bytes(16)
+    state_process = multiprocessing.Process(target=serve_state, name='monitoring-state',
+                                            args=(args.state_address, authkey), daemon=True)
+    state_process.start()
+    if not wait_for_state(args.state_address):
+        print("ERRO: Processo de estado não respondeu")
+        state_process.terminate()
+        sys.exit(1)
+
+    # Workers se conectam ao estado compartilhado (ver api.py)
+    os.environ['MONITORING_STATE_ADDRESS'] = args.state_address
+    os.environ['MONITORING_STATE_AUTHKEY'] = authkey.hex()
+    # Streams SSE não podem tomar todas as threads da ingestão
+    max_streams = args.max_streams if args.max_streams is not None else max(1, args.threads // 2)
+    os.environ['MONITORING_MAX_STREAMS'] = str(max_streams)
+
+    try:
+        if has_gunicorn():
+            print(f"\n🚀 gunicorn: {args.workers} workers x {args.threads} threads "
+                  f"em {args.host}:{args.port} (até {max_streams} streams por worker)")
+            subprocess.run([sys.executable, '-m', 'gunicorn',
+                            '--workers', str(args.workers),
+                            '--threads', str(args.threads),
+                            '--bind', f'{args.host}:{args.port}',
+                            'api:app'],
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+        else:
+            # Sem gunicorn (ex.: Windows): um processo com threads, mesmo estado compartilhado
+            from werkzeug.serving import run_simple
+            from api import app
+            print(f"\n⚠️  gunicorn não instalado: servidor com threads em {args.host}:{args.port}")
+            run_simple(args.host, args.port, app, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Encerrar o processo de estado sem ser interrompido por outro Ctrl+C
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        state_process.terminate()
+        state_process.join()
+        print("\nAPI encerrada.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+import math
+import os
+import time
+
+# Dimensões contadas pelas janelas: status e código de autorização
+DIMENSIONS = ('status', 'auth_code')
+
+# Quanto (s) um timestamp pode estar à frente do relógio: um registro no
+# futuro avançaria o watermark e fecharia todos os minutos abertos
+MAX_FUTURE_SKEW = float(os.environ.get('MONITORING_MAX_FUTURE_SKEW', 300))
+
+
+def normalize_auth_code(value) -> Optional[str]:
+    """Auth code como texto com dois dígitos ("00", "51"); None se ausente"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        value = int(value)
+    code = str(value).strip().upper()
+    return code.zfill(2) if code.isdigit() else code
+
+
+def record_keys(transaction: Dict) -> Tuple[str, Optional[str]]:
+    """Chaves do registro em cada dimensão (auth_code é opcional)"""
+    return (str(transaction.get('status', 'UNKNOWN')).upper(),
+            normalize_auth_code(transaction.get('auth_code')))
+
+
+def validate_record(transaction: Dict, max_future_skew: float = None,
+                    now: float = None) -> None:
+    """
+    Verifica timestamp e count de um registro antes de ele entrar no estado
+
+    Args:
+        max_future_skew: Segundos aceitos à frente de `now` (padrão:
+                         MAX_FUTURE_SKEW)
+        now: Relógio em epoch (padrão: agora)
+
+    Raises:
+        ValueError: timestamp que não é ISO 8601, datetime nem epoch, ou
+                    mais de `max_future_skew` segundos no futuro; count que
+                    não é um número finito não negativo
+    """
+    timestamp = transaction.get('timestamp')
+    try:
+        epoch = MinuteWindow.to_epoch(timestamp)
+        datetime.fromtimestamp(epoch)
+    except (AttributeError, TypeError, ValueError, OverflowError, OSError):
+        raise ValueError(f'timestamp inválido: {timestamp!r}')
+
+    max_future_skew = MAX_FUTURE_SKEW if max_future_skew is None else max_future_skew
+    now = time.time() if now is None else now
+    if epoch > now + max_future_skew:
+        raise ValueError(f'timestamp no futuro: {timestamp!r} '
+                         f'(tolerância de {max_future_skew:.0f}s)')
+
+    count = transaction.get('count', 1)
+    if isinstance(count, bool) or not isinstance(count, (int, float)) \
+            or not math.isfinite(count) or count < 0:
+        raise ValueError(f'count inválido: {count!r}')
+
+
+class SlidingWindow:
+    """
+    Janela deslizante das últimas N transações agregadas
+
+    Mantém somas correntes por status e por auth code, atualizadas em
+    O(1) a cada registro inserido ou descartado, de modo que consultar as
+    contagens da janela não depende do tamanho dela. As duas dimensões
+    compartilham o mesmo registro na fila e a mesma atualização.
+    """
+
+    def __init__(self, size: int = 60):
+        """Cria uma janela vazia com capacidade para `size` registros"""
+        if size < 1:
+            raise ValueError('Tamanho da janela deve ser >= 1')
+
+        self.size = size
+        self._records = deque()
+        self.counts = {dimension: {} for dimension in DIMENSIONS}
+        self.total = 0
+        # Quantos registros de cada chave estão na janela, por dimensão
+        self._records_per_key = {dimension: {} for dimension in DIMENSIONS}
+
+    @property
+    def status_counts(self) -> Dict:
+        """Contagens por status (referência interna, não alterar)"""
+        return self.counts['status']
+
+    @property
+    def auth_code_counts(self) -> Dict:
+        """Contagens por auth code (referência interna, não alterar)"""
+        return self.counts['auth_code']
+
+    def add(self, transaction: Dict) -> None:
+        """Insere um registro, descartando o mais antigo se a janela estiver cheia"""
+        keys = record_keys(transaction)
+        count = transaction.get('count', 1)
+
+        self._records.append((keys, count, transaction))
+        for dimension, key in zip(DIMENSIONS, keys):
+            if key is not None:
+                counts = self.counts[dimension]
+                per_key = self._records_per_key[dimension]
+                counts[key] = counts.get(key, 0) + count
+                per_key[key] = per_key.get(key, 0) + 1
+        self.total += count
+
+        if len(self._records) > self.size:
+            self._evict()
+
+    def extend(self, transactions: Iterable[Dict]) -> None:
+        """Insere vários registros em ordem"""
+        for transaction in transactions:
+            self.add(transaction)
+
+    def _evict(self) -> None:
+        """Remove o registro mais antigo e desconta suas somas"""
+        keys, count, _ = self._records.popleft()
+        self.total -= count
+        for dimension, key in zip(DIMENSIONS, keys):
+            if key is None:
+                continue
+            counts = self.counts[dimension]
+            per_key = self._records_per_key[dimension]
+            counts[key] -= count
+            per_key[key] -= 1
+
+            # Chave sem registros na janela deixa de aparecer nas contagens
+            if per_key[key] == 0:
+                del per_key[key]
+                del counts[key]
+
+    def clear(self) -> None:
+        """Esvazia a janela"""
+        self._records.clear()
+        self.counts = {dimension: {} for dimension in DIMENSIONS}
+        self._records_per_key = {dimension: {} for dimension in DIMENSIONS}
+        self.total = 0
+
+    def snapshot(self, dimension: str = 'status') -> Dict:
+        """Retorna uma cópia das contagens da dimensão ('status' ou 'auth_code')"""
+        return dict(self.counts[dimension])
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Itera sobre os registros da janela, do mais antigo ao mais recente"""
+        return (transaction for _, _, transaction in self._records)
+
+
+class MinuteWindow:
+    """
+    Janelas de um minuto indexadas pelo timestamp do evento
+
+    Cada minuto aberto guarda apenas as somas por status e por auth code
+    ({"status": {...}, "auth_code": {...}}). Um minuto é
+    fechado quando o maior timestamp já visto (watermark) passa do fim
+    do minuto mais a tolerância de atraso; registros que chegam para um
+    minuto já fechado são descartados e contabilizados em `late_records`.
+
+    Sem eventos novos o watermark só anda com advance_clock: a partir do
+    último avanço ele acompanha o relógio, então um minuto fecha mesmo se
+    o fluxo parar (queda total), `allowed_lateness` segundos após o seu fim
+    no tempo do evento mais o intervalo entre chamadas.
+    """
+
+    def __init__(self, allowed_lateness: float = 10, max_open_minutes: int = 15):
+        """
+        Args:
+            allowed_lateness: Segundos de tolerância para registros fora de ordem
+            max_open_minutes: Limite de minutos abertos (os mais antigos são fechados)
+        """
+        self.allowed_lateness = allowed_lateness
+        self.max_open_minutes = max_open_minutes
+        self._buckets = {}
+        # Heap com os minutos abertos, para expirar sempre o mais antigo
+        self._open = []
+        self._closed_through = None
+        self.watermark = None
+        # Relógio (monotonic) do último avanço do watermark
+        self._watermark_clock = None
+        self.late_records = 0
+
+    @staticmethod
+    def to_epoch(timestamp) -> float:
+        """Converte timestamp (ISO, datetime ou epoch) em segundos desde epoch"""
+        if timestamp is None:
+            return datetime.now().timestamp()
+        if isinstance(timestamp, (int, float)):
+            return float(timestamp)
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return timestamp.timestamp()
+
+    @staticmethod
+    def minute_start(minute: int) -> datetime:
+        """Início (horário local) de um minuto identificado por epoch // 60"""
+        return datetime.fromtimestamp(minute * 60)
+
+    def add(self, transaction: Dict) -> Tuple[Optional[int], List[Tuple[int, Dict]]]:
+        """
+        Insere um registro no minuto do seu timestamp
+
+        Returns:
+            (minuto do registro ou None se chegou atrasado, minutos fechados)
+        """
+        epoch = self.to_epoch(transaction.get('timestamp'))
+        minute = int(epoch // 60)
+
+        if self._closed_through is not None and minute <= self._closed_through:
+            self.late_records += 1
+            return None, self.advance(epoch)
+
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            bucket = self._buckets[minute] = {dimension: {} for dimension in DIMENSIONS}
+            heapq.heappush(self._open, minute)
+
+        count = transaction.get('count', 1)
+        for dimension, key in zip(DIMENSIONS, record_keys(transaction)):
+            if key is not None:
+                counts = bucket[dimension]
+                counts[key] = counts.get(key, 0) + count
+
+        return minute, self.advance(epoch)
+
+    def advance(self, epoch: float = None, now: float = None) -> List[Tuple[int, Dict]]:
+        """Avança o watermark e fecha os minutos que expiraram"""
+        if epoch is not None and (self.watermark is None or epoch > self.watermark):
+            self.watermark = epoch
+            self._watermark_clock = time.monotonic() if now is None else now
+
+        closed = []
+        while self._open:
+            oldest = self._open[0]
+            expired = (self.watermark is not None and
+                       self.watermark >= (oldest + 1) * 60 + self.allowed_lateness)
+            if not expired and len(self._open) <= self.max_open_minutes:
+                break
+            heapq.heappop(self._open)
+            closed.append((oldest, self._buckets.pop(oldest)))
+            self._closed_through = oldest
+
+        return closed
+
+    def advance_clock(self, now: float = None) -> List[Tuple[int, Dict]]:
+        """
+        Avança o watermark pelo tempo de relógio desde o último avanço
+
+        Chamada periodicamente, fecha os minutos de um fluxo que parou de
+        chegar. Eventos com timestamp atrás do watermark continuam valendo
+        até o minuto deles fechar; depois disso contam como atrasados.
+
+        Args:
+            now: Relógio atual (time.monotonic); padrão: agora
+        """
+        if self.watermark is None:
+            return []
+        now = time.monotonic() if now is None else now
+        return self.advance(self.watermark + max(0.0, now - self._watermark_clock), now)
+
+    def is_open(self, minute: int) -> bool:
+        """Indica se o minuto ainda está aberto"""
+        return minute in self._buckets
+
+    def open_counts(self, minute: int) -> Dict:
+        """Contagens parciais (por dimensão) de um minuto ainda aberto"""
+        bucket = self._buckets.get(minute, {})
+        return {dimension: dict(bucket.get(dimension, {})) for dimension in DIMENSIONS}
+
+    def clear(self) -> None:
+        """Descarta todos os minutos e o watermark"""
+        self._buckets = {}
+        self._open = []
+        self._closed_through = None
+        self.watermark = None
+        self._watermark_clock = None
+        self.late_records = 0
+
+    def __len__(self) -> int:
+        """Quantidade de minutos abertos"""
+        return len(self._buckets)
@@ -1,49 +1,606 @@
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import json
+import re
 import sqlite3
 from datetime import datetime
 import os
 
+from data_loader import file_hash, read_auth_codes, read_checkout, read_transactions
+
+# Banco analítico persistente, reaproveitado entre execuções (':memory:' = temporário)
+ANALYTICS_DB_PATH = os.environ.get('MONITORING_ANALYTICS_DB', 'data/analytics.db')
+
+# Versão do esquema (PRAGMA user_version); bancos antigos têm as rollups reconstruídas
+SCHEMA_VERSION = 2
+
+# Linhas exibidas no terminal por execute_query (o DataFrame retornado é completo)
+PRINT_ROWS = 50
+# Linhas por bloco ao ler o cursor em modo streaming (iter_query / export_query)
+QUERY_CHUNKSIZE = 10000
+# Resultados maiores que isso não vão para o cache (use export_query)
+CACHE_MAX_ROWS = 100000
+# Comandos que alteram o banco: a query não é lida nem gravada no cache
+# (inclusive WITH ... DELETE/UPDATE, que começa como uma consulta)
+WRITE_KEYWORDS = re.compile(
+    r'\b(insert|update|delete|replace\s+into|create|drop|alter|attach|detach|pragma|vacuum|reindex)\b',
+    re.IGNORECASE)
+
+# Contagens por minuto com tipos compactos: timestamp em epoch (s) e
+# status/auth code como inteiro. Índices cobrem as janelas (PARTITION BY
+# status ORDER BY timestamp) e os agrupamentos por minuto. As views
+# `transactions` e `auth_code_transactions` mantêm o formato original
+# (timestamp e nomes em texto) para queries avulsas.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS transaction_counts (
+    ts INTEGER NOT NULL,
+    status_id INTEGER NOT NULL REFERENCES statuses(id),
+    count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transaction_counts_status_ts
+    ON transaction_counts(status_id, ts, count);
+CREATE INDEX IF NOT EXISTS idx_transaction_counts_ts
+    ON transaction_counts(ts);
+CREATE VIEW IF NOT EXISTS transactions AS
+    SELECT datetime(t.ts, 'unixepoch') AS timestamp, s.name AS status, t.count AS count
+    FROM transaction_counts t JOIN statuses s ON s.id = t.status_id;
+CREATE TABLE IF NOT EXISTS auth_codes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS auth_code_counts (
+    ts INTEGER NOT NULL,
+    code_id INTEGER NOT NULL REFERENCES auth_codes(id),
+    count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_auth_code_counts_code_ts
+    ON auth_code_counts(code_id, ts, count);
+CREATE VIEW IF NOT EXISTS auth_code_transactions AS
+    SELECT datetime(t.ts, 'unixepoch') AS timestamp, c.name AS auth_code, t.count AS count
+    FROM auth_code_counts t JOIN auth_codes c ON c.id = t.code_id;
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    data_version TEXT NOT NULL,
+    created TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    rows TEXT NOT NULL
+);
+"""
+
+# Fontes de contagens por minuto: coluna do CSV, tabela de nomes e tabela compacta
+COUNT_SOURCES = {
+    'transactions': {'reader': read_transactions, 'column': 'status', 'names': 'statuses',
+                     'table': 'transaction_counts', 'key': 'status_id', 'dimension': 'status'},
+    'auth_codes': {'reader': read_auth_codes, 'column': 'auth_code', 'names': 'auth_codes',
+                   'table': 'auth_code_counts', 'key': 'code_id', 'dimension': 'auth_code'}
+}
+
+# Granularidades das rollups, da mais agregada para a mais fina (segundos)
+ROLLUP_GRAINS = [('day', 86400), ('hour', 3600), ('minute', 60)]
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',       # 64 MB
+    'PRAGMA mmap_size=268435456'      # 256 MB
+]
+
+def rollup_schema():
+    """
+    Rollups materializadas: por status e por auth code (hora e dia) e
+    totais de todos os status com aprovadas (minuto, hora e dia)
+    
+    `<dimensão>_by_minute` é uma view sobre a tabela de minutos com as
+    mesmas colunas das rollups, para toda granularidade ter o mesmo formato.
+    """
+    statements = []
+    for config in COUNT_SOURCES.values():
+        dimension, key = config['dimension'], config['key']
+        for grain, _ in ROLLUP_GRAINS[:-1]:
+            statements.append(f"""
+CREATE TABLE IF NOT EXISTS {dimension}_by_{grain} (
+    {key} INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    counted INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    min_count INTEGER,
+    max_count INTEGER,
+    PRIMARY KEY ({key}, bucket)
+) WITHOUT ROWID;""")
+        statements.append(f"""
+CREATE VIEW IF NOT EXISTS {dimension}_by_minute AS
+    SELECT {key}, ts AS bucket, 1 AS records, (count IS NOT NULL) AS counted,
+           COALESCE(count, 0) AS total, count AS min_count, count AS max_count
+    FROM {config['table']};""")
+    for grain, _ in ROLLUP_GRAINS:
+        statements.append(f"""
+CREATE TABLE IF NOT EXISTS totals_by_{grain} (
+    bucket INTEGER PRIMARY KEY,
+    records INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    approved INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_totals_by_{grain}_total ON totals_by_{grain}(total);""")
+    return '\n'.join(statements)
+
 class SQLAnalyzer:
-    def __init__(self, checkout_path=None, transactions_path=None):
-        """Inicializa conexão SQLite e carrega dados"""
-        self.conn = sqlite3.connect(':memory:')
+    def __init__(self, checkout_path=None, transactions_path=None, db_path=ANALYTICS_DB_PATH,
+                 auth_codes_path=None):
+        """
+        Abre o banco analítico e sincroniza com os CSVs
+        
+        CSV sem mudança (tamanho e mtime) não é relido; CSV que só cresceu
+        tem apenas as linhas novas acrescentadas (e somadas às rollups);
+        qualquer outra mudança recarrega aquela fonte.
+        """
+        if db_path != ':memory:' and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.executescript(SCHEMA + rollup_schema())
+        self._migrate()
         
         # Carregar checkout se fornecido
+        self.checkout_rows = 0
         if checkout_path and os.path.exists(checkout_path):
-            self.df_checkout = pd.read_csv(checkout_path)
-            self.df_checkout.to_sql('checkouts', self.conn, if_exists='replace', index=False)
-            print(f"✓ Checkout carregado no SQLite: {len(self.df_checkout)} registros")
-        else:
-            self.df_checkout = None
+            self.checkout_rows, action = self._sync_checkout(checkout_path)
+            print(f"✓ Checkout no SQLite ({action}): {self.checkout_rows} registros")
             
         # Carregar transações se fornecido
+        self.transaction_rows = 0
         if transactions_path and os.path.exists(transactions_path):
-            self.df_trans = pd.read_csv(transactions_path)
-            self.df_trans.to_sql('transactions', self.conn, if_exists='replace', index=False)
-            print(f"✓ Transações carregadas no SQLite: {len(self.df_trans)} registros")
-        else:
-            self.df_trans = None
-        
-    def execute_query(self, query, description):
-        """Executa query e exibe resultados"""
+            self.transaction_rows, action = self._sync_counts('transactions', transactions_path)
+            print(f"✓ Transações no SQLite ({action}): {self.transaction_rows} registros")
+        
+        # Carregar auth codes se fornecido
+        self.auth_code_rows = 0
+        if auth_codes_path and os.path.exists(auth_codes_path):
+            self.auth_code_rows, action = self._sync_counts('auth_codes', auth_codes_path)
+            print(f"✓ Auth codes no SQLite ({action}): {self.auth_code_rows} registros")
+        
+        # Resultados em cache de dados que já não estão no banco
+        with self.conn:
+            self.conn.execute('DELETE FROM query_cache WHERE data_version != ?',
+                              (self.data_version(),))
+        self._writes_seen = self._write_marker()
+    
+    def _migrate(self):
+        """Banco de versão anterior: reconstruir as rollups a partir dos minutos"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            for config in COUNT_SOURCES.values():
+                self._clear_rollups(config)
+                self._update_rollups(config, after_rowid=0)
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    def _source_state(self, name, path):
+        """
+        Compara o CSV com o que já está no banco
+        
+        Returns:
+            ('unchanged' | 'appended' | 'reloaded', linhas já carregadas,
+             fingerprint a registrar ou None se o registro já está em dia)
+        """
+        stat = os.stat(path)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        row = self.conn.execute('SELECT size, mtime_ns, sha256, rows FROM sources WHERE name = ?',
+                                (name,)).fetchone()
+        if row is None:
+            return 'reloaded', 0, fingerprint
+        
+        size, mtime_ns, sha256, rows = row
+        if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return 'unchanged', rows, None
+        # Mesmo início do que foi carregado: arquivo igual (só mtime mudou) ou só cresceu
+        if stat.st_size >= size and file_hash(path, size) == sha256:
+            return ('unchanged' if stat.st_size == size else 'appended'), rows, fingerprint
+        return 'reloaded', 0, fingerprint
+    
+    def _save_source(self, name, path, fingerprint, rows):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO sources (name, size, mtime_ns, sha256, rows) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (name, fingerprint['size'], fingerprint['mtime_ns'],
+             file_hash(path, fingerprint['size']), rows))
+    
+    def _sync_checkout(self, path):
+        """Tabela checkouts (poucas linhas: recarregada inteira quando o CSV muda)"""
+        name = f'checkouts:{os.path.abspath(path)}'
+        action, rows, fingerprint = self._source_state(name, path)
+        if action == 'unchanged' and self._table_exists('checkouts'):
+            if fingerprint is not None:
+                with self.conn:
+                    self._save_source(name, path, fingerprint, rows)
+            return rows, action
+        
+        df = read_checkout(path)
+        with self.conn:
+            # Uma fonte de checkout por banco: a anterior é substituída
+            self.conn.execute("DELETE FROM sources WHERE name LIKE 'checkouts:%'")
+            df.to_sql('checkouts', self.conn, if_exists='replace', index=False)
+            self._save_source(name, path, fingerprint or self._fingerprint(path), len(df))
+        return len(df), 'reloaded'
+    
+    def _sync_counts(self, source, path):
+        """Contagens por minuto (e rollups): nada, só as linhas novas ou recarga completa"""
+        config = COUNT_SOURCES[source]
+        name = f'{source}:{os.path.abspath(path)}'
+        action, rows, fingerprint = self._source_state(name, path)
+        if action == 'unchanged':
+            if fingerprint is not None:
+                with self.conn:
+                    self._save_source(name, path, fingerprint, rows)
+            return rows, action
+        
+        # Valores como estão no arquivo (as queries tratam maiúsculas)
+        df = config['reader'](path, normalize=False, skip_rows=rows)
+        with self.conn:
+            if action == 'reloaded':
+                # Uma fonte de cada tipo por banco: a anterior é substituída
+                self.conn.execute(f"DELETE FROM {config['table']}")
+                self._clear_rollups(config)
+                self.conn.execute('DELETE FROM sources WHERE name LIKE ?', (f'{source}:%',))
+            after_rowid = self.conn.execute(
+                f"SELECT COALESCE(MAX(rowid), 0) FROM {config['table']}").fetchone()[0]
+            self._append_counts(config, df)
+            # Rollups recebem só a contribuição das linhas novas
+            self._update_rollups(config, after_rowid)
+            rows += len(df)
+            self._save_source(name, path, fingerprint, rows)
+        
+        # Estatísticas para o planejador escolher os índices
+        self.conn.execute('ANALYZE')
+        return rows, action
+    
+    @staticmethod
+    def _fingerprint(path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    def _append_counts(self, config, df):
+        """Insere linhas (timestamp texto, nome texto) no formato compacto"""
+        import pandas as pd
+        
+        names = df[config['column']].astype(str)
+        self.conn.executemany(f"INSERT OR IGNORE INTO {config['names']} (name) VALUES (?)",
+                              [(name,) for name in pd.unique(names)])
+        ids = dict(self.conn.execute(f"SELECT name, id FROM {config['names']}"))
+        
+        epoch = ((pd.to_datetime(df['timestamp']) - pd.Timestamp(0))
+                 // pd.Timedelta(seconds=1)).tolist()
+        counts = df['count'].astype(object).where(df['count'].notna(), None).tolist()
+        self.conn.executemany(
+            f"INSERT INTO {config['table']} (ts, {config['key']}, count) VALUES (?, ?, ?)",
+            zip(epoch, names.map(ids).tolist(), counts))
+    
+    def _clear_rollups(self, config):
+        for grain, _ in ROLLUP_GRAINS[:-1]:
+            self.conn.execute(f"DELETE FROM {config['dimension']}_by_{grain}")
+        if config['dimension'] == 'status':
+            for grain, _ in ROLLUP_GRAINS:
+                self.conn.execute(f'DELETE FROM totals_by_{grain}')
+    
+    def _update_rollups(self, config, after_rowid):
+        """Soma às rollups as linhas com rowid > after_rowid (upsert por bucket)"""
+        table, key = config['table'], config['key']
+        for grain, seconds in ROLLUP_GRAINS[:-1]:
+            self.conn.execute(f"""
+                INSERT INTO {config['dimension']}_by_{grain}
+                    ({key}, bucket, records, counted, total, min_count, max_count)
+                SELECT {key}, ts - ts % {seconds}, COUNT(*), COUNT(count),
+                       COALESCE(SUM(count), 0), MIN(count), MAX(count)
+                FROM {table}
+                WHERE rowid > ?
+                GROUP BY {key}, ts - ts % {seconds}
+                ON CONFLICT ({key}, bucket) DO UPDATE SET
+                    records = records + excluded.records,
+                    counted = counted + excluded.counted,
+                    total = total + excluded.total,
+                    min_count = MIN(COALESCE(min_count, excluded.min_count),
+                                    COALESCE(excluded.min_count, min_count)),
+                    max_count = MAX(COALESCE(max_count, excluded.max_count),
+                                    COALESCE(excluded.max_count, max_count))
+                """, (after_rowid,))
+        
+        if config['dimension'] != 'status':
+            return
+        for grain, seconds in ROLLUP_GRAINS:
+            self.conn.execute(f"""
+                INSERT INTO totals_by_{grain} (bucket, records, total, approved)
+                SELECT ts - ts % {seconds}, COUNT(*), COALESCE(SUM(count), 0),
+                       COALESCE(SUM(CASE WHEN status_id IN (
+                           SELECT id FROM statuses WHERE UPPER(name) = 'APPROVED')
+                           THEN count ELSE 0 END), 0)
+                FROM transaction_counts
+                WHERE rowid > ?
+                GROUP BY ts - ts % {seconds}
+                ON CONFLICT (bucket) DO UPDATE SET
+                    records = records + excluded.records,
+                    total = total + excluded.total,
+                    approved = approved + excluded.approved
+                """, (after_rowid,))
+    
+    def rollup_table(self, dimension, grain='all'):
+        """
+        Tabela mais agregada que responde a uma consulta na granularidade pedida
+        
+        Args:
+            dimension: 'status', 'auth_code' ou 'totals' (todos os status somados)
+            grain: 'minute', 'hour', 'day', segundos (ex.: 6 * 3600) ou 'all'
+                   (sem agrupamento no tempo)
+        
+        Returns:
+            Nome da tabela (colunas bucket, records, total, ...)
+        """
+        seconds = dict(ROLLUP_GRAINS).get(grain, grain)
+        for name, size in ROLLUP_GRAINS:
+            if grain == 'all' or seconds % size == 0:
+                return f'{dimension}_by_{name}'
+        raise ValueError(f'Granularidade sem rollup: {grain}')
+    
+    def _table_exists(self, table):
+        return self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (table,)).fetchone() is not None
+        
+    def data_version(self):
+        """
+        Versão dos dados carregados: muda quando alguma fonte é carregada,
+        acrescida ou recarregada (conteúdo, não só mtime)
+        """
+        sources = self.conn.execute('SELECT name, sha256, rows FROM sources ORDER BY name').fetchall()
+        payload = json.dumps([SCHEMA_VERSION, sources])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    
+    def _write_marker(self):
+        """
+        Contadores de escrita: linhas alteradas por esta conexão, commits de
+        outras conexões (PRAGMA data_version) e mudanças de esquema
+        """
+        return (self.conn.total_changes,
+                self.conn.execute('PRAGMA data_version').fetchone()[0],
+                self.conn.execute('PRAGMA schema_version').fetchone()[0])
+    
+    def _discard_stale_cache(self):
+        """
+        Esvazia o cache se o banco foi alterado fora das cargas das fontes
+        (DML pela conexão ou por outro processo): data_version() só
+        acompanha as fontes
+        """
+        marker = self._write_marker()
+        if marker != self._writes_seen:
+            with self.conn:
+                self.conn.execute('DELETE FROM query_cache')
+            marker = self._write_marker()
+        self._writes_seen = marker
+    
+    @staticmethod
+    def is_read_only(query):
+        """SELECT/WITH sem comando de escrita (literais e comentários não contam)"""
+        code = re.sub(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", ' ', query, flags=re.DOTALL)
+        return re.match(r'(?i)\s*(select|with)\b', code) is not None \
+            and WRITE_KEYWORDS.search(code) is None
+    
+    @staticmethod
+    def normalize_query(query):
+        """SQL com espaços, quebras de linha e ';' final normalizados (literais preservados)"""
+        normalized = re.sub(r"('(?:[^']|'')*')|\s+",
+                            lambda m: m.group(1) or ' ', query).strip()
+        return normalized.rstrip(';').strip()
+    
+    def _cache_key(self, query):
+        return hashlib.sha256(self.normalize_query(query).encode('utf-8')).hexdigest()
+    
+    def _cached_result(self, key, version):
+        """(colunas, linhas) em cache para a query e a versão dos dados, ou None"""
+        row = self.conn.execute('SELECT columns, rows FROM query_cache WHERE key = ? AND data_version = ?',
+                                (key, version)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), [tuple(r) for r in json.loads(row[1])]
+    
+    def _store_result(self, key, version, columns, rows):
+        if len(rows) > CACHE_MAX_ROWS:
+            return
+        try:
+            payload = json.dumps(rows)
+        except (TypeError, ValueError):
+            # Valores não representáveis em JSON (ex.: BLOB): sem cache
+            return
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO query_cache (key, data_version, created, columns, rows) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, version, datetime.now().isoformat(), json.dumps(columns), payload))
+        # A própria gravação no cache não invalida o cache
+        self._writes_seen = self._write_marker()
+    
+    def run_query(self, query, cache=True):
+        """
+        Resultado completo da query como DataFrame
+        
+        Com cache, uma query já executada sobre os mesmos dados (mesma
+        data_version e nenhuma escrita no banco desde então) é respondida
+        sem tocar nas tabelas. Só consultas (is_read_only) entram no cache;
+        queries não determinísticas (random(), 'now') devem usar cache=False.
+        Escritas feitas por outro processo enquanto o banco estava fechado
+        não são detectadas (só recargas das fontes).
+        
+        Returns:
+            (DataFrame, se veio do cache)
+        """
+        import pandas as pd
+        
+        cacheable = cache and self.is_read_only(query)
+        if cacheable:
+            self._discard_stale_cache()
+            key, version = self._cache_key(query), self.data_version()
+            cached = self._cached_result(key, version)
+            if cached is not None:
+                columns, rows = cached
+                return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True), True
+        
+        changes = self.conn.total_changes
+        cursor = self.conn.execute(query)
+        columns = [column[0] for column in cursor.description or []]
+        rows = cursor.fetchall()
+        # Query que alterou linhas (ex.: função com efeito colateral) não vai para o cache
+        if cacheable and self.conn.total_changes == changes:
+            self._store_result(key, version, columns, rows)
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True), False
+    
+    def iter_query(self, query, chunksize=QUERY_CHUNKSIZE):
+        """
+        Resultado em blocos de `chunksize` linhas (DataFrames), lidos do
+        cursor sob demanda: a memória não depende do tamanho do resultado
+        """
+        import pandas as pd
+        
+        cursor = self.conn.execute(query)
+        columns = [column[0] for column in cursor.description or []]
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    
+    def export_query(self, query, path, chunksize=QUERY_CHUNKSIZE):
+        """
+        Grava o resultado direto do cursor em CSV ou Parquet (pela extensão)
+        
+        CSV é escrito linha a linha dos blocos do cursor, sem DataFrame;
+        Parquet (requer pyarrow) grava um row group por bloco.
+        
+        Returns:
+            Quantidade de linhas gravadas
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Exportar Parquet requer pyarrow (pip install pyarrow)")
+            
+            total = 0
+            writer = None
+            try:
+                for chunk in self.iter_query(query, chunksize):
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    else:
+                        table = table.cast(writer.schema)
+                    writer.write_table(table)
+                    total += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+            return total
+        
+        cursor = self.conn.execute(query)
+        total = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([column[0] for column in cursor.description or []])
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                total += len(rows)
+        return total
+    
+    def execute_query(self, query, description, output=None, cache=True, max_rows=PRINT_ROWS):
+        """
+        Executa query e exibe resultados
+        
+        Args:
+            query: SQL
+            description: Título exibido
+            output: Arquivo .csv ou .parquet; o resultado vai direto do cursor
+                    para o arquivo (streaming) em vez de virar DataFrame
+            cache: Reaproveitar o resultado da mesma query com os mesmos dados
+            max_rows: Linhas exibidas no terminal
+        
+        Returns:
+            DataFrame (quantidade de linhas gravadas com output; None se falhar)
+        """
         print("\n" + "="*60)
         print(f"QUERY: {description}")
         print("="*60)
         print(f"\nSQL:\n{query}\n")
         
         try:
-            result = pd.read_sql_query(query, self.conn)
+            if output:
+                rows = self.export_query(query, output)
+                print(f"✓ {rows} linhas gravadas em {output}")
+                return rows
+            
+            result, cached = self.run_query(query, cache)
             print("Resultado:")
-            print(result.to_string())
-            print(f"\nTotal de linhas: {len(result)}")
+            print(result.head(max_rows).to_string())
+            if len(result) > max_rows:
+                print(f"... ({len(result) - max_rows} linhas não exibidas)")
+            print(f"\nTotal de linhas: {len(result)}" + (" (cache)" if cached else ""))
             return result
         except Exception as e:
             print(f"ERRO: {e}")
             return None
     
+    def export_query_file(self, sql_path='queries/sql_queries.sql', output_dir='queries/results',
+                          fmt='csv'):
+        """
+        Executa cada query de um arquivo .sql gravando o resultado em
+        output_dir (query_01.csv, ...), em streaming: queries sem LIMIT
+        (acumulados, tendências) não são carregadas em memória
+        
+        Returns:
+            Lista de (arquivo, linhas) por query
+        """
+        with open(sql_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        
+        # Separar as queries (sqlite3.complete_statement reconhece o ';' final)
+        statements, current = [], []
+        for line in lines:
+            if line.strip().startswith('--') and not current:
+                continue
+            current.append(line)
+            text = '\n'.join(current)
+            if sqlite3.complete_statement(text):
+                if text.strip():
+                    statements.append(text)
+                current = []
+        
+        results = []
+        for i, statement in enumerate(statements, 1):
+            path = os.path.join(output_dir, f'query_{i:02d}.{fmt}')
+            rows = self.execute_query(statement, f"{os.path.basename(sql_path)} #{i}", output=path)
+            results.append((path, rows))
+        return results
+    
     def run_checkout_analysis(self):
         """Executa análises nos dados de checkout"""
-        if self.df_checkout is None:
+        if not self.checkout_rows:
             print("⚠️  Dados de checkout não carregados")
             return
         
@@ -148,7 +705,7 @@ class SQLAnalyzer:
         
     def run_transactions_analysis(self):
         """Executa análises nos dados de transações"""
-        if self.df_trans is None:
+        if not self.transaction_rows:
             print("⚠️  Dados de transações não carregados")
             return
         
@@ -156,71 +713,134 @@ class SQLAnalyzer:
         print("ANÁLISES SQL - TRANSAÇÕES")
         print("="*60)
         
-        # Query 1: Estatísticas por status
-        query1 = """
+        # Queries sobre transaction_counts (ts e status_id indexados) e sobre
+        # as rollups; nomes e timestamps em texto só na saída
+        
+        # Query 1: Estatísticas por status (rollup diária: uma linha por
+        # status e dia em vez de uma por minuto)
+        query1 = f"""
         SELECT 
-            status,
-            COUNT(*) as records,
-            SUM(count) as total_transactions,
-            ROUND(AVG(count), 2) as avg_per_minute,
-            MIN(count) as min_per_minute,
-            MAX(count) as max_per_minute
-        FROM transactions
-        GROUP BY status
+            s.name as status,
+            SUM(r.records) as records,
+            SUM(r.total) as total_transactions,
+            ROUND(SUM(r.total) * 1.0 / SUM(r.counted), 2) as avg_per_minute,
+            MIN(r.min_count) as min_per_minute,
+            MAX(r.max_count) as max_per_minute
+        FROM {self.rollup_table('status')} r
+        JOIN statuses s ON s.id = r.status_id
+        GROUP BY r.status_id
         ORDER BY total_transactions DESC
         """
         self.execute_query(query1, "Estatísticas por Status")
         
-        # Query 2: Evolução temporal
+        # Query 2: Evolução temporal (o acumulado dos primeiros minutos só
+        # depende de minutos anteriores: a janela percorre só esse trecho)
         query2 = """
+        WITH first_minutes AS (
+            SELECT ts FROM transaction_counts ORDER BY ts LIMIT 20
+        )
         SELECT 
-            timestamp,
-            status,
-            count,
-            SUM(count) OVER (PARTITION BY status ORDER BY timestamp) as cumulative_count
-        FROM transactions
-        ORDER BY timestamp, status
+            datetime(t.ts, 'unixepoch') as timestamp,
+            s.name as status,
+            t.count,
+            SUM(t.count) OVER (PARTITION BY t.status_id ORDER BY t.ts) as cumulative_count
+        FROM transaction_counts t
+        JOIN statuses s ON s.id = t.status_id
+        WHERE t.ts <= (SELECT MAX(ts) FROM first_minutes)
+        ORDER BY t.ts, s.name
         LIMIT 20
         """
         self.execute_query(query2, "Evolução Temporal (Primeiros 20)")
         
-        # Query 3: Minutos com maior volume
-        query3 = """
+        # Query 3: Minutos com maior volume (ranking pelos totais por minuto;
+        # o detalhamento por status só para os 10 minutos escolhidos)
+        query3 = f"""
+        WITH top_minutes AS (
+            SELECT bucket, total
+            FROM {self.rollup_table('totals', 'minute')}
+            ORDER BY total DESC
+            LIMIT 10
+        )
         SELECT 
-            timestamp,
-            SUM(count) as total_transactions,
-            GROUP_CONCAT(status || ':' || count) as breakdown
-        FROM transactions
-        GROUP BY timestamp
+            datetime(m.bucket, 'unixepoch') as timestamp,
+            m.total as total_transactions,
+            GROUP_CONCAT(s.name || ':' || t.count) as breakdown
+        FROM top_minutes m
+        JOIN transaction_counts t ON t.ts = m.bucket
+        JOIN statuses s ON s.id = t.status_id
+        GROUP BY m.bucket
         ORDER BY total_transactions DESC
-        LIMIT 10
         """
         self.execute_query(query3, "Top 10 Minutos com Maior Volume")
         
         # Query 4: Taxa de aprovação por minuto
-        query4 = """
-        WITH minute_stats AS (
-            SELECT 
-                timestamp,
-                SUM(CASE WHEN UPPER(status) = 'APPROVED' THEN count ELSE 0 END) as approved,
-                SUM(count) as total
-            FROM transactions
-            GROUP BY timestamp
-        )
+        query4 = f"""
         SELECT 
-            timestamp,
+            datetime(bucket, 'unixepoch') as timestamp,
             approved,
             total,
             ROUND((approved * 100.0 / total), 2) as approval_rate
-        FROM minute_stats
+        FROM {self.rollup_table('totals', 'minute')}
         WHERE total > 0
         ORDER BY approval_rate ASC
         LIMIT 10
         """
         self.execute_query(query4, "Top 10 Minutos com Menor Taxa de Aprovação")
+        
+        # Query 5: Volume e aprovação por dia
+        query5 = f"""
+        SELECT 
+            date(bucket, 'unixepoch') as day,
+            records,
+            total as total_transactions,
+            approved,
+            ROUND((approved * 100.0 / total), 2) as approval_rate
+        FROM {self.rollup_table('totals', 'day')}
+        WHERE total > 0
+        ORDER BY bucket
+        """
+        self.execute_query(query5, "Volume e Taxa de Aprovação por Dia")
+    
+    def run_auth_code_analysis(self):
+        """Executa análises nos dados de auth codes"""
+        if not self.auth_code_rows:
+            print("⚠️  Dados de auth codes não carregados")
+            return
+        
+        print("\n" + "="*60)
+        print("ANÁLISES SQL - AUTH CODES")
+        print("="*60)
+        
+        # Query 1: Volume por auth code e hora (rollup horária)
+        query1 = f"""
+        SELECT 
+            datetime(r.bucket, 'unixepoch') as hour,
+            c.name as auth_code,
+            r.total as total_transactions,
+            r.max_count as max_per_minute
+        FROM {self.rollup_table('auth_code', 'hour')} r
+        JOIN auth_codes c ON c.id = r.code_id
+        WHERE r.total > 0
+        ORDER BY r.bucket, r.total DESC
+        """
+        self.execute_query(query1, "Volume por Auth Code e Hora")
+        
+        # Query 2: Participação de cada auth code no total
+        query2 = f"""
+        SELECT 
+            c.name as auth_code,
+            SUM(r.total) as total_transactions,
+            ROUND(SUM(r.total) * 100.0 / (SELECT SUM(total) FROM {self.rollup_table('auth_code')}), 2)
+                as percent_of_total
+        FROM {self.rollup_table('auth_code')} r
+        JOIN auth_codes c ON c.id = r.code_id
+        GROUP BY r.code_id
+        ORDER BY total_transactions DESC
+        """
+        self.execute_query(query2, "Participação por Auth Code")
     
     def save_queries_to_file(self):
-        """Salva queries em arquivo SQL"""
+        """Salva queries em arquivo SQL (transações sobre as rollups, como as embutidas)"""
         os.makedirs('queries', exist_ok=True)
         
         queries = """-- =====================================================
@@ -316,72 +936,70 @@ ORDER BY today DESC;
 -- =====================================================
 
 -- 6. ESTATÍSTICAS POR STATUS
--- Volume e médias por status de transação
+-- Volume e médias por status de transação (rollup diária por status)
 SELECT 
-    status,
-    COUNT(*) as records,
-    SUM(count) as total_transactions,
-    ROUND(AVG(count), 2) as avg_per_minute,
-    MIN(count) as min_per_minute,
-    MAX(count) as max_per_minute
-FROM transactions
-GROUP BY status
+    s.name as status,
+    SUM(r.records) as records,
+    SUM(r.total) as total_transactions,
+    ROUND(SUM(r.total) * 1.0 / SUM(r.counted), 2) as avg_per_minute,
+    MIN(r.min_count) as min_per_minute,
+    MAX(r.max_count) as max_per_minute
+FROM {status_all} r
+JOIN statuses s ON s.id = r.status_id
+GROUP BY r.status_id
 ORDER BY total_transactions DESC;
 
 -- 7. EVOLUÇÃO TEMPORAL
--- Mostra acumulado de transações ao longo do tempo
+-- Mostra acumulado de transações por hora (rollup horária por status)
 SELECT 
-    timestamp,
-    status,
-    count,
-    SUM(count) OVER (PARTITION BY status ORDER BY timestamp) as cumulative_count
-FROM transactions
-ORDER BY timestamp, status;
+    datetime(r.bucket, 'unixepoch') as hour,
+    s.name as status,
+    r.total as count,
+    SUM(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as cumulative_count
+FROM {status_hour} r
+JOIN statuses s ON s.id = r.status_id
+ORDER BY r.bucket, s.name;
 
 -- 8. MINUTOS COM MAIOR VOLUME
--- Top minutos com mais transações
+-- Top minutos com mais transações (totais por minuto, indexados pelo total)
 SELECT 
-    timestamp,
-    SUM(count) as total_transactions
-FROM transactions
-GROUP BY timestamp
-ORDER BY total_transactions DESC
+    datetime(bucket, 'unixepoch') as timestamp,
+    total as total_transactions
+FROM {totals_minute}
+ORDER BY total DESC
 LIMIT 10;
 
 -- 9. TAXA DE APROVAÇÃO
--- Percentual de transações aprovadas por minuto
-WITH minute_stats AS (
-    SELECT 
-        timestamp,
-        SUM(CASE WHEN UPPER(status) = 'APPROVED' THEN count ELSE 0 END) as approved,
-        SUM(count) as total
-    FROM transactions
-    GROUP BY timestamp
-)
+-- Percentual de transações aprovadas por minuto (totais por minuto)
 SELECT 
-    timestamp,
+    datetime(bucket, 'unixepoch') as timestamp,
     approved,
     total,
     ROUND((approved * 100.0 / total), 2) as approval_rate
-FROM minute_stats
+FROM {totals_minute}
 WHERE total > 0
 ORDER BY approval_rate DESC;
 
 -- 10. ANÁLISE DE TENDÊNCIAS
--- Compara cada minuto com o anterior
+-- Compara cada minuto com o anterior (mesmo formato das rollups)
 SELECT 
-    t1.timestamp,
-    t1.status,
-    t1.count as current_count,
-    LAG(t1.count) OVER (PARTITION BY t1.status ORDER BY t1.timestamp) as previous_count,
-    t1.count - LAG(t1.count) OVER (PARTITION BY t1.status ORDER BY t1.timestamp) as change
-FROM transactions t1
-ORDER BY t1.timestamp DESC, t1.status;
+    datetime(r.bucket, 'unixepoch') as timestamp,
+    s.name as status,
+    r.total as current_count,
+    LAG(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as previous_count,
+    r.total - LAG(r.total) OVER (PARTITION BY r.status_id ORDER BY r.bucket) as change
+FROM {status_minute} r
+JOIN statuses s ON s.id = r.status_id
+ORDER BY r.bucket DESC, s.name;
 
 -- =====================================================
 -- FIM DAS QUERIES
 -- =====================================================
-""".format(timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+""".format(timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+           status_all=self.rollup_table('status'),
+           status_hour=self.rollup_table('status', 'hour'),
+           status_minute=self.rollup_table('status', 'minute'),
+           totals_minute=self.rollup_table('totals', 'minute'))
         
         with open('queries/sql_queries.sql', 'w', encoding='utf-8') as f:
             f.write(queries)
@@ -390,10 +1008,19 @@ ORDER BY t1.timestamp DESC, t1.status;
     
     def close(self):
         """Fecha conexão"""
+        self.conn.execute('PRAGMA optimize')
         self.conn.close()
 
 # Executar
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Análises SQL dos dados de monitoramento')
+    parser.add_argument('--export-dir', default=None,
+                        help='Executar também queries/sql_queries.sql gravando cada resultado '
+                             'nesta pasta (streaming, sem carregar em memória)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Formato dos arquivos de --export-dir (parquet requer pyarrow)')
+    args = parser.parse_args()
+    
     print("\n" + "="*60)
     print("SQL ANALYZER - CloudWalk Monitoring")
     print("="*60)
@@ -401,16 +1028,22 @@ if __name__ == "__main__":
     # Criar analyzer
     analyzer = SQLAnalyzer(
         checkout_path='data/checkout_1.csv',
-        transactions_path='data/transactions.csv'
+        transactions_path='data/transactions.csv',
+        auth_codes_path='data/transactions_auth_codes.csv'
     )
     
     # Executar análises
     analyzer.run_checkout_analysis()
     analyzer.run_transactions_analysis()
+    analyzer.run_auth_code_analysis()
     
     # Salvar queries
     analyzer.save_queries_to_file()
     
+    # Resultados completos das queries do arquivo
+    if args.export_dir:
+        analyzer.export_query_file(output_dir=args.export_dir, fmt=args.format)
+    
     # Fechar conexão
     analyzer.close()
     
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+import random
+
+import pytest
+
+import alert_store
+from alert_store import AlertStore
+
+
+class FakeDatetime(datetime):
+    """Substitui datetime em alert_store: datetime.now() controlado pelo teste"""
+
+    current = datetime(2025, 7, 14, 10, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    FakeDatetime.current = datetime(2025, 7, 14, 10, 0)
+    monkeypatch.setattr(alert_store, 'datetime', FakeDatetime)
+    return FakeDatetime
+
+
+def tick(clock, seconds):
+    clock.current += timedelta(seconds=seconds)
+    return clock.current.timestamp()
+
+
+def test_recent_returns_newest_in_order(clock):
+    store = AlertStore(max_alerts=100)
+    for i in range(10):
+        tick(clock, 1)
+        store.add({'severity': 'HIGH', 'n': i})
+
+    assert [a['id'] for a in store.recent(3)] == [8, 9, 10]
+    assert [a['n'] for a in store.recent(50)] == list(range(10))
+    assert store.recent(0) == []
+    assert store.recent(1)[0]['timestamp'] == clock.current.isoformat()
+
+
+def test_ids_continue_across_compaction(clock):
+    store = AlertStore(max_alerts=4)
+    for _ in range(21):
+        tick(clock, 1)
+        store.add({'severity': 'LOW'})
+
+    assert len(store) == 4
+    assert [a['id'] for a in store.recent(10)] == [18, 19, 20, 21]
+    # Listas internas compactadas: no máximo o dobro do retido
+    assert len(store._alerts) == len(store._times) <= 2 * 4
+    assert store.add({'severity': 'LOW'})['id'] == 22
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_between_matches_brute_force(clock, seed):
+    """Consulta por intervalo (bisect) = filtro direto sobre os alertas retidos"""
+    rng = random.Random(seed)
+    store = AlertStore(max_alerts=7, max_age_seconds=30)
+    added = []
+
+    for _ in range(200):
+        # Passo 0 gera timestamps repetidos
+        epoch = tick(clock, rng.choice([0, 1, 2, 5, 12]))
+        alert = store.add({'severity': rng.choice(['HIGH', 'LOW'])})
+        added.append((epoch, alert))
+
+        retained = [(t, a) for t, a in added[-7:] if t >= epoch - 30]
+        assert len(store) == len(retained)
+
+        start = epoch - rng.uniform(0, 60)
+        end = rng.choice([None, start + rng.uniform(0, 30)])
+        severity = rng.choice([None, 'HIGH'])
+        expected = [a for t, a in retained
+                    if t >= start and (end is None or t < end)
+                    and (severity is None or a['severity'] == severity)]
+        assert store.between(start, end, severity) == expected
+
+
+def test_since_and_max_age(clock):
+    store = AlertStore(max_age_seconds=60)
+    store.add({'severity': 'HIGH'})
+    tick(clock, 30)
+    store.add({'severity': 'LOW'})
+    tick(clock, 20)
+    store.add({'severity': 'HIGH'})
+
+    assert [a['id'] for a in store.since(25)] == [2, 3]
+    assert [a['id'] for a in store.since(25, severity='HIGH')] == [3]
+
+    # Alerta 1 passa de 60 s e é descartado na inserção seguinte
+    tick(clock, 15)
+    store.add({'severity': 'LOW'})
+    assert [a['id'] for a in store.recent()] == [2, 3, 4]
+    assert store.between(0) == store.recent()
+
+
+def test_severity_counters_include_discarded(clock):
+    store = AlertStore(max_alerts=2)
+    for severity in ['HIGH', 'LOW', 'HIGH', 'CRITICAL', 'HIGH']:
+        tick(clock, 1)
+        store.add({'severity': severity})
+    store.add({'message': 'sem severidade'})
+
+    assert len(store) == 2
+    assert store.counters() == (6, {'HIGH': 3, 'LOW': 1, 'CRITICAL': 1, 'UNKNOWN': 1})
+
+    store.clear()
+    assert store.counters() == (0, {})
+    assert len(store) == 0 and store.recent() == []
+    assert store.add({'severity': 'LOW'})['id'] == 1
+
+
+def test_restore_continues_ids_and_counts(clock):
+    source = AlertStore()
+    for severity in ['HIGH', 'LOW', 'HIGH']:
+        tick(clock, 1)
+        source.add({'severity': severity})
+
+    store = AlertStore()
+    store.restore(source.recent())
+    assert store.counters() == (3, {'HIGH': 2, 'LOW': 1})
+    assert store.add({'severity': 'LOW'})['id'] == 4
+
+    # Totais do log prevalecem sobre a recontagem dos alertas retidos
+    store.restore(source.recent(1), total=40, severity_counts={'HIGH': 30, 'LOW': 10})
+    assert store.counters() == (40, {'HIGH': 30, 'LOW': 10})
+    assert [a['id'] for a in store.recent()] == [3]
+    assert store.between(clock.current.timestamp()) == source.recent(1)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from anomaly_detector import (BASELINE_KEYS, HISTOGRAM_MAX_WIDTH, AnomalyDetector,
+                              CountHistogram, group_statistics)
+from benchmarks import reference_baseline
+
+
+def random_history(rng, rows):
+    """Histórico sintético: status com tamanhos variados (inclusive 1 linha)"""
+    statuses = ['approved', 'denied', 'failed', 'reversed', 'backend_reversed', 'refunded']
+    weights = rng.dirichlet(np.ones(len(statuses)) * 0.3)
+    status = rng.choice(statuses, size=rows, p=weights)
+    # Status raro com uma única linha (std = NaN)
+    status[rng.integers(rows)] = 'processing'
+
+    if rng.random() < 0.5:
+        count = rng.poisson(rng.uniform(0, 40), size=rows)
+    else:
+        count = np.round(rng.exponential(10, size=rows), 3)
+    return pd.DataFrame({'status': status, 'count': count})
+
+
+def assert_same_baseline(grouped, reference):
+    assert list(grouped) == list(reference)
+    for status, stats in reference.items():
+        assert set(grouped[status]) == set(BASELINE_KEYS)
+        np.testing.assert_array_equal(
+            [float(grouped[status][key]) for key in BASELINE_KEYS],
+            [float(stats[key]) for key in BASELINE_KEYS],
+            err_msg=status)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_calculate_baseline_matches_per_status_pandas(seed, capsys):
+    """Baseline agrupado = filtro por status com pandas (bit a bit, NaN = NaN)"""
+    rng = np.random.default_rng(seed)
+    detector = AnomalyDetector.__new__(AnomalyDetector)
+    detector.df_trans = random_history(rng, int(rng.integers(1, 3000)))
+
+    assert_same_baseline(detector._calculate_baseline(), reference_baseline(detector.df_trans))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_group_statistics_matches_pandas_groupby(seed):
+    """Chamada direta: grupos vazios ficam NaN, os demais batem com o pandas"""
+    rng = np.random.default_rng(seed)
+    n_groups = int(rng.integers(1, 12))
+    codes = rng.integers(0, n_groups, size=int(rng.integers(0, 500)))
+    values = rng.normal(100, 30, size=len(codes))
+    stats = group_statistics(codes, values, n_groups)
+
+    np.testing.assert_array_equal(stats['size'], np.bincount(codes, minlength=n_groups))
+    series = pd.Series(values)
+    for group in range(n_groups):
+        data = series[codes == group]
+        expected = [data.mean(), data.std(), data.median(), data.quantile(0.95),
+                    data.quantile(0.99), data.max(), data.min()]
+        np.testing.assert_array_equal([stats[key][group] for key in BASELINE_KEYS], expected,
+                                      err_msg=f'grupo {group}')
+
+
+# ---- CountHistogram / leitura em blocos ----
+
+def write_history(directory, rng, minutes=3 * 24 * 60, outlier=10 ** 7):
+    """CSVs sintéticos de transações e auth codes com um valor acima de HISTOGRAM_MAX_WIDTH"""
+    assert outlier >= HISTOGRAM_MAX_WIDTH
+    timestamps = pd.date_range('2025-07-12 13:45', periods=minutes, freq='min')
+    statuses = ['approved', 'denied', 'failed', 'reversed']
+    means = [120, 8, 2, 1]
+
+    transactions = pd.concat([
+        pd.DataFrame({'timestamp': timestamps, 'status': status,
+                      'count': rng.poisson(mean, size=minutes)})
+        for status, mean in zip(statuses, means)]).sort_values('timestamp', kind='stable')
+    transactions = transactions[transactions['count'] > 0].reset_index(drop=True)
+    transactions.loc[len(transactions) // 2, ['status', 'count']] = ['failed', outlier]
+
+    auth = transactions[['timestamp', 'count']].copy()
+    auth.insert(1, 'auth_code', rng.choice(['00', '51', '59'], size=len(auth), p=[0.9, 0.07, 0.03]))
+    auth.loc[len(auth) // 3, ['auth_code', 'count']] = ['51', outlier]
+
+    transactions_path = str(directory / 'transactions.csv')
+    auth_path = str(directory / 'transactions_auth_codes.csv')
+    transactions.to_csv(transactions_path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    auth.to_csv(auth_path, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return transactions_path, auth_path
+
+
+def assert_close_baseline(chunked, full):
+    assert list(chunked) == list(full)
+    for key, stats in full.items():
+        np.testing.assert_allclose([float(chunked[key][k]) for k in BASELINE_KEYS],
+                                   [float(stats[k]) for k in BASELINE_KEYS],
+                                   rtol=1e-12, err_msg=str(key))
+
+
+@pytest.mark.parametrize('chunksize', [97, 1000, 10 ** 6])
+def test_chunked_history_matches_full_load(tmp_path, monkeypatch, capsys, chunksize):
+    """Leitura em blocos (histogramas + excedentes) = carga completa com pandas"""
+    # Sem cache colunar: a leitura em blocos usaria o cache gravado pela carga completa
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', '')
+    paths = write_history(tmp_path, np.random.default_rng(chunksize))
+    full = AnomalyDetector(*paths)
+    chunked = AnomalyDetector(*paths, chunksize=chunksize)
+
+    # O valor extremo aparece no max, não vira coluna do histograma
+    assert full.baseline['FAILED']['max'] == 10 ** 7
+    assert full.auth_baseline['51']['max'] == 10 ** 7
+
+    assert_close_baseline(chunked.baseline, full.baseline)
+    assert_close_baseline(chunked.auth_baseline, full.auth_baseline)
+    assert chunked.thresholds.keys() == full.thresholds.keys()
+    for status in full.thresholds:
+        assert chunked.thresholds[status] == pytest.approx(full.thresholds[status], rel=1e-12)
+    np.testing.assert_array_equal(chunked.seasonal_slots, full.seasonal_slots)
+    np.testing.assert_allclose(chunked.threshold_table, full.threshold_table, rtol=1e-12)
+    assert (chunked.total_transactions, chunked.unique_statuses) == \
+        (full.total_transactions, full.unique_statuses)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_count_histogram_overflow_matches_group_statistics(seed):
+    """Largura pequena: boa parte dos valores vai para os excedentes, em blocos"""
+    rng = np.random.default_rng(seed)
+    n_groups = int(rng.integers(1, 8))
+    codes = rng.integers(0, n_groups, size=int(rng.integers(1, 400)))
+    values = rng.poisson(rng.uniform(1, 20), size=len(codes))
+    # Alguns valores extremos e um grupo que só tem excedentes
+    values[rng.integers(len(values), size=3)] = 10 ** 9
+    codes = np.append(codes, n_groups)
+    values = np.append(values, 50)
+
+    histogram = CountHistogram(max_width=8)
+    for chunk in np.array_split(np.arange(len(codes)), int(rng.integers(1, 6))):
+        histogram.add(codes[chunk], values[chunk])
+    assert histogram.histogram.shape[1] <= 8
+
+    expected = group_statistics(codes, values, n_groups + 1)
+    stats = histogram.statistics()
+    np.testing.assert_array_equal(stats['size'], expected['size'])
+    for key in BASELINE_KEYS:
+        np.testing.assert_allclose(stats[key], expected[key], rtol=1e-12, err_msg=key)
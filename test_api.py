@@ -1,11 +1,21 @@
 import requests
 import json
+import os
+import subprocess
+import sys
+import tempfile
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import random
 
 API_URL = "http://localhost:5000"
 
+# Orçamento de inicialização a frio: tempo de `import api` (ms, melhor de 3)
+IMPORT_BUDGET_MS = float(os.environ.get('MONITORING_IMPORT_BUDGET_MS', 400))
+# Bibliotecas de análise/gráficos que o caminho da API não pode carregar
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'scipy', 'sklearn', 'plotly', 'sqlalchemy']
+
 def test_health():
     """Testa health check"""
     print("\n" + "="*60)
@@ -92,10 +102,95 @@ def test_anomaly_detection():
     
     print("\n✓ Teste de anomalias concluído!")
 
+def test_batch_transactions():
+    """Testa envio de lote de transações"""
+    print("\n" + "="*60)
+    print("TESTE 4: Enviar Lote de Transações")
+    print("="*60)
+    
+    batch = [
+        {'status': 'approved', 'count': random.randint(100, 130)}
+        for _ in range(50)
+    ] + [
+        {'status': 'failed', 'count': random.randint(20, 40)}
+        for _ in range(10)
+    ]
+    
+    print(f"Enviando lote com {len(batch)} registros...")
+    response = requests.post(f"{API_URL}/transactions/batch", json=batch)
+    
+    print(f"\nStatus: {response.status_code}")
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  Registros recebidos: {data['records_received']}")
+        print(f"  Janelas com alerta: {data['batch_analysis']['alerting_windows']}")
+        print(f"  Severity: {data['batch_analysis']['severity']}")
+    else:
+        print(f"Error: {response.text}")
+    
+    return response.status_code == 200
+
+def test_auth_code_detection():
+    """Testa detecção por auth code (pico de suspeita de fraude)"""
+    print("\n" + "="*60)
+    print("TESTE 5: Detecção por Auth Code")
+    print("="*60)
+    
+    batch = [
+        {'status': 'approved', 'auth_code': '00', 'count': random.randint(100, 130)}
+        for _ in range(5)
+    ] + [
+        {'status': 'denied', 'auth_code': '59', 'count': random.randint(20, 40)}
+        for _ in range(5)
+    ]
+    
+    print("Enviando pico de auth code 59 (suspeita de fraude)...")
+    response = requests.post(f"{API_URL}/transactions/batch", json=batch)
+    
+    print(f"\nStatus: {response.status_code}")
+    if response.status_code != 200:
+        print(f"Error: {response.text}")
+        return False
+    
+    windows = response.json()['batch_analysis']['windows']
+    auth_alerts = [alert for window in windows for alert in window['alerts']
+                   if 'auth_code' in alert]
+    print(f"  Alertas de auth code: {len(auth_alerts)}")
+    for alert in auth_alerts[:3]:
+        print(f"    [{alert['severity']}] {alert['message']}")
+    
+    return any(alert['auth_code'] == '59' for alert in auth_alerts)
+
+def test_async_transactions():
+    """Testa ingestão com micro-batching (requisições simultâneas)"""
+    print("\n" + "="*60)
+    print("TESTE 6: Ingestão com Micro-batching")
+    print("="*60)
+    
+    transactions = [
+        {'status': random.choice(['approved', 'approved', 'failed']),
+         'count': random.randint(1, 10)}
+        for _ in range(20)
+    ]
+    
+    print(f"Enviando {len(transactions)} transações simultâneas para /transaction/async...")
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        responses = list(executor.map(
+            lambda t: requests.post(f"{API_URL}/transaction/async", json=t), transactions))
+    
+    ok = [r for r in responses if r.status_code == 200]
+    print(f"\n  Respostas OK: {len(ok)}/{len(responses)}")
+    if ok:
+        data = ok[-1].json()
+        print(f"  Último veredito: {data['recommendation']['severity']} "
+              f"({data['recommendation']['action']})")
+    
+    return len(ok) == len(responses)
+
 def test_get_alerts():
     """Testa endpoint de alertas"""
     print("\n" + "="*60)
-    print("TESTE 4: Buscar Alertas")
+    print("TESTE 7: Buscar Alertas")
     print("="*60)
     
     response = requests.get(f"{API_URL}/alerts")
@@ -117,7 +212,7 @@ def test_get_alerts():
 def test_dashboard():
     """Testa endpoint do dashboard"""
     print("\n" + "="*60)
-    print("TESTE 5: Dashboard Data")
+    print("TESTE 8: Dashboard Data")
     print("="*60)
     
     response = requests.get(f"{API_URL}/dashboard")
@@ -139,10 +234,127 @@ def test_dashboard():
     
     return response.status_code == 200
 
+def test_stream():
+    """Testa o stream de eventos (SSE): snapshot inicial"""
+    print("\n" + "="*60)
+    print("TESTE 9: Stream de Eventos (SSE)")
+    print("="*60)
+    
+    response = requests.get(f"{API_URL}/stream", stream=True, timeout=10)
+    print(f"Status: {response.status_code}")
+    print(f"Content-Type: {response.headers.get('Content-Type')}")
+    
+    event = None
+    data = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith('event: '):
+            event = line[len('event: '):]
+        elif line.startswith('data: '):
+            data = json.loads(line[len('data: '):])
+            break
+    response.close()
+    
+    if data is not None:
+        print(f"\n  Primeiro evento: {event}")
+        print(f"  Total de transações: {data['current_status']['total_transactions']}")
+    
+    return response.status_code == 200 and event == 'snapshot'
+
+def test_stats_cache():
+    """Testa /stats com ETag (304 quando nada mudou)"""
+    print("\n" + "="*60)
+    print("TESTE 10: Estatísticas com ETag")
+    print("="*60)
+    
+    response = requests.get(f"{API_URL}/stats")
+    etag = response.headers.get('ETag')
+    print(f"Status: {response.status_code}")
+    print(f"ETag: {etag}")
+    
+    cached = requests.get(f"{API_URL}/stats", headers={'If-None-Match': etag})
+    print(f"Com If-None-Match: {cached.status_code} ({len(cached.content)} bytes)")
+    
+    return response.status_code == 200 and cached.status_code == 304
+
+def test_invalid_transaction():
+    """Testa rejeição de timestamp inválido ou no futuro (400, sem chegar ao estado nem ao log)"""
+    print("\n" + "="*60)
+    print("TESTE 11: Transação com Timestamp Inválido")
+    print("="*60)
+    
+    statuses = []
+    for timestamp in ('not-a-date', '2099-01-01T00:00:00'):
+        transaction = {'status': 'failed', 'timestamp': timestamp}
+        for endpoint in ('/transaction', '/transaction/async'):
+            response = requests.post(f"{API_URL}{endpoint}", json=transaction)
+            print(f"{endpoint}: {response.status_code} {response.json().get('error')}")
+            statuses.append(response.status_code)
+    
+    return statuses == [400] * 4
+
+def compile_snapshot(path):
+    """Compila o snapshot do baseline em `path` (processo separado: sem pandas neste)"""
+    result = subprocess.run([sys.executable, 'compile_baseline.py', '--output', path],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(f"compile_baseline.py falhou:\n{result.stderr[-2000:]}")
+
+def measure_api_import(snapshot_path):
+    """
+    Roda `python -X importtime -c "import api"` com o snapshot informado
+    
+    Returns:
+        (tempo total em ms, módulos carregados)
+    """
+    env = dict(os.environ, MONITORING_LOG_PATH='', MONITORING_BASELINE_SNAPSHOT=snapshot_path)
+    env.pop('MONITORING_STATE_ADDRESS', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            capture_output=True, text=True, timeout=60)
+    
+    total_us = None
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        if name.strip() == 'api':
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError(f"import api falhou:\n{result.stderr[-2000:]}")
+    return total_us / 1000, modules
+
+def test_import_time():
+    """
+    Testa a inicialização a frio da API (não precisa da API rodando)
+    
+    Mede com um snapshot compilado para o teste, como em produção: sem
+    ele a API calcula o baseline dos CSVs (pandas), e o resultado
+    dependeria do que existe em data/.
+    """
+    print("\n" + "="*60)
+    print("TESTE 12: Tempo de Inicialização (import api)")
+    print("="*60)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, 'baseline_snapshot.json')
+        compile_snapshot(snapshot_path)
+        runs = [measure_api_import(snapshot_path) for _ in range(3)]
+    best_ms = min(ms for ms, _ in runs)
+    heavy = sorted(m for m in HEAVY_MODULES if any(m in modules for _, modules in runs))
+    print(f"import api: {best_ms:.0f} ms (orçamento {IMPORT_BUDGET_MS:.0f} ms)")
+    print(f"Bibliotecas pesadas carregadas: {heavy or 'nenhuma'}")
+    
+    assert not heavy, f"Caminho da API importa {heavy}"
+    assert best_ms <= IMPORT_BUDGET_MS, \
+        f"import api levou {best_ms:.0f} ms (orçamento {IMPORT_BUDGET_MS:.0f} ms)"
+
 def run_simulation():
     """Simula carga real"""
     print("\n" + "="*60)
-    print("TESTE 6: Simulação de Carga Real (30 segundos)")
+    print("TESTE 13: Simulação de Carga Real (30 segundos)")
     print("="*60)
     print("Enviando mix realista de transações...\n")
     
@@ -197,7 +409,7 @@ def run_all_tests():
         if not test_health():
             print("\n❌ API não está respondendo!")
             print("   Execute: python api.py")
-            return
+            return False
         
         time.sleep(1)
         
@@ -210,14 +422,41 @@ def run_all_tests():
         time.sleep(1)
         
         # Teste 4
-        test_get_alerts()
+        test_batch_transactions()
         time.sleep(1)
         
         # Teste 5
-        test_dashboard()
+        test_auth_code_detection()
         time.sleep(1)
         
         # Teste 6
+        test_async_transactions()
+        time.sleep(1)
+        
+        # Teste 7
+        test_get_alerts()
+        time.sleep(1)
+        
+        # Teste 8
+        test_dashboard()
+        time.sleep(1)
+        
+        # Teste 9
+        test_stream()
+        time.sleep(1)
+        
+        # Teste 10
+        test_stats_cache()
+        time.sleep(1)
+        
+        # Teste 11
+        test_invalid_transaction()
+        time.sleep(1)
+        
+        # Teste 12
+        test_import_time()
+        
+        # Teste 13
         run_simulation()
         
         # Dashboard final
@@ -229,12 +468,16 @@ def run_all_tests():
         print("\n" + "="*70)
         print("✅ TODOS OS TESTES CONCLUÍDOS!")
         print("="*70)
+        return True
         
     except requests.exceptions.ConnectionError:
         print("\n❌ ERRO: Não conectou à API")
         print("   Execute: python api.py")
+    except AssertionError as e:
+        print(f"\n❌ FALHOU: {e}")
     except Exception as e:
         print(f"\n❌ ERRO: {str(e)}")
+    return False
 
 if __name__ == "__main__":
-    run_all_tests()
\ No newline at end of file
+    sys.exit(0 if run_all_tests() else 1)
\ No newline at end of file
@@ -0,0 +1,123 @@
+from datetime import datetime
+import threading
+
+import pytest
+
+from event_log import EventLog
+
+BASE = datetime(2025, 7, 14, 10, 0).timestamp()
+
+
+def transaction(seconds, status='FAILED', count=1):
+    return {'status': status, 'count': count, 'timestamp': BASE + seconds}
+
+
+def alert(alert_id, severity, seconds=0):
+    return {'id': alert_id, 'severity': severity,
+            'timestamp': datetime.fromtimestamp(BASE + seconds).isoformat()}
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'log' / 'monitoring_log.db')
+
+
+def test_replay_after_reset_and_reopen(log_path):
+    """Escreve, reseta, escreve de novo, reabre: o replay começa no reset"""
+    log = EventLog(log_path)
+    log.append_transactions([transaction(i) for i in range(5)])
+    log.append_alert(alert(1, 'HIGH'))
+    log.append_alert(alert(2, 'CRITICAL'))
+    log.mark_reset()
+    log.append_transactions([transaction(100 + i, 'APPROVED', i) for i in range(3)])
+    log.append_alert(alert(1, 'LOW', 100))
+    log.close()
+
+    reopened = EventLog(log_path)
+    try:
+        transactions, alerts, counters = reopened.load_tail(100, 3600, 100)
+    finally:
+        reopened.close()
+
+    assert transactions == [transaction(100 + i, 'APPROVED', i) for i in range(3)]
+    assert alerts == [alert(1, 'LOW', 100)]
+    assert counters == {'total': 1, 'severity_counts': {'LOW': 1}}
+
+
+def test_reset_with_nothing_after_replays_nothing(log_path):
+    log = EventLog(log_path)
+    log.append_transactions([transaction(0)])
+    log.append_alert(alert(1, 'HIGH'))
+    log.mark_reset()
+    log.close()
+
+    reopened = EventLog(log_path)
+    try:
+        assert reopened.load_tail(100, 3600, 100) == ([], [], {'total': 0, 'severity_counts': {}})
+    finally:
+        reopened.close()
+
+
+def test_flush_makes_writes_visible(log_path):
+    """flush espera a thread de escrita: leitura em seguida já vê tudo"""
+    log = EventLog(log_path)
+    try:
+        for i in range(50):
+            log.append_transactions([transaction(i)])
+        log.flush()
+        transactions, _, _ = log.load_tail(100, 0, 10)
+        assert transactions == [transaction(i) for i in range(50)]
+    finally:
+        log.close()
+
+
+def test_tail_limits(log_path):
+    """Últimas N transações mais as do horizonte de evento; últimos N alertas"""
+    log = EventLog(log_path)
+    # Timestamps fora de ordem: voltam as 10 últimas gravadas e as que têm
+    # até 30 s antes da mais recente (t=200)
+    seconds = [180, 175, 172] + list(range(0, 100, 10)) + [200] + list(range(110, 120))
+    log.append_transactions([transaction(s) for s in seconds])
+    for i in range(1, 8):
+        log.append_alert(alert(i, 'HIGH' if i % 2 else 'LOW', i))
+    log.close()
+
+    reopened = EventLog(log_path)
+    try:
+        transactions, alerts, counters = reopened.load_tail(10, 30, 3)
+    finally:
+        reopened.close()
+
+    expected = [180, 175, 172, 200] + list(range(110, 120))
+    assert [t['timestamp'] - BASE for t in transactions] == expected
+    assert [a['id'] for a in alerts] == [5, 6, 7]
+    assert counters == {'total': 7, 'severity_counts': {'HIGH': 4, 'LOW': 3}}
+
+
+def test_concurrent_appends_all_written(log_path):
+    """Escritas concorrentes agrupadas pela thread de escrita não se perdem"""
+    log = EventLog(log_path, max_batch=7)
+
+    def writer(offset):
+        for i in range(100):
+            log.append_transactions([transaction(offset + i)])
+
+    threads = [threading.Thread(target=writer, args=(1000 * n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+
+    reopened = EventLog(log_path)
+    try:
+        transactions, _, _ = reopened.load_tail(1000, 0, 0)
+    finally:
+        reopened.close()
+
+    seconds = [t['timestamp'] - BASE for t in transactions]
+    assert sorted(seconds) == sorted(1000 * n + i for n in range(4) for i in range(100))
+    # Cada thread mantém a própria ordem de escrita
+    for n in range(4):
+        assert [s for s in seconds if 1000 * n <= s < 1000 * (n + 1)] == \
+            [1000 * n + i for i in range(100)]
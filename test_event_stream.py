@@ -0,0 +1,62 @@
+import json
+
+from event_stream import EventJournal, StreamHub
+
+
+def make_hub(journal, snapshot=None, **kwargs):
+    return StreamHub(lambda seq, timeout: journal.since(seq, min(timeout, 0.2)),
+                     lambda: snapshot or {'total': journal.last_seq},
+                     lambda: journal.last_seq, **kwargs)
+
+
+def parse(frame):
+    fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    return int(fields['id']), fields['event'], json.loads(fields['data'])
+
+
+def test_first_snapshot_tagged_with_journal_seq_without_backlog():
+    """Primeiro assinante: snapshot com a sequência atual, sem replay do histórico"""
+    journal = EventJournal()
+    for i in range(5):
+        journal.append('alert', {'n': i})
+
+    hub = make_hub(journal)
+    frames = hub.stream(heartbeat=0.05)
+    assert parse(next(frames)) == (5, 'snapshot', {'total': 5})
+
+    journal.append('alert', {'n': 5})
+    frame = next(frames)
+    while frame.startswith(':'):
+        frame = next(frames)
+    assert parse(frame) == (6, 'alert', {'n': 5})
+    frames.close()
+    assert len(hub) == 0
+
+
+def test_later_subscriber_snapshot_follows_pump():
+    journal = EventJournal()
+    journal.append('metrics', {'n': 0})
+    hub = make_hub(journal)
+    first = hub.stream(heartbeat=0.05)
+    assert parse(next(first))[0] == 1
+
+    journal.append('alert', {'n': 1})
+    frame = next(first)
+    while frame.startswith(':'):
+        frame = next(first)
+    assert parse(frame)[0] == 2
+
+    second = hub.stream(heartbeat=0.05)
+    assert parse(next(second))[:2] == (2, 'snapshot')
+    first.close()
+    second.close()
+
+
+def test_subscriber_limit():
+    journal = EventJournal()
+    hub = make_hub(journal, max_subscribers=1)
+    subscriber = hub.subscribe()
+    assert subscriber is not None
+    assert hub.subscribe() is None
+    hub.unsubscribe(subscriber)
+    assert hub.subscribe() is not None
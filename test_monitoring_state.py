@@ -0,0 +1,38 @@
+import contextlib
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from monitoring_state import MonitoringState, load_detector
+
+
+@pytest.fixture(scope='module')
+def detector():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return load_detector()
+
+
+@pytest.fixture
+def state(detector):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return MonitoringState(detector, log_path='')
+
+
+def test_receive_many_future_timestamp_fails_only_its_slot(state):
+    """Registro no futuro recebe ValueError no seu lugar; os outros seguem e nada é descartado"""
+    now = datetime.now()
+    records = [
+        {'status': 'FAILED', 'count': 2, 'timestamp': now.isoformat()},
+        {'status': 'FAILED', 'count': 2, 'timestamp': '2099-01-01T00:00:00'},
+        {'status': 'APPROVED', 'count': 5, 'timestamp': (now + timedelta(seconds=1)).isoformat()}
+    ]
+    results = state.receive_many(records)
+
+    assert isinstance(results[1], ValueError)
+    assert not isinstance(results[0], Exception) and not isinstance(results[2], Exception)
+    assert state.minute_window.late_records == 0
+    assert state.dashboard()['current_status']['total_transactions'] == 7
+
+    with pytest.raises(ValueError):
+        state.receive({'status': 'FAILED', 'count': 1, 'timestamp': '2099-01-01T00:00:00'})
@@ -0,0 +1,216 @@
+from datetime import datetime
+import random
+
+import pytest
+
+import sliding_window
+from sliding_window import DIMENSIONS, MinuteWindow, SlidingWindow, record_keys, validate_record
+
+
+def test_future_timestamp_rejected():
+    """Timestamp além da tolerância à frente do relógio não entra no estado"""
+    now = datetime(2025, 7, 14, 10, 0).timestamp()
+    with pytest.raises(ValueError, match='futuro'):
+        validate_record({'status': 'FAILED', 'timestamp': '2099-01-01T00:00:00'}, now=now)
+    with pytest.raises(ValueError, match='futuro'):
+        validate_record({'status': 'FAILED', 'timestamp': now + 301}, max_future_skew=300, now=now)
+    validate_record({'status': 'FAILED', 'timestamp': now + 299}, max_future_skew=300, now=now)
+
+
+def test_future_record_would_close_open_minutes():
+    """Por que a validação existe: um registro no futuro fecha tudo e torna o resto atrasado"""
+    window = MinuteWindow(allowed_lateness=10)
+    window.add({'status': 'FAILED', 'timestamp': '2025-07-14T10:00:10'})
+    future = {'status': 'FAILED', 'timestamp': '2099-01-01T00:00:00'}
+    with pytest.raises(ValueError):
+        validate_record(future, now=datetime(2025, 7, 14, 10, 0, 20).timestamp())
+
+    window.add(future)
+    minute, closed = window.add({'status': 'FAILED', 'timestamp': '2025-07-14T10:00:30'})
+    assert minute is None and closed == []
+    assert window.late_records == 1
+
+
+# ---- MinuteWindow ----
+
+class FakeClock:
+    """Substitui o módulo time em sliding_window: relógio controlado pelo teste"""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sliding_window, 'time', fake)
+    return fake
+
+
+def record(epoch, status='FAILED', count=1, auth_code=None):
+    transaction = {'status': status, 'count': count, 'timestamp': float(epoch)}
+    if auth_code is not None:
+        transaction['auth_code'] = auth_code
+    return transaction
+
+
+def test_minute_closes_after_lateness():
+    window = MinuteWindow(allowed_lateness=10)
+    assert window.add(record(125, count=2)) == (2, [])
+    assert window.add(record(185)) == (3, [])
+    assert window.watermark == 185
+
+    # Fim do minuto 2 (180) + 10 s de tolerância: ainda aberto em 189
+    assert window.add(record(189)) == (3, [])
+    minute, closed = window.add(record(190))
+    assert minute == 3
+    assert closed == [(2, {'status': {'FAILED': 2}, 'auth_code': {}})]
+    assert not window.is_open(2) and window.is_open(3)
+
+
+def test_out_of_order_within_lateness_is_counted():
+    window = MinuteWindow(allowed_lateness=10)
+    window.add(record(130))
+    window.add(record(185))
+    # Minuto 2 ainda aberto (watermark 185 < 190): registro atrasado entra
+    assert window.add(record(150, count=4)) == (2, [])
+    assert window.open_counts(2)['status'] == {'FAILED': 5}
+    assert window.late_records == 0
+
+
+def test_late_record_after_close_is_dropped_and_counted():
+    window = MinuteWindow(allowed_lateness=10)
+    window.add(record(130))
+    window.add(record(200))
+    assert not window.is_open(2)
+
+    assert window.add(record(170)) == (None, [])
+    assert window.add(record(10)) == (None, [])
+    assert window.late_records == 2
+    # Registro atrasado não reabre o minuto nem altera os abertos
+    assert not window.is_open(2) and not window.is_open(0)
+    assert window.open_counts(3)['status'] == {'FAILED': 1}
+
+
+def test_max_open_minutes_closes_oldest():
+    window = MinuteWindow(allowed_lateness=10000, max_open_minutes=3)
+    for epoch in (0, 60, 120):
+        assert window.add(record(epoch))[1] == []
+    minute, closed = window.add(record(180))
+    assert minute == 3
+    assert [m for m, _ in closed] == [0]
+    assert len(window) == 3
+
+    # Minuto fechado pelo limite: registros dele passam a ser atrasados
+    assert window.add(record(30)) == (None, [])
+    assert window.late_records == 1
+
+
+def test_dimensions_counted_per_minute():
+    window = MinuteWindow()
+    window.add(record(60, 'approved', 3, auth_code=0))
+    window.add(record(70, 'DENIED', 2, auth_code='51'))
+    window.add(record(80, 'DENIED', 1))
+    assert window.open_counts(1) == {'status': {'APPROVED': 3, 'DENIED': 3},
+                                     'auth_code': {'00': 3, '51': 2}}
+
+
+def test_advance_clock_closes_idle_minutes(clock):
+    window = MinuteWindow(allowed_lateness=10)
+    assert window.advance_clock(now=clock.now + 500) == []
+
+    window.add(record(125, count=7))
+    # 50 s parado: watermark 175, minuto 2 ainda aberto
+    assert window.advance_clock(now=clock.now + 50) == []
+    assert window.watermark == 175
+    clock.now += 50
+
+    # Mais 15 s: watermark 190 = fim do minuto + tolerância
+    closed = window.advance_clock(now=clock.now + 15)
+    assert closed == [(2, {'status': {'FAILED': 7}, 'auth_code': {}})]
+    assert window.watermark == 190
+    clock.now += 15
+
+    # Minuto seguinte continua aceitando registros; o fechado não
+    assert window.add(record(185)) == (3, [])
+    assert window.add(record(179)) == (None, [])
+    assert window.late_records == 1
+
+
+def test_advance_clock_follows_new_events(clock):
+    window = MinuteWindow(allowed_lateness=10)
+    window.add(record(125))
+    clock.now += 30
+    # Evento novo (watermark 150) reinicia a contagem de tempo parado
+    window.add(record(150))
+    assert window.advance_clock(now=clock.now + 39) == []
+    assert window.watermark == 189
+    assert len(window.advance_clock(now=clock.now + 40)) == 1
+
+
+def test_clear_resets_watermark_and_late_records():
+    window = MinuteWindow(allowed_lateness=0)
+    window.add(record(130))
+    window.add(record(200))
+    window.add(record(10))
+    window.clear()
+    assert window.watermark is None and window.late_records == 0 and len(window) == 0
+    assert window.advance_clock() == []
+    assert window.add(record(10)) == (0, [])
+
+
+# ---- SlidingWindow ----
+
+def recount(window):
+    """Contagens por força bruta: soma direta dos registros da janela"""
+    counts = {dimension: {} for dimension in DIMENSIONS}
+    for transaction in window:
+        count = transaction.get('count', 1)
+        for dimension, key in zip(DIMENSIONS, record_keys(transaction)):
+            if key is not None:
+                counts[dimension][key] = counts[dimension].get(key, 0) + count
+    return counts
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_running_counts_match_recount(seed):
+    """Somas correntes = recontagem da fila após inserções e descartes aleatórios"""
+    rng = random.Random(seed)
+    window = SlidingWindow(size=rng.randint(1, 20))
+    statuses = ['approved', 'DENIED', 'FAILED', 'reversed']
+    auth_codes = [None, 0, '00', 51, '51', 'N7']
+
+    for _ in range(500):
+        transaction = {'status': rng.choice(statuses), 'count': rng.randint(0, 5)}
+        auth_code = rng.choice(auth_codes)
+        if auth_code is not None:
+            transaction['auth_code'] = auth_code
+        window.add(transaction)
+
+        expected = recount(window)
+        assert window.counts == expected
+        assert window.snapshot('auth_code') == expected['auth_code']
+        assert window.total == sum(expected['status'].values())
+        assert len(window) <= window.size
+
+
+def test_key_removed_when_last_record_evicted():
+    """Chave some quando o último registro dela sai, mesmo com count 0"""
+    window = SlidingWindow(size=2)
+    window.add({'status': 'DENIED', 'count': 0, 'auth_code': '51'})
+    window.add({'status': 'APPROVED', 'count': 3, 'auth_code': '00'})
+    assert window.status_counts == {'DENIED': 0, 'APPROVED': 3}
+
+    window.add({'status': 'APPROVED', 'count': 1})
+    assert window.status_counts == {'APPROVED': 4}
+    assert window.auth_code_counts == {'00': 3}
+
+    window.add({'status': 'APPROVED', 'count': 2})
+    assert window.status_counts == {'APPROVED': 3}
+    assert window.auth_code_counts == {}
@@ -0,0 +1,204 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sql_analysis import COUNT_SOURCES, ROLLUP_GRAINS, SQLAnalyzer
+
+
+def synthetic_counts(column, names, hours=50, seed=0):
+    """Contagens por minuto ordenadas pelo timestamp, com alguns nomes ausentes em cada minuto"""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range('2025-07-12 22:30', periods=hours * 60, freq='min')
+    frames = []
+    for i, name in enumerate(names):
+        frame = pd.DataFrame({'timestamp': timestamps, column: name,
+                              'count': rng.poisson(100 / (i + 1) ** 2, size=len(timestamps))})
+        frames.append(frame[rng.random(len(frame)) < 0.9])
+    return pd.concat(frames).sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+def write_csv(df, path, mode='w'):
+    df.to_csv(path, mode=mode, header=(mode == 'w'), index=False,
+              date_format='%Y-%m-%d %H:%M:%S')
+
+
+def rollups(analyzer):
+    """Conteúdo de todas as rollups materializadas, ordenado"""
+    tables = [f"{config['dimension']}_by_{grain}"
+              for config in COUNT_SOURCES.values() for grain, _ in ROLLUP_GRAINS[:-1]]
+    tables += [f'totals_by_{grain}' for grain, _ in ROLLUP_GRAINS]
+    return {table: analyzer.conn.execute(f'SELECT * FROM {table} ORDER BY 1, 2').fetchall()
+            for table in tables}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    transactions = synthetic_counts('status', ['approved', 'denied', 'failed', 'reversed'])
+    auth = synthetic_counts('auth_code', ['00', '51', '59'], seed=1)
+    # Contagem vazia: conta em records mas não em counted/min/max
+    transactions.loc[transactions.index[::97], 'count'] = np.nan
+    transactions['count'] = transactions['count'].astype('Int64')
+    return tmp_path, transactions, auth
+
+
+def test_incremental_rollups_equal_full_rebuild(sources, capsys):
+    """Rollups somadas em três cargas incrementais = recarga completa"""
+    directory, transactions, auth = sources
+    transactions_path = str(directory / 'transactions.csv')
+    auth_path = str(directory / 'auth_codes.csv')
+
+    # Cortes fora das fronteiras de minuto, hora e dia: buckets já existentes
+    # recebem linhas novas
+    cuts = [0, len(transactions) // 3 + 1, 2 * len(transactions) // 3 + 2, len(transactions)]
+    auth_cuts = [0, len(auth) // 2 + 1, len(auth) // 2 + 2, len(auth)]
+    for i, (a, b) in enumerate(zip(cuts, cuts[1:])):
+        mode = 'w' if i == 0 else 'a'
+        write_csv(transactions.iloc[a:b], transactions_path, mode)
+        write_csv(auth.iloc[auth_cuts[i]:auth_cuts[i + 1]], auth_path, mode)
+        analyzer = SQLAnalyzer(transactions_path=transactions_path, auth_codes_path=auth_path,
+                               db_path=str(directory / 'incremental.db'))
+        assert analyzer.transaction_rows == b
+        if i < 2:
+            analyzer.close()
+    assert 'appended' in capsys.readouterr().out
+    incremental = rollups(analyzer)
+    analyzer.close()
+
+    full = SQLAnalyzer(transactions_path=transactions_path, auth_codes_path=auth_path,
+                       db_path=str(directory / 'full.db'))
+    try:
+        assert rollups(full) == incremental
+        assert all(incremental.values())
+
+        # Rollups conferem com o agrupamento direto das contagens por minuto
+        day = full.conn.execute(
+            "SELECT status_id, ts - ts % 86400, COUNT(*), COUNT(count), COALESCE(SUM(count), 0), "
+            "MIN(count), MAX(count) FROM transaction_counts GROUP BY 1, 2 ORDER BY 1, 2").fetchall()
+        assert incremental['status_by_day'] == day
+    finally:
+        full.close()
+
+
+def test_file_queries_use_rollups_and_match_minute_queries(sources, tmp_path, monkeypatch, capsys):
+    """Queries de transações do arquivo (sobre as rollups) = mesmas queries sobre os minutos"""
+    directory, transactions, _ = sources
+    transactions = transactions.dropna()
+    transactions_path = str(directory / 'transactions.csv')
+    write_csv(transactions, transactions_path)
+
+    monkeypatch.chdir(tmp_path)
+    analyzer = SQLAnalyzer(transactions_path=transactions_path, db_path=str(directory / 'a.db'))
+    try:
+        analyzer.save_queries_to_file()
+        with open('queries/sql_queries.sql', encoding='utf-8') as f:
+            text = f.read()
+        transaction_part = text[text.index('PARTE 2'):]
+        assert 'FROM transactions' not in transaction_part
+        assert 'status_by_day' in transaction_part and 'totals_by_minute' in transaction_part
+
+        # Queries 1-5 são de checkout (tabela ausente aqui): só as de transações
+        results = analyzer.export_query_file(output_dir='results')
+        assert [rows for _, rows in results[:5]] == [None] * 5
+        paths = [path for path, _ in results[5:]]
+        file_result = [pd.read_csv(path) for path in paths]
+
+        def minutes(query):
+            return pd.read_sql_query(query, analyzer.conn)
+
+        stats = minutes("""
+            SELECT status, COUNT(*) as records, SUM(count) as total_transactions,
+                   ROUND(AVG(count), 2) as avg_per_minute, MIN(count) as min_per_minute,
+                   MAX(count) as max_per_minute
+            FROM transactions GROUP BY status ORDER BY total_transactions DESC""")
+        pd.testing.assert_frame_equal(file_result[0], stats)
+
+        # Acumulado por hora termina no total de cada status
+        cumulative = file_result[1].groupby('status')['cumulative_count'].last()
+        assert cumulative.to_dict() == stats.set_index('status')['total_transactions'].to_dict()
+
+        totals = minutes("""
+            SELECT timestamp, SUM(count) as total_transactions FROM transactions
+            GROUP BY timestamp ORDER BY total_transactions DESC LIMIT 10""")
+        assert file_result[2]['total_transactions'].tolist() == \
+            totals['total_transactions'].tolist()
+
+        approval = minutes("""
+            WITH minute_stats AS (
+                SELECT timestamp,
+                       SUM(CASE WHEN UPPER(status) = 'APPROVED' THEN count ELSE 0 END) as approved,
+                       SUM(count) as total
+                FROM transactions GROUP BY timestamp
+            )
+            SELECT timestamp, approved, total,
+                   ROUND((approved * 100.0 / total), 2) as approval_rate
+            FROM minute_stats WHERE total > 0 ORDER BY timestamp""")
+        pd.testing.assert_frame_equal(
+            file_result[3].sort_values('timestamp').reset_index(drop=True), approval)
+
+        trend = minutes("""
+            SELECT timestamp, status, count as current_count,
+                   LAG(count) OVER (PARTITION BY status ORDER BY timestamp) as previous_count
+            FROM transactions""").sort_values(['timestamp', 'status']).reset_index(drop=True)
+        result = file_result[4].sort_values(['timestamp', 'status']).reset_index(drop=True)
+        pd.testing.assert_frame_equal(result[trend.columns], trend, check_dtype=False)
+    finally:
+        analyzer.close()
+
+
+# ---- Cache de resultados ----
+
+def test_write_then_run_query_misses_cache(sources):
+    """Escrita no banco (por esta ou outra conexão) invalida o cache de resultados"""
+    directory, transactions, _ = sources
+    transactions_path = str(directory / 'transactions.csv')
+    write_csv(transactions, transactions_path)
+    db_path = str(directory / 'cache.db')
+    query = 'SELECT COUNT(*) AS n, SUM(count) AS total FROM transaction_counts'
+
+    analyzer = SQLAnalyzer(transactions_path=transactions_path, db_path=db_path)
+    try:
+        before, cached = analyzer.run_query(query)
+        assert not cached
+        assert analyzer.run_query(query)[1]
+
+        # Escrita pela própria conexão (DML via run_query não entra no cache)
+        assert not analyzer.run_query('DELETE FROM transaction_counts WHERE ts % 420 = 0')[1]
+        after, cached = analyzer.run_query(query)
+        assert not cached
+        assert after['n'][0] < before['n'][0]
+        assert analyzer.run_query(query)[1]
+
+        # Escrita por outra conexão (outro processo com o banco aberto)
+        other = sqlite3.connect(db_path)
+        with other:
+            other.execute('DELETE FROM transaction_counts WHERE ts % 300 = 0')
+        other.close()
+        latest, cached = analyzer.run_query(query)
+        assert not cached
+        assert latest['n'][0] < after['n'][0]
+    finally:
+        analyzer.close()
+
+
+def test_cache_survives_reopen_without_writes(sources):
+    """Sem escrita, o resultado continua valendo depois de reabrir o banco"""
+    directory, transactions, _ = sources
+    transactions_path = str(directory / 'transactions.csv')
+    write_csv(transactions, transactions_path)
+    db_path = str(directory / 'cache.db')
+    query = 'SELECT status_id, SUM(total) FROM status_by_day GROUP BY status_id'
+
+    analyzer = SQLAnalyzer(transactions_path=transactions_path, db_path=db_path)
+    first, cached = analyzer.run_query(query)
+    analyzer.close()
+    assert not cached
+
+    analyzer = SQLAnalyzer(transactions_path=transactions_path, db_path=db_path)
+    try:
+        second, cached = analyzer.run_query(query)
+        assert cached
+        pd.testing.assert_frame_equal(second, first)
+    finally:
+        analyzer.close()